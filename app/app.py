@@ -65,6 +65,7 @@ from autonomous import log
 from filters.forms import label_style
 from filters.utils import bonus, get_icon, roll_dice
 from models.user import User
+from models.utility import identity_map
 
 
 def create_app(config=None):
@@ -95,6 +96,15 @@ def create_app(config=None):
         """Endpoint to serve the favicon."""
         return url_for("static", filename="images/favicon.ico")
 
+    @app.after_request
+    def identity_map_stats(response):
+        # documents loaded from the database versus served from the identity map
+        if stats := identity_map.stats():
+            response.headers["X-Identity-Map"] = (
+                f"loads={stats['loads']}, hits={stats['hits']}"
+            )
+        return response
+
     @app.errorhandler(HTTPException)
     def handle_exception(e):
         emsg = json.dumps(
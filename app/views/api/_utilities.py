@@ -1,4 +1,3 @@
-import base64
 import os
 import smtplib
 import ssl
@@ -18,11 +17,12 @@ from jinja2 import TemplateNotFound
 
 from autonomous import log
 from models.user import User
+from models.utility import membership
 from models.world import World
 
 
 def authenticate(user, obj):
-    if obj and user in obj.world.users:
+    if obj and membership.is_member(user, obj.world):
         return True
     return False
 
@@ -35,9 +35,10 @@ def loader(model=None, pk=None):
         # log(f"get request: {request_data}")
     elif request.method == "POST":
         if request.files:
+            # uploads are passed on as file handles; werkzeug spools large ones to a
+            # temporary file, so they are never read into memory here
             request_data = dict(request.form)
-            for key, file in request.files.items():
-                request_data[key] = base64.b64encode(file.read()).decode("utf-8")
+            request_data.update(request.files.items())
         else:
             request_data = dict(request.json)
         # log(f"post: {request_data}")
@@ -38,6 +38,8 @@ from ._utilities import loader as _loader
 
 admin_endpoint = Blueprint("admin", __name__)
 
+IMAGES_PER_PAGE = 120
+
 tags = {
     "type": [
         "episode",
@@ -127,30 +129,27 @@ def images(tag_filter=None):
     if request_data.get("scan"):
         Image.storage_scan()
 
-    images = Image.all()
-    tag_list = ["_NoGenre", "_NoType", "_Missing"]
-    for i in images:
-        for tag in i.tags:
-            if tag not in tag_list:
-                tag_list.append(tag)
-    tag_list = sorted(list(set(tag_list)))
+    tag_list = sorted(["_NoGenre", "_NoType", "_Missing", *Image.tag_counts()])
+    page = int(request_data.get("page") or 1)
+    query = {}
     if tag_filter:
         log(tag_filter)
         if tag_filter == "_NoGenre":
-            images = [
-                img for img in images if not any(t in img.tags for t in tags["genre"])
-            ]
+            query["exclude_tags"] = tags["genre"]
         elif tag_filter == "_NoType":
-            images = [
-                img for img in images if not any(t in img.tags for t in tags["type"])
-            ]
+            query["exclude_tags"] = tags["type"]
         elif tag_filter == "_Missing":
-            images = [img for img in images if not any(t in img.tags for t in tag_list)]
+            query["untagged"] = True
         else:
-            images = [img for img in images if tag_filter.lower() in img.tags]
-    images.sort(key=lambda x: len(x.associations), reverse=True)
+            query["all_tags"] = [tag_filter]
+    images = Image.search_tags(**query, page=page, per_page=IMAGES_PER_PAGE)
     return get_template_attribute("admin/_images.html", "manage")(
-        user, images=images, tags=tag_list, tag=tag_filter
+        user,
+        images=images,
+        tags=tag_list,
+        tag=tag_filter,
+        page=page,
+        more=len(images) == IMAGES_PER_PAGE,
     )
 
 
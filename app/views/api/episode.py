@@ -4,7 +4,6 @@
 ## Components Endpoints
 """
 
-import base64
 import json
 import os
 import random
@@ -290,15 +289,13 @@ def episodegenerategraphic(pk):
 def episodeaudio(pk):
     user, _, request_data = _loader()
     obj = Episode.get(pk)
-    if "audio_file" not in request_data:
+    if not (audio_file := request_data.get("audio_file")):
         return {"error": "No audio file uploaded"}, 400
-    audio_file_str = request_data["audio_file"]
-    audio_file = base64.b64decode(audio_file_str)
     if obj.audio:
         log("adding to file")
-        obj.audio.add_to_file(audio_file)
+        obj.audio.append(audio_file.stream)
     else:
-        obj.audio = Audio.from_file(audio_file)
+        obj.audio = Audio.from_file(audio_file.stream)
     obj.save()
     return "success"
 
@@ -325,6 +322,7 @@ def episodetranscribeclear(pk):
     obj = Episode.get(pk)
     obj.transcription = ""
     obj.interpreted_transcription = ""
+    obj.transcription_segments = {}
     if obj.audio:
         obj.audio.delete()
         obj.audio = None
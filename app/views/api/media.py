@@ -2,8 +2,6 @@ r"""
 # Management API Documentation
 """
 
-import base64
-
 import markdown
 from autonomous.model.automodel import AutoModel
 from flask import Blueprint, get_template_attribute, request
@@ -53,11 +51,9 @@ def maps_gallery():
 )
 def map_file_upload():
     user, obj, request_data = _loader()
-    if "map" not in request_data:
+    if not (map_file := request_data.get("map")):
         return {"error": "No map file uploaded"}, 400
-    map_file_str = request_data["map"]
-    map_file = base64.b64decode(map_file_str)
-    obj.map = Map.from_file(map_file)
+    obj.map = Map.from_file(map_file.stream)
     obj.save()
     return get_template_attribute("shared/_map.html", "map")(user, obj)
 
@@ -9,6 +9,7 @@ from flask import Blueprint, get_template_attribute, request
 from jinja2 import TemplateNotFound
 
 from autonomous import log
+from models.utility import search_index
 
 from ._utilities import loader as _loader
 
@@ -52,9 +53,7 @@ def navsearch():
             results = obj.world.search_autocomplete(query=query)
             results = [r for r in results if r != obj]
         else:
-            results = [
-                r for w in user.worlds for r in w.search_autocomplete(query=query)
-            ]
+            results = search_index.search(user.worlds, query)
 
     # log(macro, query, [r.name for r in results])
     return get_template_attribute("_nav.html", "nav_dropdown")(user, obj, results)
@@ -92,8 +92,7 @@ def merge_story(pk):
         story.rumors += mergestory.rumors
         story.information += mergestory.information
         story.tasks += mergestory.tasks
-        for assoc in mergestory.associations:
-            story.add_association(assoc)
+        story.add_associations(mergestory.associations)
         for event in mergestory.events:
             if story not in event.stories:
                 event.stories += [story]
@@ -16,6 +16,7 @@ from autonomous import log
 from models.campaign.campaign import Campaign
 from models.campaign.episode import Episode
 from models.stories.encounter import Encounter
+from models.stories.event import Event
 from models.stories.lore import Lore
 from models.stories.quest import Quest  # for the importer
 from models.stories.story import Story
@@ -143,6 +144,17 @@ def worldcalendar(pk):
     return get_template_attribute("models/_world.html", "manage_details")(user, world)
 
 
+@world_endpoint.route("/<string:pk>/timeline", methods=("POST",))
+def worldtimeline(pk):
+    user, obj, request_data = _loader()
+    world = World.get(pk)
+    after = Event.get(request_data.get("after")) if request_data.get("after") else None
+    events, more = world.timeline_page(after=after)
+    return get_template_attribute("shared/_timeline.html", "timeline_entries")(
+        user, world, events, more, offset=int(request_data.get("offset") or 0)
+    )
+
+
 @world_endpoint.route("/<string:pk>/delete", methods=("POST",))
 def worlddelete(pk):
     user, obj, request_data = _loader()
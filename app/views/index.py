@@ -1,3 +1,4 @@
+import io
 import json
 import os
 
@@ -12,6 +13,8 @@ from flask import (
     request,
     session,
 )
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
 
 from autonomous import log
 from models.audio.audio import Audio
@@ -20,11 +23,14 @@ from models.gmscreen.gmscreen import GMScreen  # required import for model loadi
 from models.images.image import Image
 from models.stories.event import Event
 from models.ttrpgobject.faction import Faction  # required import for model loading
+from models.utility import fragments
 from models.world import World
 
 from .api._utilities import authenticate as _authenticate
 from .api._utilities import loader as _loader
 
+MEDIA_CHUNK_SIZE = 256 * 1024
+
 index_page = Blueprint("index", __name__)
 
 
@@ -47,7 +53,10 @@ def page(model, pk, page=""):
     session["page"] = f"/{model}/{pk}{'/' + page if page else ''}"
     if "manage" in page and not _authenticate(user, obj):
         return "<p>You do not have permission to manage this object<p>"
-    page = get_template_attribute(f"models/_{model}.html", page or "index")(user, obj)
+    if "manage" in page:
+        page = get_template_attribute(f"models/_{model}.html", page)(user, obj)
+    else:
+        page = fragments.render(f"models/_{model}.html", page or "index", user, obj)
 
     return render_template("index.html", user=user, obj=obj, page=page)
 
@@ -123,12 +132,20 @@ def associations(model, pk):
 def image(pk, size="orig"):
     img = Image.get(pk)
     if img and img.data:
-        img_data = img.resize(size) if size != "orig" else img.read()
-        # log(img_data)
-        return Response(
-            img_data,
-            mimetype=img.data.content_type,
-            headers={"Content-Disposition": f"inline; filename={img.pk}.webp"},
+        if size == "orig":
+            return _send_media(
+                img.data.get,
+                mimetype=img.data.content_type,
+                filename=f"{img.pk}.webp",
+                etag=img.etag(size),
+                last_modified=img.last_modified,
+            )
+        return _send_media(
+            lambda: io.BytesIO(data) if (data := img.derivative(size)) else None,
+            mimetype="image/webp",
+            filename=f"{img.pk}.webp",
+            etag=img.etag(size),
+            last_modified=img.last_modified,
         )
     else:
         return Response("No image available", status=404)
@@ -136,16 +153,50 @@ def image(pk, size="orig"):
 
 @index_page.route("/audio/<string:pk>", methods=("GET",))
 def audio(pk):
-    if audio := Audio.get(pk):
-        return Response(
-            audio.read(),
+    if (audio := Audio.get(pk)) and audio.length:
+        return _send_media(
+            audio.open,
             mimetype="audio/mpeg",
-            headers={"Content-Disposition": f"inline; filename={pk}.mp3"},
+            filename=f"{pk}.mp3",
+            etag=audio.etag,
         )
     else:
         return Response("No audio available", status=404)
 
 
+def _send_media(open_file, mimetype, filename, etag, last_modified=None):
+    """
+    Streams the seekable file returned by `open_file`, answering conditional requests
+    with 304 before the file is opened and Range requests with 206, reading only the
+    requested bytes. Answers 404 when `open_file` returns None.
+    """
+    if not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        response = Response(status=304)
+    elif (file := open_file()) is None:
+        return Response("No media available", status=404)
+    else:
+        length = file.seek(0, io.SEEK_END)
+        file.seek(0)
+        response = Response(
+            wrap_file(request.environ, file, buffer_size=MEDIA_CHUNK_SIZE),
+            mimetype=mimetype,
+            direct_passthrough=True,
+            headers={"Content-Disposition": f"inline; filename={filename}"},
+        )
+        response.content_length = length
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # the urls stay the same when the media changes, so browsers must revalidate
+    response.cache_control.no_cache = True
+    if response.status_code == 200:
+        response = response.make_conditional(
+            request.environ, accept_ranges=True, complete_length=length
+        )
+    return response
+
+
 # MARK: Association routes
 ###########################################################
 ##                    Task Routes                        ##
@@ -4,13 +4,14 @@ from dmtoolkit import dmtools
 from flask import get_template_attribute
 
 from autonomous import log
+from models.utility import fragments
 
 
 def get_icon(obj, size="2rem"):
     try:
         icon_func = obj.title if hasattr(obj, "title") else obj.model_name()
         icon_func = icon_func.lower().replace(" ", "").replace("-", "")
-        return get_template_attribute("shared/_icons.html", icon_func)(size)
+        return fragments.static("shared/_icons.html", icon_func, size)
     except Exception as e:
         log(e, obj, "No icon found for object")
     return get_template_attribute("shared/_icons.html", "default")(size)
@@ -1,29 +1,97 @@
 import io
+import os
 import random
 
+import gridfs
 import requests
 from autonomous.ai.audioagent import AudioAgent
+from autonomous.db.connection import get_db
 from autonomous.model.autoattr import (
+    DictAttr,
     FileAttr,
+    ListAttr,
 )
 from autonomous.model.automodel import AutoModel
 from bs4 import BeautifulSoup
+from mutagen.mp3 import MP3
 
 from autonomous import log
+from models.utility import agents
+
+# length of the pieces long recordings are transcribed in, and how much they overlap
+SEGMENT_SECONDS = int(os.environ.get("AUDIO_SEGMENT_SECONDS", 600))
+SEGMENT_OVERLAP_SECONDS = int(os.environ.get("AUDIO_SEGMENT_OVERLAP_SECONDS", 15))
+# GridFS bucket for the parts appended to a recording
+PARTS_COLLECTION = "audio_parts"
+CHUNK_SIZE = 256 * 1024
+
+
+def _parts_fs():
+    return gridfs.GridFS(get_db(), collection=PARTS_COLLECTION)
+
+
+class AudioStream(io.RawIOBase):
+    """
+    A read-only, seekable file over the stored parts of a recording, which reads only
+    the bytes asked for.
+    """
+
+    def __init__(self, parts):
+        self.parts = parts
+        self.length = sum(p.length for p in parts)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.length}
+        self.position = min(max(base[whence] + offset, 0), self.length)
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length - self.position
+        chunks = []
+        offset = 0
+        for part in self.parts:
+            if size <= 0:
+                break
+            if self.position < offset + part.length:
+                part.seek(self.position - offset)
+                chunk = part.read(min(size, offset + part.length - self.position))
+                chunks.append(chunk)
+                self.position += len(chunk)
+                size -= len(chunk)
+            offset += part.length
+        return b"".join(chunks)
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
 
 
 class Audio(AutoModel):
+    # the start of recordings saved before parts were stored separately
     data = FileAttr()
+    # {"file_id", "length"} of each part of the recording, in order
+    parts = ListAttr(DictAttr())
 
-    voices = AudioAgent().available_voices()
+    voices = agents.get(AudioAgent).available_voices()
 
     @classmethod
     def from_file(cls, file):
         try:
-            fobj = io.BytesIO(file)
             audio = cls()
-            audio.data.put(fobj.getvalue(), content_type="audio/mpeg")
             audio.save()
+            audio.append(file)
             return audio
         except (requests.exceptions.RequestException, ValueError, IOError) as e:
             log(f"==== Error: {e} ====")
@@ -44,10 +112,10 @@ class Audio(AutoModel):
 {pre_text}{audio_text}{post_text}
 """
         message = BeautifulSoup(message, "html.parser").get_text()
-        voiced_scene = AudioAgent().generate(message, voice=voice)
+        voiced_scene = agents.get(AudioAgent).generate(message, voice=voice)
         obj = cls()
-        obj.data.put(voiced_scene, content_type="audio/mpeg")
         obj.save()
+        obj.append(voiced_scene)
         return obj
 
     @classmethod
@@ -56,10 +124,12 @@ class Audio(AutoModel):
     ):
         from models.world import World
 
-        if not isinstance(audio_file, cls):
-            raise ValueError("audio_file must be an instance of Audio class.")
-        transcription = AudioAgent().transcribe(
-            audio_file.to_file(), prompt=prompt, **kwargs
+        if isinstance(audio_file, cls):
+            audio_file = audio_file.to_file()
+        elif not isinstance(audio_file, bytes):
+            raise ValueError("audio_file must be an instance of Audio class or audio bytes.")
+        transcription = agents.get(AudioAgent).transcribe(
+            audio_file, prompt=prompt, **kwargs
         )
         return transcription
 
@@ -67,37 +137,120 @@ class Audio(AutoModel):
     def get_voice(cls, filters=[]):
         from models.world import World
 
-        if voices := AudioAgent().available_voices(filters=filters):
+        if voices := agents.get(AudioAgent).available_voices(filters=filters):
             return random.choice(voices)
         return ""
 
     ################### Crud Methods #####################
+    @property
+    def length(self):
+        return (self.data.length if self.data else 0) + sum(
+            p["length"] for p in self.parts
+        )
+
+    @property
+    def etag(self):
+        # recordings only grow, so the parts and length identify the content
+        return f"{self.pk}-{len(self.parts)}-{self.length}"
+
+    def open(self):
+        """
+        Returns the whole recording as one seekable file, or None if it is empty. Each
+        call opens its own GridFS handles, so streams can be read from several threads.
+        """
+        fs = _parts_fs()
+        parts = []
+        if self.data and self.data.grid_id:
+            # not self.data.get(), which returns a handle shared by every caller
+            data_fs = gridfs.GridFS(
+                get_db(self.data.db_alias), collection=self.data.collection_name
+            )
+            parts.append(data_fs.get(self.data.grid_id))
+        parts += [fs.get(p["file_id"]) for p in self.parts]
+        return AudioStream(parts) if parts else None
+
     def read(self):
-        if self.data:
-            self.data.seek(0)
-            return self.data.read()
+        if stream := self.open():
+            return stream.read()
 
     def to_file(self):
-        if self.data:
-            self.data.seek(0)
-            return self.data.read()
-        return None
+        return self.read()
 
-    def add_to_file(self, file):
-        if self.data:
-            current_data = self.data.read()
-            new_data = current_data + file
-            log(self.data.size)
-            self.data.replace(new_data, content_type="audio/mpeg")
-            log(self.data.size)
-        else:
-            self.data.put(file, content_type="audio/mpeg")
-        self.save()
+    def read_range(self, start, end):
+        if stream := self.open():
+            stream.seek(start)
+            return stream.read(end - start)
+
+    def segments(self, seconds=None, overlap=None):
+        """
+        Splits the recording into byte ranges of about `seconds` of audio that overlap
+        the previous range by `overlap` seconds. Ranges start on an MP3 frame, so each
+        one can be decoded on its own, and depend only on the bytes before them, so
+        appending to the recording leaves the earlier ranges unchanged.
+
+        Returns:
+            list: (start, end) byte offsets.
+        """
+        if not (stream := self.open()):
+            return []
+        seconds = seconds or SEGMENT_SECONDS
+        overlap = SEGMENT_OVERLAP_SECONDS if overlap is None else overlap
+        header = stream.read(64 * 1024)
+        try:
+            bytes_per_second = MP3(io.BytesIO(header)).info.bitrate // 8
+        except Exception as e:
+            log(f"Unable to read the bitrate, using 128kbps: {e}", _print=True)
+            bytes_per_second = 16000
+        size = stream.length
+        step = bytes_per_second * max(seconds - overlap, 1)
+        ranges = []
+        start = 0
+        while start < size:
+            end = min(start + bytes_per_second * seconds, size)
+            ranges.append(
+                (start, self._frame_start(stream, end) if end < size else size)
+            )
+            if end >= size:
+                break
+            start = self._frame_start(stream, start + step)
+        return ranges
+
+    def _frame_start(self, stream, offset):
+        # the next MP3 frame sync word at or after offset
+        stream.seek(offset)
+        window = stream.read(8 * 1024)
+        for i in range(len(window) - 1):
+            if window[i] == 0xFF and window[i + 1] & 0xE0 == 0xE0:
+                return offset + i
+        return offset
+
+    def append(self, file):
+        """
+        Adds `file` (bytes or a file-like object) to the end of the recording. Each
+        part is stored as its own GridFS file, so appending never reads or rewrites
+        what is already stored.
+        """
+        if isinstance(file, bytes):
+            file = io.BytesIO(file)
+        fs = _parts_fs()
+        file_id = fs.put(
+            file, audio=str(self.pk), content_type="audio/mpeg", chunkSize=CHUNK_SIZE
+        )
+        part = {"file_id": file_id, "length": fs.get(file_id).length}
+        # pushed atomically so concurrent uploads cannot drop each other's parts
+        Audio.objects(pk=self.pk).update_one(push__parts=part)
+        self.reload("parts")
         return self
 
+    def add_to_file(self, file):
+        return self.append(file)
+
     def delete(self):
         if self.data:
             self.data.delete()
+        fs = _parts_fs()
+        for part in self.parts:
+            fs.delete(part["file_id"])
         return super().delete()
 
     def url(self):
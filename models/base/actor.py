@@ -18,6 +18,7 @@ from autonomous import log
 from models.audio.audio import Audio
 from models.ttrpgobject.ability import Ability
 from models.ttrpgobject.ttrpgobject import TTRPGObject
+from models.utility import agents
 from models.utility import tasks as utility_tasks
 
 
@@ -173,6 +174,7 @@ class Actor(TTRPGObject):
 """
         super().generate(prompt)
         if not self.abilities:
+            batch = utility_tasks.TaskBatch()
             for _ in range(random.randint(1, 6)):
                 ability = Ability(
                     world=self.world,
@@ -180,8 +182,9 @@ class Actor(TTRPGObject):
                 )
                 ability.save()
                 self.abilities.append(ability)
-                self.save()
-                utility_tasks.start_task(f"/generate/ability/{ability.pk}")
+                batch.add(f"/generate/ability/{ability.pk}")
+            self.save()
+            batch.submit()
 
     def speak(self, message):
         message = f"""
@@ -234,7 +237,7 @@ Say the following as the following character, who is described as {self.backstor
 
         npc_message = BeautifulSoup(response, "html.parser").get_text()
         voice = self.voice if hasattr(self, "voice") else "onyx"
-        voiced_scene = AudioAgent().generate(npc_message, voice=voice)
+        voiced_scene = agents.get(AudioAgent).generate(npc_message, voice=voice)
         if self.audio:
             self.audio.delete()
             self.audio.replace(voiced_scene, content_type="audio/mpeg")
@@ -78,14 +78,7 @@ The map should be in a {self.world.map_style} style.
         return self.map
 
     def get_map_list(self):
-        maps = []
-        for img in Map.all():
-            # log(img.asset_id)
-            if all(
-                t in img.tags for t in ["map", self.model_name().lower(), self.genre]
-            ):
-                maps.append(img)
-        return maps
+        return Map.search_tags(all_tags=["map", self.model_name().lower(), self.genre])
 
     ################### Crud Methods #####################
 
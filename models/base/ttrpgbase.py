@@ -1,3 +1,4 @@
+import hashlib
 import inspect
 import random
 import traceback
@@ -5,7 +6,7 @@ import traceback
 import markdown
 import validators
 from autonomous.db import ValidationError
-from autonomous.model.autoattr import IntAttr, ReferenceAttr, StringAttr
+from autonomous.model.autoattr import DictAttr, IntAttr, ReferenceAttr, StringAttr
 from autonomous.model.automodel import AutoModel
 from flask import get_template_attribute
 from slugify import slugify
@@ -14,7 +15,11 @@ from autonomous import log
 from models.images.image import Image
 from models.images.map import Map
 from models.journal import Journal
+from models.utility import context as prompt_context
+from models.utility import fragments
 from models.utility import parse_attributes
+from models.utility import registry as world_registry
+from models.utility import search_index
 from models.utility import tasks as utility_tasks
 
 MAX_NUM_IMAGES_IN_GALLERY = 100
@@ -40,6 +45,10 @@ class TTRPGBase(AutoModel):
     journal = ReferenceAttr(choices=[Journal])
     foundry_id = StringAttr(default="")
     foundry_client_id = StringAttr(default="")
+    text_fingerprints = DictAttr(default={})
+    history_built_from = DictAttr(default={})
+    # only ever incremented, see fragments.touch
+    render_version = IntAttr(default=0)
 
     start_date_label = "Founded"
     end_date_label = "Abandoned"
@@ -65,6 +74,8 @@ class TTRPGBase(AutoModel):
     _no_copy = {
         "journal": None,
         "history": "",
+        "history_built_from": {},
+        "render_version": 0,
     }
 
     _funcobj = {}
@@ -228,14 +239,27 @@ class TTRPGBase(AutoModel):
 
     @property
     def episodes(self):
-        return [e for c in self.campaigns for e in c.episodes if self in e.associations]
+        from models.campaign.episode import Episode
+
+        return sorted(
+            self.world.registry.referrers(self, Episode),
+            key=lambda e: e.episode_num,
+        )
 
     @property
     def events(self):
-        self.world.events.sort(key=lambda e: e.end_date, reverse=True)
+        from models.stories.event import Event
+
+        if self.world.calendar:
+            self.world.calendar.ensure_ordinals()
+        # sorted by the stored end ordinal, so the end dates are not loaded
         return sorted(
-            [e for e in self.world.events if self in e.associations],
-            key=lambda e: e.end_date,
+            [
+                e
+                for e in self.world.registry.referrers(self, Event)
+                if e.end_ordinal is not None
+            ],
+            key=lambda e: e.end_ordinal,
             reverse=True,
         )
 
@@ -326,6 +350,7 @@ class TTRPGBase(AutoModel):
         if self.image:
             self.image.delete()
             self.image = None
+        world_registry.invalidate(self.world, self.model_name())
         return super().delete()
 
     # MARK: Generate
@@ -341,16 +366,25 @@ Use and expand on the existing object data listed below for the {self.title} obj
 {"- Backstory: " + self.backstory.strip() if self.backstory.strip() else ""}
 {f"- Controlled By: {self.owner.name}" if hasattr(self, "owner") and self.owner else ""}
 """
-        final_prompt = f"""
+        context = prompt_context.ContextBuilder()
+        context.add(
+            "setting",
+            f"""
 - Setting Information:
   - Genre: {self.genre}
   - World Tone: {self.world.tone}
   - World Theme: {self.world.theme}
-  - World History: {self.world.backstory}
-"""
+  - World History: {prompt_context.brief(self.world)}
+""",
+            prompt_context.SETTING,
+        )
 
         if hasattr(self, "stories") and self.stories:
-            final_prompt += f"\nIs connected to the following storyline:{random.choice(self.stories).summary}"
+            context.add(
+                "storyline",
+                f"\nIs connected to the following storyline:{random.choice(self.stories).summary}",
+                prompt_context.DIRECT,
+            )
 
         geneology, associations = (
             self.split_associations()
@@ -358,31 +392,40 @@ Use and expand on the existing object data listed below for the {self.title} obj
             else ([], self.associations)
         )
         if geneology and len(geneology) > 1:
-            final_prompt += "\n=== Direct Relationships:\n"
-            for relative in self.geneology:
-                if (
-                    relative not in [self, self.world]
-                    and relative.name
-                    and relative.backstory
-                ):
-                    final_prompt += f"""
+            context.add(
+                "geneology",
+                [
+                    f"""
     - Name: {relative.name}
       - Type: {relative.title}
-      - Backstory: {relative.backstory_summary}
+      - Backstory: {prompt_context.brief(relative)}
      {f"- Controlled By: {relative.owner.name}" if hasattr(relative, "owner") and relative.owner else ""}
 """
+                    for relative in self.geneology
+                    if relative not in [self, self.world]
+                    and relative.name
+                    and relative.backstory
+                ],
+                prompt_context.GENEOLOGY,
+                header="\n=== Direct Relationships:\n",
+            )
         if self.model_name() not in ["Item", "Creature"] and associations:
-            final_prompt += "\n=== Additional Incidental Relationships:\n"
-            associations = random.sample(associations, k=min(10, len(associations)))
-            for ass in associations:
-                final_prompt += f"""
+            context.add(
+                "incidental",
+                [
+                    f"""
   - Name: {ass.name}
     - Type: {ass.title}
-    - Backstory: {ass.backstory_summary}
-
-Use the following information as a guide. You may expand on the provided details, but do not change the fundamental facts.
+    - Backstory: {prompt_context.brief(ass)}
 """
-        final_prompt += f"""
+                    for ass in random.sample(associations, k=min(10, len(associations)))
+                ],
+                prompt_context.INCIDENTAL,
+                header="\n=== Additional Incidental Relationships:\n",
+            )
+        final_prompt = f"""{context.render()}
+Use the following information as a guide. You may expand on the provided details, but do not change the fundamental facts.
+
 {base_prompt}
 {prompt}
 """
@@ -396,10 +439,12 @@ Use the following information as a guide. You may expand on the provided details
                     v = parse_attributes.parse_text(self, v)
                 setattr(self, k, v)
             self.save()
-            utility_tasks.start_task(f"/generate/summaries/{self.path}")
-            utility_tasks.start_task(f"/generate/history/{self.path}")
+            batch = utility_tasks.TaskBatch()
+            summaries = batch.add(f"/generate/summaries/{self.path}")
+            batch.add(f"/generate/history/{self.path}", depends_on=summaries)
             if not self.image:
-                utility_tasks.start_task(f"/generate/image/{self.path}")
+                batch.add(f"/generate/image/{self.path}")
+            batch.submit()
         else:
             log(results, _print=True)
         return results
@@ -424,10 +469,8 @@ Use the following information as a guide. You may expand on the provided details
             list: A list of images that contain all the specified tags.
         """
 
-        images = []
         tags = tags or [self.model_name().lower()]
-        images = [img for img in Image.all() if all(t in img.tags for t in tags)]
-        return images
+        return Image.search_tags(all_tags=tags)
 
     # MARK: generate_image
     def generate_image(self, **kwargs):
@@ -450,30 +493,33 @@ The image should be in a {self.world.image_style} style.
     ############# Association Methods #############
     # MARK: Associations
     def add_association(self, obj):
-        # log(len(obj.associations), self in obj.associations)
-        if obj == self.world:
-            return obj
-        if self not in obj.associations:
-            obj.associations += [self]
-            obj.save()
-        # log(len(obj.associations), self in obj.associations)
+        self.add_associations([obj])
+        return obj
 
-        # log(len(self.associations), obj in self.associations)
-        if obj not in self.associations:
-            self.associations += [obj]
-            self.save()
+    def add_associations(self, objs):
+        """
+        Reciprocally links each object in `objs` with this one. The association list is
+        deduplicated and sorted once and every document whose associations actually
+        changed is saved once, so repeated calls are no-ops.
+        """
+        objs = [obj for obj in objs if obj and obj != self and obj != self.world]
+        touched = []
+        for obj in objs:
+            if self not in obj.associations:
+                obj.associations += [self]
+                if obj not in touched:
+                    touched.append(obj)
 
-        self.associations = sorted(
-            set(self.associations),
+        associations = sorted(
+            set([*self.associations, *objs]),
             key=lambda a: (a.model_name(), getattr(a, "name", "")),
         )
-        self.save()
-
-        return obj
+        if associations != self.associations:
+            self.associations = associations
+            touched.append(self)
 
-    def add_associations(self, objs):
-        for obj in objs:
-            self.add_association(obj)
+        for obj in touched:
+            obj.save()
         return self.associations
 
     def remove_association(self, obj):
@@ -539,10 +585,67 @@ The image should be in a {self.world.image_style} style.
             )
         self.save()
 
-    def generate_history(self):
-        from models.stories.quest import Quest
-        # generate history
+    def _history_event(self, event):
+        return f"- {event.name} [{event.end_date}]: {event.summary or f'{event.backstory} {event.outcome}'}"
+
+    def _history_sources(self, events):
+        """
+        Returns fingerprints of what the history is built from: the "basis" (dates,
+        backstory and status) and each event with an outcome, keyed by its pk.
+        """
+
+        def fingerprint(text):
+            return hashlib.md5(text.encode()).hexdigest()
+
+        start = getattr(self, "start_date", None) or ""
+        end = getattr(self, "end_date", None) or ""
+        backstory = parse_attributes.sanitize(self.backstory)
+        status = parse_attributes.sanitize(self.status)
+        sources = {"basis": fingerprint(f"{start}|{end}|{backstory}|{status}")}
+        for e in events:
+            if e.backstory and e.outcome:
+                sources[str(e.pk)] = fingerprint(self._history_event(e))
+        return sources
+
+    def generate_history(self, rebuild=False):
+        """
+        Brings the history up to date. When the history was built from the current
+        backstory, status and events, and there are only new events that come after
+        all of those, the history is extended with the new events instead of being
+        rewritten.
+
+        Args:
+            rebuild (bool): Rewrite the history from scratch regardless.
+        """
+        events = self.events
+        sources = self._history_sources(events)
+        built_from = dict(self.history_built_from or {})
+        new_events = [
+            e for e in events if str(e.pk) in sources and str(e.pk) not in built_from
+        ]
+        old_events = [e for e in events if str(e.pk) in built_from]
+        if (
+            rebuild
+            or not (self.history and built_from)
+            or any(sources.get(k) != v for k, v in built_from.items())
+            # appending an event older than ones already told would break the timeline
+            or (
+                new_events
+                and old_events
+                and min(e.end_date for e in new_events)
+                < max(e.end_date for e in old_events)
+            )
+        ):
+            self._rebuild_history()
+        elif new_events:
+            self._extend_history(sorted(new_events, key=lambda e: e.end_date))
+        else:
+            log(f"History of {self.name} is up to date", _print=True)
+            return
+        self.history_built_from = sources
+        self.save()
 
+    def _rebuild_history(self):
         prompt = f"""
 Generate a narrative history of the {self.title}'s story, incorporating the given backstory and events, ensuring a consistent timeline with the given dates.
 {self.start_date_label} {self.start_date if hasattr(self, "start_date") and self.start_date and self.start_date.year > 0 else "Unknown"} - {self.end_date if hasattr(self, "end_date") and self.end_date and self.end_date.year > 0 else ""} {self.end_date_label}
@@ -557,7 +660,7 @@ Backstory
 ## Associated Events
 """
             prompt += "\n\n".join(
-                f"- {e.name} [{e.end_date}]: {e.summary or f'{e.backstory} {e.outcome}'}"
+                self._history_event(e)
                 for e in sorted(self.events, key=lambda e: e.end_date)
                 if e.backstory and e.outcome
             )
@@ -572,12 +675,42 @@ Backstory
         log(f"Generating history...\n{prompt}", _print=True)
         history_primer = f"Generate a chronological history of the {self.title}, incorporating the given backstory and event list, ensuring a consistent chonology based on the provided dates. Use MARKDOWN format with paragraph breaks after no more than 4 sentences."
 
-        history = self.system.generate_summary(prompt, history_primer)
+        history = self.system.generate_summary(prompt, history_primer, mode="map_reduce")
         history = history.replace("```markdown", "").replace("```", "")
         self.history = (
             markdown.markdown(history).replace("h1>", "h3>").replace("h2>", "h3>")
         )
-        self.save()
+
+    def _extend_history(self, events):
+        # the end of the existing history is enough to continue it consistently
+        history = prompt_context.tail(
+            parse_attributes.sanitize(self.history),
+            prompt_context.CONTEXT_TOKEN_BUDGET // 4,
+        )
+        prompt = f"""
+Continue the narrative history of the {self.title} with the following new events, ensuring a consistent timeline with the given dates.
+
+## History So Far
+---
+{history}
+---
+
+## New Events
+{"\n\n".join(self._history_event(e) for e in events)}
+"""
+        if self.status:
+            prompt += f"""
+## Current Status
+
+{self.status}
+"""
+        log(f"Extending history with {len(events)} new events...\n{prompt}", _print=True)
+        primer = f"Continue the chronological history of the {self.title} from where the history so far ends, covering only the new events. Respond with only the new paragraphs, in MARKDOWN format with paragraph breaks after no more than 4 sentences."
+        continuation = self.system.generate_text(prompt, primer)
+        continuation = continuation.replace("```markdown", "").replace("```", "")
+        self.history += (
+            markdown.markdown(continuation).replace("h1>", "h3>").replace("h2>", "h3>")
+        )
 
     def get_title(self, model):
         if inspect.isclass(model):
@@ -598,7 +731,7 @@ Backstory
             model = str(model).lower()
         icon = self.get_title(model).lower().replace("-", "_")
         try:
-            return get_template_attribute("shared/_icons.html", icon)(size=size)
+            return fragments.static("shared/_icons.html", icon, size=size)
         except Exception as e:
             log(e)
             return get_template_attribute("shared/_icons.html", "d1dice")(size=size)
@@ -639,29 +772,30 @@ Backstory
                 associations=associations,
             )
 
-    def search_autocomplete(self, query, model=None):
-        results = []
-        if not model:
-            for model in self.all_models():
-                Model = self.load_model(model)
-                # log(model, query)
-                results += [
+    def search_autocomplete(self, query, model=None, limit=None):
+        """
+        Returns the objects of the world whose name matches `query`, best first, from
+        the world's name search index. `model` limits the results to one model type.
+        """
+        models = None
+        if model:
+            Model = self.load_model(model)
+            if Model.__name__ not in self.all_models_str():
+                # only world objects are indexed
+                return [
                     r for r in Model.search(name=query, world=self.world) if r != self
                 ]
-                # log(results)
-        else:
-            Model = self.load_model(model)
-            results = [
-                r for r in Model.search(name=query, world=self.world) if r != self
-            ]
-        return results
+            models = [Model.__name__]
+        return search_index.search(
+            [self.world], query, models=models, exclude=self, limit=limit
+        )
 
     # /////////// HTML SNIPPET Methods ///////////
     def snippet(self, user, macro, kwargs=None):
         module = f"models/_{self.model_name().lower()}.html"
         kwargs = kwargs or {}
         # try:
-        return get_template_attribute(module, macro)(user, self, **kwargs)
+        return fragments.render(module, macro, user, self, **kwargs)
         # except Exception as e:
         #     log(e)
         #     return ""
@@ -681,6 +815,8 @@ Backstory
     @classmethod
     def auto_post_save(cls, sender, document, **kwargs):
         super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+        document.post_save_fragments()
         document.post_save_journal()
 
     ###############################################################
@@ -713,6 +849,12 @@ Backstory
         if not self.traits:
             self.traits = self.system.get_theme(self)
 
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, self.model_name())
+
+    def post_save_fragments(self):
+        fragments.touch(self, self.world)
+
     def post_save_journal(self):
         if not self.journal:
             self.journal = Journal(world=self.world, parent=self)
@@ -720,15 +862,15 @@ Backstory
             self.save()
 
     def pre_save_text_fields(self):
-        for text in [
-            "backstory",
-            "backstory_summary",
-            "desc",
-            "desc_summary",
-            "status",
-            "history",
-        ]:
-            if getattr(self, text):
-                setattr(
-                    self, text, parse_attributes.parse_text(self, getattr(self, text))
-                )
+        self.text_fingerprints = parse_attributes.parse_text_fields(
+            self,
+            [
+                "backstory",
+                "backstory_summary",
+                "desc",
+                "desc_summary",
+                "status",
+                "history",
+            ],
+            self.text_fingerprints,
+        )
@@ -1,6 +1,8 @@
 from autonomous.model.autoattr import IntAttr, ListAttr, ReferenceAttr, StringAttr
 from autonomous.model.automodel import AutoModel
+from pymongo import UpdateOne
 
+from autonomous import log
 from models.calendar.date import Date
 
 
@@ -10,6 +12,8 @@ class Calendar(AutoModel):
     months = ListAttr(StringAttr(default=""))
     days = ListAttr(StringAttr(default=""))
     days_per_year = IntAttr(default=365)
+    # months and days per year the date ordinals were computed with
+    ordinal_layout = StringAttr(default="")
 
     @property
     def dates(self):
@@ -25,10 +29,28 @@ class Calendar(AutoModel):
 
     @property
     def current_date(self):
-        if self.dates:
-            self.dates.sort()
-            return self.dates[-1]
-        return None
+        if not self.pk:
+            return None
+        self.ensure_ordinals()
+        return Date.objects(calendar=self).order_by("-ordinal").first()
+
+    @property
+    def layout(self):
+        return f"{len(self.months) or 12}:{self.days_per_year}"
+
+    def ordinal(self, year, month, day):
+        """
+        Returns the number of days from the start of year 0 to the given date, so that
+        dates can be sorted and range-queried as a single indexed integer. Days and
+        months past the end of the calendar count as its last day and month.
+        """
+        months = len(self.months) or 12
+        days_per_year = int(self.days_per_year or 365)
+        days_per_month = max(days_per_year // months, 1)
+        month = min(max(int(month), 0), months - 1)
+        day = min(max(int(day), 1), days_per_month)
+        year_length = max(days_per_year, months * days_per_month)
+        return int(year) * year_length + month * days_per_month + day - 1
 
     ############# CRUD #############
     def date(self, obj, year, month, day):
@@ -36,6 +58,49 @@ class Calendar(AutoModel):
         date.save()
         return date
 
+    def ensure_ordinals(self):
+        """
+        Recomputes the ordinals of this calendar's dates, and the end ordinals of the
+        events of its world, if they were computed with other months or year length.
+        """
+        if not self.pk or self.ordinal_layout == self.layout:
+            return
+        from models.stories.event import Event
+
+        dates = {}
+        updates = []
+        dated = Date.objects(calendar=self).only("year", "month", "day")
+        for doc in dated.as_pymongo():
+            try:
+                ordinal = self.ordinal(
+                    doc.get("year", 0), doc.get("month", 0), doc.get("day", 1)
+                )
+            except (TypeError, ValueError):
+                continue
+            dates[doc["_id"]] = ordinal if doc.get("year") else None
+            updates.append(
+                UpdateOne({"_id": doc["_id"]}, {"$set": {"ordinal": ordinal}})
+            )
+        if updates:
+            Date._get_collection().bulk_write(updates, ordered=False)
+
+        updates = []
+        if self.world:
+            for doc in Event.objects(world=self.world).only("end_date").as_pymongo():
+                end_date = doc.get("end_date")
+                if isinstance(end_date, dict):
+                    end_date = end_date.get("_ref")
+                ordinal = dates.get(getattr(end_date, "id", None))
+                updates.append(
+                    UpdateOne({"_id": doc["_id"]}, {"$set": {"end_ordinal": ordinal}})
+                )
+        if updates:
+            Event._get_collection().bulk_write(updates, ordered=False)
+
+        log(f"Indexed {len(dates)} dates of calendar {self.pk}", _print=True)
+        self.ordinal_layout = self.layout
+        self.save()
+
     ## MARK: - Verification Methods
     ###############################################################
     ##                    VERIFICATION HOOKS                     ##
@@ -53,9 +118,10 @@ class Calendar(AutoModel):
         super().auto_pre_save(sender, document, **kwargs)
         document.pre_save_calendar()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.ensure_ordinals()
 
     # def clean(self):
     #     super().clean()
@@ -63,6 +129,9 @@ class Calendar(AutoModel):
     ################### verification methods ##################
 
     def pre_save_calendar(self):
+        if not self.pk:
+            # a new calendar has no dates to recompute
+            self.ordinal_layout = self.layout
         if not self.months:
             self.months = [
                 "January",
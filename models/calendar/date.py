@@ -4,9 +4,15 @@ from autonomous.model.autoattr import IntAttr, ReferenceAttr
 from autonomous.model.automodel import AutoModel
 
 from autonomous import log
+from models.utility import fragments
 
 
 class Date(AutoModel):
+    meta = {
+        "allow_inheritance": True,
+        "strict": False,
+        "indexes": [("calendar", "-ordinal")],
+    }
     obj = ReferenceAttr(
         choices=["TTRPGBase", "Episode", "Event", "Lore", "LoreScene"], required=True
     )
@@ -14,6 +20,8 @@ class Date(AutoModel):
     day = IntAttr(default=-1)
     month = IntAttr(default=-1)
     calendar = ReferenceAttr(choices=["Calendar"], required=True)
+    # day number from the start of year 0, see Calendar.ordinal
+    ordinal = IntAttr()
 
     def __str__(self):
         if self.year <= 0:
@@ -87,6 +95,14 @@ class Date(AutoModel):
     def world(self):
         return self.calendar.world if self.calendar else None
 
+    def to_ordinal(self):
+        """
+        Returns the ordinal of the current day, month and year, saved or not.
+        """
+        if not self.calendar:
+            return None
+        return self.calendar.ordinal(self.year, self.month, self.day)
+
     def copy(self, obj):
         date = Date(
             obj=obj,
@@ -114,10 +130,12 @@ class Date(AutoModel):
         document.pre_save_day()
         document.pre_save_year()
         document.pre_save_calendar()
+        document.pre_save_ordinal()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_ordinal(created=kwargs.get("created"))
 
     # def clean(self):
     #     super().clean()
@@ -145,3 +163,18 @@ class Date(AutoModel):
     def pre_save_calendar(self):
         if not self.calendar and self.obj:
             self.calendar = self.obj.world.calendar
+
+    def pre_save_ordinal(self):
+        ordinal = self.to_ordinal()
+        self._ordinal_moved = ordinal != self.ordinal
+        self.ordinal = ordinal
+
+    def post_save_ordinal(self, created=False):
+        # events keep the ordinal of their end date for timeline queries
+        if not created and getattr(self, "_ordinal_moved", False):
+            events = AutoModel.load_model("Event").objects(end_date=self)
+            events.update(set__end_ordinal=self.ordinal if self.year else None)
+            # update() sends no save signal, so refresh the affected pages here
+            fragments.touch(
+                *[obj for e in events for obj in (e.world, *e.associations)]
+            )
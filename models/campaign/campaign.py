@@ -10,6 +10,7 @@ from bs4 import BeautifulSoup
 
 from autonomous import log
 from models.base.ttrpgbase import TTRPGBase
+from models.utility import registry as world_registry
 from models.utility.parse_attributes import parse_text
 
 from .episode import Episode
@@ -26,6 +27,7 @@ class Campaign(AutoModel):
 
     def delete(self):
         all(e.delete() for e in self.episodes)
+        world_registry.invalidate(self.world, "Campaign")
         super().delete()
 
     @property
@@ -156,6 +158,7 @@ class Campaign(AutoModel):
             self.summary = self.world.system.generate_summary(
                 text,
                 primer="Provide an engaging, narrative summary of the campaign, highlighting its key elements and significance within the larger story in MARKDOWN.",
+                mode="map_reduce",
             )
             self.summary = self.summary.replace("```markdown", "").replace("```", "")
             self.summary = (
@@ -292,9 +295,10 @@ class Campaign(AutoModel):
         document.description = parse_text(document, document.description)
         # document.pre_save_associations()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
 
     # log([p.name for p in document.players])
 
@@ -303,6 +307,11 @@ class Campaign(AutoModel):
 
     ################### Verification Methods ###################
 
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Campaign")
+        # episodes are looked up through the world's campaigns
+        world_registry.invalidate(self.world, "Episode")
+
     def pre_save_players(self):
         for p in self.players:
             if not p.pk:
@@ -3,7 +3,7 @@ import json
 import os
 import random
 import re
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import markdown
 import requests
@@ -29,8 +29,14 @@ from models.stories.event import Event
 from models.ttrpgobject.character import Character
 from models.ttrpgobject.district import District
 from models.ttrpgobject.location import Location
+from models.utility import context as prompt_context
+from models.utility import fragments
+from models.utility import parse_attributes
+from models.utility import registry as world_registry
 from models.utility.parse_attributes import parse_text, parse_date
 
+TRANSCRIPTION_WORKERS = int(os.environ.get("TRANSCRIPTION_WORKERS", 4))
+
 
 class Episode(AutoModel):
     name = StringAttr(default="")
@@ -50,6 +56,8 @@ class Episode(AutoModel):
     audio = ReferenceAttr(choices=["Audio"])
     transcription = StringAttr(default="")
     interpreted_transcription = StringAttr(default="")
+    # "start-end" audio byte range -> transcript of that segment
+    transcription_segments = DictAttr(default={})
 
     ##################### PROPERTY METHODS ####################
 
@@ -61,7 +69,7 @@ class Episode(AutoModel):
     def audio_duration(self):
         if self.audio:
             try:
-                audio = MP3(BytesIO(self.audio.read()))
+                audio = MP3(self.audio.open())
                 duration_seconds = audio.info.length
                 return str(datetime.timedelta(seconds=int(duration_seconds)))
             except Exception as e:
@@ -240,6 +248,9 @@ class Episode(AutoModel):
             self.audio.delete()
         if self.graphic:
             self.graphic.delete()
+        world_registry.unindex(self)
+        world_registry.invalidate(self.world, "Episode")
+        fragments.touch(self.world, *self.associations)
         return super().delete()
 
     ##################### INSTANCE METHODS ####################
@@ -271,6 +282,7 @@ class Episode(AutoModel):
             transcription_summary = self.world.system.generate_summary(
                 prompt,
                 primer="Provide an engaging, narrative summary of the TTRPG session transcription, highlighting its key elements and significance within the larger story.",
+                mode="map_reduce",
             )
 
             transcription_summary = transcription_summary.replace(
@@ -357,19 +369,80 @@ class Episode(AutoModel):
         self.associations = [a for a in self.associations if a != obj]
         self.save()
 
-    def transcribe(self):
+    def transcribe(self, max_workers=None, progress=None):
+        """
+        Transcribes the recording in overlapping segments, at most `max_workers` at a
+        time, and stitches the results together. Each segment's transcript is saved as
+        soon as it arrives, so running this again after a failure only transcribes the
+        missing segments. The transcript is then reinterpreted as a screenplay one part
+        at a time, saving the screenplay after each part.
+
+        Args:
+            max_workers (int): Maximum concurrent segment transcriptions. Defaults to
+                the TRANSCRIPTION_WORKERS environment variable.
+            progress (callable): Called as progress(done, total, message) after each
+                segment.
+        """
         if not self.audio:
             raise ValueError("No audio file to transcribe.")
+        max_workers = max_workers or TRANSCRIPTION_WORKERS
+        context = prompt_context.ContextBuilder()
+        context.add(
+            "campaign",
+            f"Here is some context about the campaign: {self.campaign.name} {self.campaign_summary}. ",
+            prompt_context.SETTING,
+        )
+        context.add(
+            "players",
+            ", ".join(
+                [f"{c.name}:{prompt_context.brief(c)}]" for c in self.players]
+            ),
+            prompt_context.GENEOLOGY,
+            header="Identify and separate distinct speakers as much as possible. The player characters are: ",
+        )
         prompt = f"""Transcribe the following audio from a TTRPG session set in a {self.world.genre} world. Focus on capturing the dialogue, narration, and significant sound cues relevant to the gameplay and story, while omitting any irrelevant background noise, verbal ticks such as 'umms' or 'ahs', or off-topic conversations. When possible, use full names for characters, places, and things in the world. Provide the transcription in MARKDOWN format.
-Here is some context about the campaign: {self.campaign.name} {self.campaign_summary}. Identify and separate distinct speakers as much as possible. The player characters are: {", ".join([f"{c.name}:{c.backstory_summary}]" for c in self.players])}.
+{context.render()}.
 """
         log(f"Raw Prompt: {prompt}", _print=True)
-        transcription = Audio.transcribe(
-            self.audio,
-            prompt=prompt,
-            display_name=f"episode{self.episode_num}.mp3",
+
+        segments = [f"{start}-{end}" for start, end in self.audio.segments()]
+        # transcripts of segments the recording no longer has are dropped
+        done = {k: v for k, v in self.transcription_segments.items() if k in segments}
+        missing = [k for k in segments if k not in done]
+        log(
+            f"Transcribing {len(missing)} of {len(segments)} segments", _print=True
         )
 
+        def transcribe_segment(key):
+            start, end = map(int, key.split("-"))
+            part = segments.index(key) + 1
+            return Audio.transcribe(
+                self.audio.read_range(start, end),
+                prompt=f"{prompt}\nThis is part {part} of {len(segments)} of the recording.",
+                display_name=f"episode{self.episode_num}-{part}.mp3",
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="transcription"
+        ) as executor:
+            futures = {executor.submit(transcribe_segment, k): k for k in missing}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    done[key] = future.result() or ""
+                except Exception as e:
+                    log(f"Unable to transcribe segment {key}: {e}", _print=True)
+                else:
+                    self.transcription_segments = done
+                    self.save()
+                if progress:
+                    progress(len(done), len(segments), f"Transcribed {len(done)} segments")
+        if len(done) < len(segments):
+            raise RuntimeError(
+                f"{len(segments) - len(done)} of {len(segments)} segments failed to transcribe; run again to retry them."
+            )
+
+        transcription = parse_attributes.stitch_text([done[k] for k in segments])
         self.transcription = (
             markdown.markdown(transcription)
             if transcription
@@ -377,34 +450,79 @@ Here is some context about the campaign: {self.campaign.name} {self.campaign_sum
         )
         self.save()
 
-        if self.transcription:
-            prompt = f"""Reinterpret the following transcript of a live TTRPG session as a screenplay for a fictional episodic adventure. Feel free to embellish events, conversations, and details for the sake of the narrative, but maintain the same sequence of events. Leave out any discussion of game mechanics, substituting a narrative interpretation instead.
-
-The player characters are: {", ".join([f"{c.name}:{c.backstory_summary}]" for c in self.players])}.
-
-Additonal associations that may appear in the transcript include: {", ".join([f"{a.name} [{a.title}]:{a.backstory_summary}" for a in self.associations if a not in self.players])}.
-
-Keep the narrative consistent with the following setting: {self.world.backstory}.
+        if transcription:
+            self.interpret_transcription(transcription)
 
+    def interpret_transcription(self, transcription):
+        """
+        Reinterprets the transcript as a screenplay, one MAX_TOKEN_LENGTH part at a
+        time, continuing from the end of the screenplay so far.
+        """
+        context = prompt_context.ContextBuilder()
+        context.add(
+            "players",
+            f"The player characters are: {', '.join([f'{c.name}:{prompt_context.brief(c)}]' for c in self.players])}.\n\n",
+            prompt_context.GENEOLOGY,
+        )
+        context.add(
+            "associations",
+            ", ".join(
+                [
+                    f"{a.name} [{a.title}]:{prompt_context.brief(a)}"
+                    for a in self.associations
+                    if a not in self.players
+                ]
+            ),
+            prompt_context.INCIDENTAL,
+            header="Additonal associations that may appear in the transcript include: ",
+        )
+        context.add(
+            "setting",
+            f"\n\nKeep the narrative consistent with the following setting: {prompt_context.brief(self.world)}.\n",
+            prompt_context.SETTING,
+        )
+        context.add(
+            "campaign",
+            f"""
 - Context about the campaign: {self.campaign.name}, {self.campaign_summary}.
 - Context from the previous session: {self.previous_episode.summary if self.previous_episode else "N/A"}.
+""",
+            prompt_context.DIRECT,
+        )
+        context = context.render()
+        system = self.world.system
+        parts = parse_attributes.split_text(transcription, system.MAX_TOKEN_LENGTH)
+        screenplay = ""
+        for i, part in enumerate(parts):
+            continuation = ""
+            if screenplay:
+                continuation = f"""
+This is part {i + 1} of {len(parts)} of the transcript. Continue the screenplay from where it ends:
+{prompt_context.tail(screenplay, prompt_context.CONTEXT_TOKEN_BUDGET // 4)}
+"""
+            prompt = f"""Reinterpret the following transcript of a live TTRPG session as a screenplay for a fictional episodic adventure. Feel free to embellish events, conversations, and details for the sake of the narrative, but maintain the same sequence of events. Leave out any discussion of game mechanics, substituting a narrative interpretation instead.
 
+{context}
+{continuation}
 Format in MARKDOWN.
 
 TRANSCRIPT:
-{self.transcription}
+{part}
 """
             log(f"Interpretation Prompt: {prompt}", _print=True)
-            interpreted_transcription = self.world.system.generate_text(
-                prompt=prompt,
+            interpreted = system.generate_text(
+                prompt,
                 primer="Provide a narrative reinterpretation of the TTRPG session transcript in screenplay style.",
             )
-            self.interpreted_transcription = (
-                markdown.markdown(interpreted_transcription)
-                if interpreted_transcription
-                else "Interpreted transcription failed or was empty."
-            )
+            screenplay = f"{screenplay}\n\n{interpreted}".strip()
+            self.interpreted_transcription = markdown.markdown(screenplay)
             self.save()
+        self.interpreted_transcription = (
+            markdown.markdown(screenplay)
+            if screenplay
+            else "Interpreted transcription failed or was empty."
+        )
+        self.save()
 
     def page_data(self):
         data = {
@@ -449,6 +567,8 @@ TRANSCRIPT:
     @classmethod
     def auto_post_save(cls, sender, document, **kwargs):
         super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+        document.post_save_fragments()
         log(
             document.get(document.pk).start_date_obj,
             document.get(document.pk).end_date_obj,
@@ -458,6 +578,14 @@ TRANSCRIPT:
     #     super().clean()
 
     ################### verify methods ##################
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Episode")
+        world_registry.reindex(self)
+
+    def post_save_fragments(self):
+        # pages of the world and of the associated objects list this one
+        fragments.touch(self.world, *self.associations)
+
     def pre_save_campaign(self):
         if self.pk and self not in self.campaign.episodes:
             self.campaign.episodes += [self]
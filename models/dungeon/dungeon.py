@@ -1,4 +1,6 @@
+import os
 import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from autonomous.model.autoattr import (
     ListAttr,
@@ -11,7 +13,14 @@ from autonomous import log
 from models.dungeon.dungeonroom import DungeonRoom
 from models.images.map import Map
 from models.ttrpgobject.character import Character
-from models.utility import tasks as utility_tasks
+from models.utility import identity_map
+
+DUNGEON_ROOM_WORKERS = int(os.environ.get("DUNGEON_ROOM_WORKERS", 4))
+
+
+def _generate_room(pk):
+    # reload the room so its prompt includes the rooms finished in earlier waves
+    return DungeonRoom.get(pk).generate()
 
 
 class Dungeon(AutoModel):
@@ -64,13 +73,63 @@ Ensure logical connections between these rooms with clear doorways. Entrances ar
         self.save()
         return self.map
 
-    def generate_rooms(self):
-        log(f"Generating rooms {len(self.rooms)} for dungeon", _print=True)
-        for room in self.rooms:
-            room.generate()
-            log(f"Generated room {room.name} for dungeon", _print=True)
-        if self.rooms:
-            utility_tasks.start_task(f"/generate/dungeon/{self.pk}/map")
+    def room_waves(self):
+        """
+        Splits the rooms into waves of rooms that are not connected to each other,
+        starting from the entrances, so that every room in a wave can be generated at
+        the same time and still see the generated names of the rooms connected to it
+        from earlier waves.
+        """
+        rooms = sorted(self.rooms, key=lambda r: not r.is_entrance)
+        waves = []
+        wave_of = {}
+        for room in rooms:
+            taken = {
+                wave_of[cr.pk] for cr in room.connected_rooms if cr.pk in wave_of
+            }
+            idx = next(i for i in range(len(waves) + 1) if i not in taken)
+            if idx == len(waves):
+                waves.append([])
+            waves[idx].append(room)
+            wave_of[room.pk] = idx
+        return waves
+
+    def generate_rooms(self, max_workers=None, progress=None):
+        """
+        Generates the rooms concurrently, at most `max_workers` at a time, one wave of
+        unconnected rooms after another.
+
+        Args:
+            max_workers (int): Maximum concurrent room generations. Defaults to the
+                DUNGEON_ROOM_WORKERS environment variable.
+            progress (callable): Called as progress(done, total, room) after each room.
+
+        Returns:
+            list: The generated rooms.
+        """
+        max_workers = max_workers or DUNGEON_ROOM_WORKERS
+        total = len(self.rooms)
+        log(f"Generating rooms {total} for dungeon", _print=True)
+        done = 0
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="dungeon-rooms"
+        ) as executor:
+            for wave in self.room_waves():
+                futures = [executor.submit(_generate_room, room.pk) for room in wave]
+                for future in as_completed(futures):
+                    try:
+                        room = future.result()
+                    except Exception as e:
+                        log(f"Failed to generate dungeon room: {e}", _print=True)
+                        room = None
+                    done += 1
+                    if room:
+                        log(f"Generated room {room.name} for dungeon", _print=True)
+                    if progress:
+                        progress(done, total, room)
+        # the rooms were saved in the worker threads, outside this thread's identity map
+        identity_map.discard(*self.rooms)
+        self.reload()
         return self.rooms
 
     def create_room(self):
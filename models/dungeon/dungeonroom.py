@@ -172,12 +172,12 @@ Generate a {self.genre} TTRPG {self.structure_type or self.location.location_typ
             self.dimensions = results.get("dimensions", self.dimensions)
             self.shape = results.get("shape", self.shape)
             if self.save():
+                batch = utility_tasks.TaskBatch()
                 if not self.map:
-                    utility_tasks.start_task(f"/generate/dungeon/room/{self.pk}/map")
+                    batch.add(f"/generate/dungeon/room/{self.pk}/map")
                 if not self.encounters:
-                    utility_tasks.start_task(
-                        f"/generate/dungeon/room/{self.pk}/encounter"
-                    )
+                    batch.add(f"/generate/dungeon/room/{self.pk}/encounter")
+                batch.submit()
         return self
 
     def generate_encounter(self):
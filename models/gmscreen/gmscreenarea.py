@@ -1,8 +1,15 @@
 from flask import get_template_attribute
 
 from autonomous import log
-from autonomous.model.autoattr import BoolAttr, ListAttr, ReferenceAttr, StringAttr
+from autonomous.model.autoattr import (
+    BoolAttr,
+    IntAttr,
+    ListAttr,
+    ReferenceAttr,
+    StringAttr,
+)
 from autonomous.model.automodel import AutoModel
+from models.utility import fragments
 
 
 class GMScreenArea(AutoModel):
@@ -14,15 +21,33 @@ class GMScreenArea(AutoModel):
     entries = ListAttr(StringAttr(default=""))
     screen = ReferenceAttr(choices=["GMScreen"])
     editable = BoolAttr(default=False)
+    # only ever incremented, see fragments.touch
+    render_version = IntAttr(default=0)
+
+    # False for areas that show something different on every render
+    cacheable = True
 
     @property
     def macro(self):
         return self._macro
 
     def area(self, content=None, editable=False):
-        content = content or get_template_attribute(
-            "manage/_gmscreen.html", self.macro
-        )(self, editable)
-        return get_template_attribute("manage/_gmscreen.html", "screen_area")(
-            self, content=content
+        def render():
+            return get_template_attribute("manage/_gmscreen.html", "screen_area")(
+                self,
+                content=content
+                or get_template_attribute("manage/_gmscreen.html", self.macro)(
+                    self, editable
+                ),
+            )
+
+        if content or not self.cacheable:
+            return render()
+        return fragments.cached(
+            self, ["manage/_gmscreen.html", self.macro, editable], render
         )
+
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        fragments.touch(document)
@@ -1,5 +1,7 @@
 from flask import get_template_attribute
 from autonomous.model.autoattr import StringAttr
+from models.utility import fragments
+
 from .gmscreenarea import GMScreenArea
 
 
@@ -8,5 +10,13 @@ class GMScreenDnD5E(GMScreenArea):
     name = StringAttr(default="D&D5e Reference")
 
     def area(self):
-        snippet = get_template_attribute("manage/_gmscreen.html", self.macro)(self)
-        return super().area(content=snippet)
+        # the reference tables only change when the area is saved
+        return fragments.cached(
+            self,
+            ["manage/_gmscreen.html", self.macro],
+            lambda: super(GMScreenDnD5E, self).area(
+                content=get_template_attribute("manage/_gmscreen.html", self.macro)(
+                    self
+                )
+            ),
+        )
@@ -13,6 +13,9 @@ class GMScreenNonCanon(GMScreenArea):
     objs = ListAttr(ReferenceAttr(choices=["TTRPGObject"]))
     filter = StringAttr(default="Character")
 
+    # shows a new random sample of the world's objects each time
+    cacheable = False
+
     def get_objs(self, num=100):
         objs = []
         for o in self.screen.world.associations:
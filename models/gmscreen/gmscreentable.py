@@ -4,6 +4,8 @@ from autonomous import log
 from autonomous.ai.jsonagent import JSONAgent
 from autonomous.model.autoattr import StringAttr
 
+from models.utility import agents
+
 from .gmscreenarea import GMScreenArea
 
 
@@ -89,7 +91,8 @@ class GMScreenTable(GMScreenArea):
         from .gmscreen import GMScreen
 
         log(prompt, _print=True)
-        response = JSONAgent(
+        response = agents.get(
+            JSONAgent,
             name=f"{self.screen.world.genre} TableTop RPG List Generator",
             instructions=f"As an expert AI in canon as well as homebrew elements of an {self.screen.world.genre.title()} Table Top RPG, Generate a roll table fitting the following description:{prompt} ",
             description=f"Generate a roll table for a {self.screen.world.genre} TTRPG",
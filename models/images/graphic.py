@@ -6,7 +6,7 @@ from autonomous.model.autoattr import (
 )
 
 from autonomous import log
-from models.utility import parse_attributes, tasks
+from models.utility import agents, parse_attributes, tasks
 
 from .image import Image
 
@@ -28,7 +28,7 @@ class Graphic(Image):
                 fn: f.to_file() for fn, f in kwargs.get("files").items() if f
             }
         try:
-            image = ImageAgent().generate(prompt=prompt, **kwargs)
+            image = agents.get(ImageAgent).generate(prompt=prompt, **kwargs)
         except Exception as e:
             log(f"==== Error: Unable to create image ====\n\n{e}", _print=True)
             return None
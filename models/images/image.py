@@ -1,8 +1,9 @@
 import io
-import random
+import os
 
 import requests
 from autonomous.ai.imageagent import ImageAgent
+from autonomous.db import Q
 from autonomous.model.autoattr import (
     FileAttr,
     ListAttr,
@@ -14,10 +15,16 @@ from bs4 import BeautifulSoup
 from PIL import Image as ImageTools
 
 from autonomous import log
+from models.utility import agents, derivatives
 
 
 class Image(AutoModel):
     # meta = {"collection": "Image"}
+    meta = {
+        "allow_inheritance": True,
+        "strict": False,
+        "indexes": ["tags"],
+    }
     data = FileAttr(default="")
     filename = StringAttr(default="")
     prompt = StringAttr(default="")
@@ -26,6 +33,10 @@ class Image(AutoModel):
     ################### Class Variables #####################
 
     _sizes = {"thumbnail": 100, "small": 300, "medium": 600, "large": 1000}
+    # renditions to pre-render when an image is created, e.g. "thumbnail,medium"
+    _eager_sizes = [
+        s for s in os.environ.get("IMAGE_EAGER_SIZES", "").split(",") if s.strip()
+    ]
 
     ################### Class Methods #####################
 
@@ -45,7 +56,7 @@ class Image(AutoModel):
         log(f"=== generation prompt ===\n\n{prompt}", _print=True)
         try:
             files = {fn: f.to_file() for fn, f in files.items() if f}
-            image = ImageAgent().generate(prompt=prompt, files=files, **kwargs)
+            image = agents.get(ImageAgent).generate(prompt=prompt, files=files, **kwargs)
         except Exception as e:
             log(f"==== Error: Unable to create image ====\n\n{e}", _print=True)
             return None
@@ -53,17 +64,81 @@ class Image(AutoModel):
             image_obj = cls(prompt=prompt, tags=tags)
             image_obj.data.put(io.BytesIO(image), content_type="image/webp")
             image_obj.save()
+            image_obj.generate_derivatives()
         return image_obj
 
     @classmethod
     def get_image_list(cls, max=10, tags=None):
-        image_list = cls.all()
-        if tags:
-            image_list = [i for i in image_list if all(tag in i.tags for tag in tags)]
-        if image_list:
-            image_list = random.sample(image_list, k=min(len(image_list), max))
-        # [log(i) for i in image_list]
-        return image_list
+        return cls.search_tags(all_tags=tags, sample=max)
+
+    @classmethod
+    def tag_query(cls, all_tags=None, any_tags=None, exclude_tags=None, untagged=False):
+        """
+        Returns a queryset of the images matching the tags, using the index on tags.
+
+        Args:
+            all_tags (list): Images must have every one of these tags.
+            any_tags (list): Images must have at least one of these tags.
+            exclude_tags (list): Images must have none of these tags.
+            untagged (bool): Only images without any tags.
+        """
+        query = {}
+        if all_tags:
+            query["tags__all"] = [t.lower() for t in all_tags if t]
+        if any_tags:
+            query["tags__in"] = [t.lower() for t in any_tags if t]
+        if exclude_tags:
+            query["tags__nin"] = [t.lower() for t in exclude_tags if t]
+        if untagged:
+            return cls.objects(Q(tags__size=0) | Q(tags__exists=False), **query)
+        return cls.objects(**query)
+
+    @classmethod
+    def search_tags(
+        cls,
+        all_tags=None,
+        any_tags=None,
+        exclude_tags=None,
+        untagged=False,
+        sample=None,
+        page=None,
+        per_page=50,
+    ):
+        """
+        Retrieve the images matching the tags (see tag_query).
+
+        Args:
+            sample (int): Return this many randomly chosen matches, sampled by the database.
+            page (int): Return this page of matches, newest first, `per_page` at a time.
+
+        Returns:
+            list: The matching images.
+        """
+        results = cls.tag_query(all_tags, any_tags, exclude_tags, untagged)
+        if sample:
+            return [
+                cls._from_son(doc)
+                for doc in results.aggregate([{"$sample": {"size": sample}}])
+            ]
+        if page:
+            results = results.order_by("-id").skip((page - 1) * per_page).limit(per_page)
+        return list(results)
+
+    @classmethod
+    def tag_counts(cls):
+        """
+        Returns a dict of every tag in use and the number of images that have it.
+        """
+        return {
+            row["_id"]: row["count"]
+            for row in cls.objects().aggregate(
+                [
+                    {"$unwind": "$tags"},
+                    {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ]
+            )
+        }
 
     @classmethod
     def from_url(cls, url, prompt="", tags=None):
@@ -83,6 +158,7 @@ class Image(AutoModel):
                 )
                 image_obj.data.put(img_byte_arr.getvalue(), content_type="image/webp")
                 image_obj.save()
+                image_obj.generate_derivatives()
                 return image_obj
         except (requests.exceptions.RequestException, ValueError, IOError) as e:
             log(f"==== Error: {e} ====")
@@ -90,9 +166,15 @@ class Image(AutoModel):
 
     @classmethod
     def from_file(cls, file, prompt="", tags=None):
+        """
+        Creates an image from `file`, either bytes or a file-like object such as an
+        upload stream, which is decoded without reading it into memory first.
+        """
         tags = tags if tags else []
+        if isinstance(file, bytes):
+            file = io.BytesIO(file)
         try:
-            with ImageTools.open(io.BytesIO(file)) as img:
+            with ImageTools.open(file) as img:
                 img = img.copy()
                 img_byte_arr = io.BytesIO()
                 img.save(img_byte_arr, format="WEBP")
@@ -102,6 +184,7 @@ class Image(AutoModel):
                 )
                 image_obj.data.put(img_byte_arr.getvalue(), content_type="image/webp")
                 image_obj.save()
+                image_obj.generate_derivatives()
                 return image_obj
         except (requests.exceptions.RequestException, ValueError, IOError) as e:
             log(f"==== Error: {e} ====")
@@ -109,6 +192,15 @@ class Image(AutoModel):
 
     ################### Dunder Methods #####################
     ################### Property Methods #####################
+    @property
+    def version(self):
+        # a new GridFS file is written whenever the image data changes
+        return str(self.data.grid_id) if self.data else ""
+
+    @property
+    def last_modified(self):
+        return self.data.upload_date if self.data else None
+
     ################### Crud Methods #####################
     def read(self):
         if self.data:
@@ -124,6 +216,7 @@ class Image(AutoModel):
     def delete(self):
         if self.data:
             self.data.delete()
+        derivatives.discard(self.pk)
         return super().delete()
 
     ################### Instance Methods #####################
@@ -134,6 +227,29 @@ class Image(AutoModel):
     def thumbnail(self):
         return f"/image/{self.pk}/100"
 
+    def etag(self, size="orig"):
+        return f"{self.version}-{size}"
+
+    def derivative(self, size="orig"):
+        """
+        returns the image resized to `size`, resizing only the first time a size is
+        requested for the current image data. Only the named `_sizes` are stored;
+        any other size is resized on every request.
+        """
+        if size == "orig":
+            return self.read()
+        size = self._sizes.get(size) or int(size)
+        if size not in self._sizes.values():
+            return self.resize(size)
+        if data := derivatives.get(self.pk, self.version, size):
+            return data
+        if data := self.resize(size):
+            return derivatives.put(self.pk, self.version, size, data)
+
+    def generate_derivatives(self, sizes=None):
+        for size in sizes or self._eager_sizes:
+            self.derivative(size.strip() if isinstance(size, str) else size)
+
     def add_tag(self, tag):
         if tag not in self.tags:
             self.tags.append(tag)
@@ -177,6 +293,7 @@ class Image(AutoModel):
             self.data.delete()
             self.data.put(rotated_img_data, content_type="image/webp")
             self.save()
+            derivatives.discard(self.pk)
             self.data.seek(0)  # Reset the data stream position to the beginning
 
     def flip(self, horizontal=True, vertical=True):
@@ -190,6 +307,7 @@ class Image(AutoModel):
             img.save(flipped_img_byte_arr, format="WEBP")
             self.data.delete()
             self.data.put(flipped_img_byte_arr.getvalue(), content_type="image/webp")
+            derivatives.discard(self.pk)
             self.data.seek(0)
 
     ###############################################################
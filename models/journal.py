@@ -3,6 +3,7 @@ from datetime import datetime
 from autonomous.db import ValidationError
 from autonomous.model.autoattr import (
     DateTimeAttr,
+    DictAttr,
     IntAttr,
     ListAttr,
     ReferenceAttr,
@@ -11,7 +12,8 @@ from autonomous.model.autoattr import (
 from autonomous.model.automodel import AutoModel
 
 from autonomous import log
-from models.utility.parse_attributes import parse_text
+from models.utility import fragments
+from models.utility.parse_attributes import parse_text_fields
 
 
 class JournalEntry(AutoModel):
@@ -22,6 +24,7 @@ class JournalEntry(AutoModel):
     date = DateTimeAttr(default=lambda: datetime.now())
     importance = IntAttr(default=0)
     associations = ListAttr(ReferenceAttr(choices=["TTRPGObject"]))
+    text_fingerprints = DictAttr(default={})
 
     @property
     def genre(self):
@@ -51,9 +54,10 @@ class JournalEntry(AutoModel):
         document.pre_save_text()
         document.pre_save_date()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_journals(created=kwargs.get("created"))
 
     # def clean(self):
     #     super().clean()
@@ -64,8 +68,15 @@ class JournalEntry(AutoModel):
             self.date = datetime.now()
 
     def pre_save_text(self):
-        if self.text:
-            self.text = parse_text(self, self.text)
+        self.text_fingerprints = parse_text_fields(
+            self, ["text"], self.text_fingerprints
+        )
+
+    def post_save_journals(self, created=False):
+        # the journal is cached in the pages of its parent; unchanged entries are
+        # saved with every save of their journal, which refreshes them itself
+        if not created and self._get_changed_fields():
+            fragments.touch(*[j.parent for j in Journal.objects(entries=self)])
 
     def pre_save_importance(self):
         self.importance = int(self.importance)
@@ -84,6 +95,7 @@ class Journal(AutoModel):
         for entries in self.entries:
             entries.delete()
         super().delete()
+        fragments.touch(self.parent)
 
     def add_entry(
         self,
@@ -140,9 +152,10 @@ class Journal(AutoModel):
         super().auto_pre_save(sender, document, **kwargs)
         document.pre_save_entries()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_parent()
 
     # def clean(self):
     #     super().clean()
@@ -153,3 +166,7 @@ class Journal(AutoModel):
             entry.world = self.world
             entry.save()
         self.entries = sorted(self.entries, key=lambda x: x.date, reverse=True)
+
+    def post_save_parent(self):
+        # the journal macro is cached with the render version of the parent
+        fragments.touch(self.parent)
@@ -9,7 +9,10 @@ from validators import ValidationError
 from autonomous import log
 from models.images.image import Image
 from models.journal import Journal
+from models.utility import context as prompt_context
+from models.utility import fragments
 from models.utility import parse_attributes
+from models.utility import registry as world_registry
 
 
 class Encounter(AutoModel):
@@ -260,6 +263,11 @@ class Encounter(AutoModel):
         return self.world.user
 
     ################## Crud Methods ##################
+    def delete(self):
+        world_registry.unindex(self)
+        world_registry.invalidate(self.world, "Encounter")
+        fragments.touch(self.world, *self.associations)
+        super().delete()
 
     def generate(self):
         enemy_type = self.enemy_type or random.choice(
@@ -286,20 +294,58 @@ class Encounter(AutoModel):
             else ""
         )
 
-        desc = f"""
+        context_builder = prompt_context.ContextBuilder()
+        context_builder.add(
+            "world",
+            f"""
 - Setting:
     - Genre: {self.genre}
-    - World Details: {self.world.history}
-    {("- Relevant World Events:" + ("\n    - ".join([s.situation for s in self.stories.events]))) if self.stories and self.stories.events else ""}
-"""
+    - World Details: {prompt_context.brief(self.world, "history", "backstory")}
+""",
+            prompt_context.SETTING,
+        )
+        if self.stories and self.stories.events:
+            context_builder.add(
+                "events",
+                "    - Relevant World Events:"
+                + ("\n    - ".join([s.situation for s in self.stories.events]))
+                + "\n",
+                prompt_context.EVENTS,
+            )
         if self.parent and self.parent.desc:
-            desc += f"""
+            context_builder.add(
+                "parent",
+                f"""
     - Type: {self.parent.title}
     - Name: {self.parent.name}
-    - Location Backstory: {self.parent.backstory}
+    - Location Backstory: {prompt_context.brief(self.parent)}
      {f"- Controlled By: {self.parent.owner.name}" if hasattr(self.parent, "owner") and self.parent.owner else ""}
     - SETTING DESCRIPTION: {self.parent.desc}
+""",
+                prompt_context.GENEOLOGY,
+            )
+        if associations := self.associations:
+            context_builder.add(
+                "associations",
+                [
+                    f"""
+  - Type: {ass.title}
+    - Name: {ass.name}
+    - Backstory: {prompt_context.brief(ass, "history", "backstory")}
 """
+                    for ass in associations
+                    if ass.name and ass.backstory
+                ],
+                prompt_context.DIRECT,
+                header="""
+===
+- Additional Associated World Elements:
+""",
+            )
+        sections = context_builder.render_sections()
+        desc = "".join(
+            sections.get(name, "") for name in ("world", "events", "parent")
+        )
         if self.desc:
             desc += self.desc
 
@@ -316,20 +362,8 @@ class Encounter(AutoModel):
 {f"- TRIGGER CONDITION: {self.trigger_conditions}" if self.trigger_conditions else ""}
 {f"- COMPLICATIONS: {self.complications}" if self.complications else ""}
 """
+        prompt += sections.get("associations", "")
         # log(prompt, _print=True)
-        if associations := self.associations:
-            prompt += """
-===
-- Additional Associated World Elements:
-"""
-            for ass in associations:
-                if ass.name and ass.backstory:
-                    prompt += f"""
-  - Type: {ass.title}
-    - Name: {ass.name}
-    - Backstory: {ass.history or ass.backstory}
-"""
-
         if results := self.system.generate(self, prompt=prompt, funcobj=self._funcobj):
             for k, v in results.items():
                 if isinstance(v, str):
@@ -444,9 +478,11 @@ The image should be in a {self.world.image_style} style.
         document.pre_save_traits()
         document.pre_save_text()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+        document.post_save_fragments()
 
     ###############################################################
     ##                    VERIFICATION HOOKS                     ##
@@ -489,3 +525,11 @@ The image should be in a {self.world.image_style} style.
                 if isinstance(v, str):
                     parse_attributes.parse_text(self, v)
                 setattr(self, attr, v.strip())
+
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Encounter")
+        world_registry.reindex(self)
+
+    def post_save_fragments(self):
+        # pages of the world and of the associated objects list this one
+        fragments.touch(self.world, *self.associations)
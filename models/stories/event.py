@@ -2,17 +2,24 @@ import random
 
 import markdown
 import validators
-from autonomous.model.autoattr import ListAttr, ReferenceAttr, StringAttr
+from autonomous.model.autoattr import IntAttr, ListAttr, ReferenceAttr, StringAttr
 from autonomous.model.automodel import AutoModel
 from bs4 import BeautifulSoup
 
 from autonomous import log
 from models.calendar.date import Date
 from models.images.image import Image
+from models.utility import fragments
 from models.utility import parse_attributes
+from models.utility import registry as world_registry
 
 
 class Event(AutoModel):
+    meta = {
+        "allow_inheritance": True,
+        "strict": False,
+        "indexes": [("world", "-end_ordinal"), "end_date"],
+    }
     name = StringAttr(default="")
     scope = StringAttr(default="Local", choices=["Local", "Regional", "Global", "Epic"])
     summary = StringAttr(default="")
@@ -21,6 +28,8 @@ class Event(AutoModel):
     outcome = StringAttr(default="")
     start_date = ReferenceAttr(choices=["Date"])
     end_date = ReferenceAttr(choices=["Date"])
+    # ordinal of end_date, None while its year is unknown; see World.timeline
+    end_ordinal = IntAttr()
     image = ReferenceAttr(choices=[Image])
     desc = StringAttr(default="")
     associations = ListAttr(ReferenceAttr(choices=["TTRPGObject"]))
@@ -197,6 +206,9 @@ class Event(AutoModel):
             self.start_date.delete()
         if self.end_date:
             self.end_date.delete()
+        world_registry.unindex(self)
+        world_registry.invalidate(self.world, "Event")
+        fragments.touch(self.world, *self.associations)
         super().delete()
 
     ############# image generation #############
@@ -354,11 +366,14 @@ The image should be in a {self.world.image_style} style.
         super().auto_pre_save(sender, document, **kwargs)
         document.pre_save_associations()
         document.pre_save_dates()
+        document.pre_save_end_ordinal()
         document.pre_save_image()
 
     @classmethod
     def auto_post_save(cls, sender, document, **kwargs):
         super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+        document.post_save_fragments()
 
     # def clean(self):
     #     super().clean()
@@ -437,6 +452,12 @@ The image should be in a {self.world.image_style} style.
             self.end_date.month = random.randint(0, 11)
         # log(self.start_date, self.end_date)
 
+    def pre_save_end_ordinal(self):
+        end_date = self.end_date if isinstance(self.end_date, Date) else None
+        self.end_ordinal = (
+            end_date.to_ordinal() if end_date and end_date.year else None
+        )
+
     def pre_save_image(self):
         if isinstance(self.image, str):
             if validators.url(self.image):
@@ -455,3 +476,11 @@ The image should be in a {self.world.image_style} style.
         elif self.image and not self.image.tags:
             self.image.tags = self.image_tags
             self.image.save()
+
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Event")
+        world_registry.reindex(self)
+
+    def post_save_fragments(self):
+        # pages of the world and of the associated objects list this one
+        fragments.touch(self.world, *self.associations)
@@ -16,6 +16,8 @@ from autonomous import log
 from models.audio.audio import Audio
 from models.calendar.date import Date
 from models.images.graphic import Graphic
+from models.utility import context as prompt_context
+from models.utility import registry as world_registry
 from models.utility.parse_attributes import parse_text
 
 
@@ -310,7 +312,9 @@ class Lore(AutoModel):
 
     @property
     def events(self):
-        return [e for e in self.world.events if e.date and e.date <= self.current_date]
+        if not self.current_date:
+            return []
+        return self.world.timeline(end=self.current_date)
 
     @property
     def graphic(self):
@@ -377,6 +381,7 @@ class Lore(AutoModel):
         for scene in self.scenes:
             log("deleting scene")
             scene.delete()
+        world_registry.invalidate(self.world, "Lore")
         super().delete()
 
     ############# image generation #############
@@ -385,25 +390,45 @@ class Lore(AutoModel):
 
 WORLD NAME: {self.world.name}
 WORLD CURRENT DATE: {self.current_date}
-WORLD's HISTORY:
-{self.world.history}
-
 LORE SCENARIO START DATE: {self.start_date}
 LORE SCENARIO CURRENT DATE: {self.current_date}
 """
+        context = prompt_context.ContextBuilder()
+        context.add(
+            "world",
+            f"WORLD's HISTORY:\n{prompt_context.brief(self.world, 'history', 'backstory')}\n",
+            prompt_context.SETTING,
+        )
         if self.story:
-            prompt += f"\n\nThe lore is part of the following storylines: \n{self.story.name}: {self.story.summary or self.story.backstory}."
+            context.add(
+                "story",
+                f"\n\nThe lore is part of the following storylines: \n{self.story.name}: {self.story.summary or self.story.backstory}.",
+                prompt_context.DIRECT,
+            )
 
         if self.party:
-            prompt += "\n\nThe party consists of the following characters: "
-            for member in self.party:
-                prompt += f"\n- {member.name}: {member.history or member.backstory}. SKILLS: {member.skills} ABILITIES: {member.abilities}"
+            context.add(
+                "party",
+                [
+                    f"\n- {member.name}: {prompt_context.brief(member, 'history', 'backstory')}. SKILLS: {member.skills} ABILITIES: {member.abilities}"
+                    for member in self.party
+                ],
+                prompt_context.GENEOLOGY,
+                header="\n\nThe party consists of the following characters: ",
+            )
 
         if self.associations:
-            prompt += "\n\nHere are some additional elements related to this lore: "
-            for assoc in self.associations:
-                if assoc not in [*self.party, self.setting, self.world]:
-                    prompt += f"\n\n{assoc.name}: {assoc.history or assoc.backstory}."
+            context.add(
+                "associations",
+                [
+                    f"\n\n{assoc.name}: {prompt_context.brief(assoc, 'history', 'backstory')}."
+                    for assoc in self.associations
+                    if assoc not in [*self.party, self.setting, self.world]
+                ],
+                prompt_context.INCIDENTAL,
+                header="\n\nHere are some additional elements related to this lore: ",
+            )
+        prompt += context.render()
 
         if self.summary:
             prompt += f"\n\nThe lore we are currently working on has the following summary: {self.summary}."
@@ -509,9 +534,10 @@ SCENE: {self.situation}.
         document.pre_save_associations()
         document.pre_save_dates()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
 
     # def clean(self):
     #     super().clean()
@@ -551,3 +577,6 @@ SCENE: {self.situation}.
             for date in Date.search(obj=self):
                 if date not in [self.start_date, self.current_date]:
                     date.delete()
+
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Lore")
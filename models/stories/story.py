@@ -9,7 +9,10 @@ from models.images.image import Image
 from models.stories.encounter import Encounter
 from models.stories.event import Event
 from models.stories.quest import Quest
+from models.utility import context as prompt_context
+from models.utility import fragments
 from models.utility import parse_attributes
+from models.utility import registry as world_registry
 
 
 class Story(AutoModel):
@@ -130,29 +133,43 @@ class Story(AutoModel):
         if self.image:
             self.image.delete()
             self.image = None
+        world_registry.unindex(self)
+        world_registry.invalidate(self.world, "Story")
+        fragments.touch(self.world, *self.associations)
         super().delete()
 
     def generate(self):
         prompt = f"Your task is to create a new storyline with a {self.scope} scope for the following {self.world.genre} TTRPG world. The story should incorporate existing world elements and relationships. however, the plot must include elements that can benefit from outside assistance or interference. Here is some context about the world: {self.world.name}, {self.world.description}. "
 
+        context = prompt_context.ContextBuilder()
         if self.world.stories:
-            prompt += "\n\nHere are some existing storylines in the world: "
-            for story in random.sample(
-                self.world.stories, min(len(self.world.stories), 3)
-            ):
-                prompt += f"\n\n{story.name}: {story.situation}. "
-
-        prompt += "\n\nHere are some existing elements related to this storyline: "
-        if self.associations:
-            for assoc in self.associations:
-                prompt += f"\n\n{assoc.name}: {assoc.backstory}. "
-        elif self.world.associations:
-            for assoc in random.sample(
+            context.add(
+                "stories",
+                [
+                    f"\n\n{story.name}: {story.situation}. "
+                    for story in random.sample(
+                        self.world.stories, min(len(self.world.stories), 3)
+                    )
+                ],
+                prompt_context.INCIDENTAL,
+                header="\n\nHere are some existing storylines in the world: ",
+            )
+
+        if not self.associations and self.world.associations:
+            self.associations += random.sample(
                 self.world.associations, min(len(self.world.associations), 5)
-            ):
-                self.associations += [assoc]
-                prompt += f"\n\n{assoc.name}: {assoc.backstory}."
+            )
             self.save()
+        context.add(
+            "associations",
+            [
+                f"\n\n{assoc.name}: {prompt_context.brief(assoc)}. "
+                for assoc in self.associations
+            ],
+            prompt_context.DIRECT,
+            header="\n\nHere are some existing elements related to this storyline: ",
+        )
+        prompt += context.render()
 
         if self.backstory:
             prompt += f"\n\nHISTORY: {self.backstory}. "
@@ -216,6 +233,17 @@ The image should be in a {self.world.image_style} style.
             self.save()
         return obj
 
+    def add_associations(self, objs):
+        new = [
+            obj
+            for obj in dict.fromkeys(objs)
+            if obj and obj != self and obj not in self.associations
+        ]
+        if new:
+            self.associations += new
+            self.save()
+        return self.associations
+
     def add_story(self, story):
         if story != self and story not in self.associated_stories:
             self.associated_stories += [story]
@@ -236,9 +264,11 @@ The image should be in a {self.world.image_style} style.
             a for a in document.associations if a and a.model_name() != "Encounter"
         ]
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+        document.post_save_fragments()
 
     ###############################################################
     ##                    VERIFICATION HOOKS                     ##
@@ -250,3 +280,11 @@ The image should be in a {self.world.image_style} style.
             if isinstance(v, str) and any(ch in v for ch in ["#", "*", "- "]):
                 v = parse_attributes.parse_text(self, v)
                 setattr(self, k, v)
+
+    def post_save_registry(self):
+        world_registry.invalidate(self.world, "Story")
+        world_registry.reindex(self)
+
+    def post_save_fragments(self):
+        # pages of the world and of the associated objects list this one
+        fragments.touch(self.world, *self.associations)
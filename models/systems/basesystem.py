@@ -1,5 +1,6 @@
+import os
 import random
-import re
+from concurrent.futures import ThreadPoolExecutor
 
 from autonomous.ai.jsonagent import JSONAgent
 from autonomous.ai.textagent import TextAgent
@@ -9,7 +10,9 @@ from autonomous.model.autoattr import (
 from autonomous.model.automodel import AutoModel
 
 from autonomous import log
-from models.utility import parse_attributes
+from models.utility import agents, llm_cache, parse_attributes
+
+SUMMARY_WORKERS = int(os.environ.get("SUMMARY_WORKERS", 4))
 
 
 class BaseSystem(AutoModel):
@@ -503,6 +506,8 @@ class BaseSystem(AutoModel):
 
     @property
     def text_agent(self):
+        if agents.offline():
+            return agents.get(TextAgent)
         if not self.text_client:
             log("Creating new text agent...")
             self.text_client = TextAgent(
@@ -517,6 +522,8 @@ class BaseSystem(AutoModel):
 
     @property
     def json_agent(self):
+        if agents.offline():
+            return agents.get(JSONAgent)
         if not self.json_client:
             log("Creating new json agent...")
             self.json_client = JSONAgent(
@@ -609,6 +616,21 @@ class BaseSystem(AutoModel):
 
     ############# Generation Methods #############
 
+    def _cached(self, kind, parts, generate):
+        """
+        Reuses the stored response to an identical request. Only summaries go through
+        here: regenerating a summary of unchanged text should not cost another call,
+        while creative generation has to give a new result on every regenerate.
+        """
+        world = self.world
+        return llm_cache.cached(
+            kind,
+            world.pk if world else None,
+            [self.instructions, *parts],
+            generate,
+            enabled=not world or world.cache_generations,
+        )
+
     def generate(self, obj, prompt, funcobj):
         additional = f"\n\nIMPORTANT: The generated data must be new, unique, consistent with, and connected to the world data described. If existing data is present in the object, expand on the {obj.title} data by adding greater specificity where possible, while ensuring the original concept remains unchanged. The result must be in VALID JSON format."
         prompt = parse_attributes.sanitize(prompt)
@@ -632,19 +654,54 @@ class BaseSystem(AutoModel):
         )
         return response
 
-    def generate_summary(self, prompt, primer=""):
-        prompt = parse_attributes.sanitize(prompt)
-        updated_prompt_list = []
-        # Find all words in the prompt
-        words = re.findall(r"\w+", prompt)
+    def generate_summary(self, prompt, primer="", mode="sequential"):
+        """
+        Summarizes the prompt, splitting it into MAX_TOKEN_LENGTH word chunks on
+        paragraph and sentence boundaries.
 
-        # Split the words into chunks
-        for i in range(0, len(words), self.MAX_TOKEN_LENGTH):
-            # Join a chunk of words and add to the list
-            updated_prompt_list.append(" ".join(words[i : i + self.MAX_TOKEN_LENGTH]))
+        Args:
+            mode (str): "sequential" summarizes the chunks one after another, feeding
+                the running summary into each call. "map_reduce" summarizes the chunks
+                concurrently and then summarizes the combined summaries.
+        """
+        prompt = parse_attributes.sanitize(prompt)
+        summarize = (
+            self._map_reduce_summarize if mode == "map_reduce" else self._summarize
+        )
+        return self._cached(
+            "summary", [mode, primer, prompt], lambda: summarize(prompt, primer)
+        )
 
+    def _summarize(self, prompt, primer=""):
         summary = ""
-        for p in updated_prompt_list:
+        for p in parse_attributes.split_text(prompt, self.MAX_TOKEN_LENGTH):
             summary += f"{self.text_agent.summarize_text(summary + p, primer=primer)}"
 
         return summary
+
+    def _map_reduce_summarize(self, prompt, primer=""):
+        chunks = parse_attributes.split_text(prompt, self.MAX_TOKEN_LENGTH)
+        agent = self.text_agent
+        while len(chunks) > 1:
+            parts = len(chunks)
+
+            def summarize_part(args):
+                num, chunk = args
+                return agent.summarize_text(
+                    chunk,
+                    primer=f"{primer}\n\nThis is part {num} of {parts} of the text. Summarize only this part, keeping the names, dates, and order of events, so that it can be combined with the summaries of the other parts.",
+                )
+
+            with ThreadPoolExecutor(
+                max_workers=SUMMARY_WORKERS, thread_name_prefix="summary"
+            ) as executor:
+                summaries = list(executor.map(summarize_part, enumerate(chunks, 1)))
+            reduced = parse_attributes.split_text(
+                "\n\n".join(summaries), self.MAX_TOKEN_LENGTH
+            )
+            if len(reduced) >= parts:
+                # the summaries are not getting shorter, summarize them as they are
+                chunks = ["\n\n".join(summaries)]
+                break
+            chunks = reduced
+        return agent.summarize_text(chunks[0], primer=primer) if chunks else ""
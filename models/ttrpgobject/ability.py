@@ -6,6 +6,7 @@ from autonomous.model.automodel import AutoModel
 
 from autonomous import log
 from models.utility import parse_attributes
+from models.utility import registry as world_registry
 
 
 class Ability(AutoModel):
@@ -126,6 +127,10 @@ class Ability(AutoModel):
             return f"world/{self.world.pk}"
         return None
 
+    def delete(self):
+        world_registry.invalidate(self.world, "Ability")
+        super().delete()
+
     def generate(self, obj=None):
         if obj:
             self.type = obj.model_name().lower()
@@ -180,3 +185,16 @@ TONE: {self.world.tone_description}.
             if obj and hasattr(obj, "abilities") and self not in obj.abilities:
                 obj.abilities += [self]
                 obj.save()
+
+    ## MARK: - Verification Methods
+    ###############################################################
+    ##                    VERIFICATION HOOKS                     ##
+    ###############################################################
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_registry()
+
+    def post_save_registry(self):
+        # World.abilities is read from the registry
+        world_registry.invalidate(self.world, "Ability")
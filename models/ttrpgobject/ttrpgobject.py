@@ -8,6 +8,8 @@ from autonomous import log
 from models.base.ttrpgbase import TTRPGBase
 from models.calendar.date import Date
 from models.stories.encounter import Encounter
+from models.utility import fragments
+from models.utility import search_index
 from models.utility.parse_attributes import parse_date
 
 MAX_NUM_IMAGES_IN_GALLERY = 100
@@ -31,7 +33,9 @@ class TTRPGObject(TTRPGBase):
 
     @property
     def campaigns(self):
-        return [c for c in self.world.campaigns if self in c.associations]
+        from models.campaign.campaign import Campaign
+
+        return self.world.registry.referrers(self, Campaign)
 
     @property
     def characters(self):
@@ -55,8 +59,7 @@ class TTRPGObject(TTRPGBase):
 
     @property
     def encounters(self):
-        encounters = Encounter.search(world=self.world)
-        return [a for a in encounters if self in a.associations]
+        return self.world.registry.referrers(self, Encounter)
 
     @property
     def factions(self):
@@ -84,8 +87,9 @@ class TTRPGObject(TTRPGBase):
 
     @property
     def stories(self):
-        stories = [s for s in self.world.stories if self in s.associations]
-        return stories
+        from models.stories.story import Story
+
+        return self.world.registry.referrers(self, Story)
 
     @property
     def system(self):
@@ -125,6 +129,8 @@ class TTRPGObject(TTRPGBase):
             self.start_date.delete()
         if self.end_date:
             self.end_date.delete()
+        search_index.remove(self)
+        fragments.touch(self.world, *self.associations)
         return super().delete()
 
     def get_world(self):
@@ -185,9 +191,10 @@ class TTRPGObject(TTRPGBase):
         document.pre_save_associations()
         document.pre_save_dates()
 
-    # @classmethod
-    # def auto_post_save(cls, sender, document, **kwargs):
-    #     super().auto_post_save(sender, document, **kwargs)
+    @classmethod
+    def auto_post_save(cls, sender, document, **kwargs):
+        super().auto_post_save(sender, document, **kwargs)
+        document.post_save_search_index()
 
     # def clean(self):
     #     super().clean()
@@ -200,6 +207,13 @@ class TTRPGObject(TTRPGBase):
         if not self.world:
             raise ValidationError("Must be associated with a World object")
 
+    def post_save_fragments(self):
+        # pages of the world and of associated objects show this object
+        fragments.touch(self, self.world, *self.associations)
+
+    def post_save_search_index(self):
+        search_index.update(self)
+
     def pre_save_dates(self):
         if self.pk:
             # if hasattr(self.start_date, "pk") and not self.start_date.pk:
@@ -8,6 +8,7 @@ from autonomous.model.autoattr import (
 )
 
 from autonomous import log
+from models.utility import membership
 from models.world import World
 
 
@@ -19,12 +20,10 @@ class User(AutoUser):
 
     @property
     def worlds(self):
-        for w in World.all():
-            if self in w.users:
-                yield w
+        return membership.worlds(self)
 
     def world_user(self, obj):
-        return self in obj.world.users
+        return membership.is_member(self, obj.world)
 
     ## MARK: - Verification Methods
     ###############################################################
@@ -0,0 +1,167 @@
+import hashlib
+import io
+import json
+import os
+import random
+import time
+import wave
+
+from PIL import Image as ImageTools
+
+from autonomous import log
+
+# "stub" answers every generation call locally, e.g. for benchmarks and offline work
+AI_BACKEND = os.environ.get("AI_BACKEND", "").lower()
+# seconds each stubbed call takes, to stand in for provider latency
+STUB_LATENCY = float(os.environ.get("STUB_LATENCY", 0))
+STUB_IMAGE_SIZE = int(os.environ.get("STUB_IMAGE_SIZE", 256))
+STUB_AUDIO_SECONDS = float(os.environ.get("STUB_AUDIO_SECONDS", 1))
+STUB_ARRAY_ITEMS = 3
+
+WORDS = (
+    "ancient ashen bitter broken cinder crimson distant dusk ember fallen forgotten "
+    "gilded hollow iron ivory lantern lost marsh moon oath raven ruin salt shadow "
+    "silent silver stone storm thorn veiled warden whisper wild winter wyrm"
+).split()
+
+
+def offline():
+    return AI_BACKEND == "stub"
+
+
+def get(agent_class, **kwargs):
+    """
+    Returns an `agent_class` (TextAgent, JSONAgent, ImageAgent or AudioAgent) agent,
+    or its stub when AI_BACKEND is "stub".
+    """
+    if offline():
+        return STUBS[agent_class.__name__](**kwargs)
+    return agent_class(**kwargs)
+
+
+def _rng(*parts):
+    seed = hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+    return random.Random(seed)
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def fake_value(schema, rng, name=""):
+    """
+    Returns a value valid for the JSON `schema`, chosen by `rng`.
+    """
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    kind = schema.get("type", "string")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "string")
+    if kind == "object":
+        return {
+            key: fake_value(value, rng, key)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        count = max(schema.get("minItems", STUB_ARRAY_ITEMS), 1)
+        count = min(count, schema.get("maxItems", count))
+        return [fake_value(schema.get("items", {}), rng, name) for _ in range(count)]
+    if kind == "integer":
+        low = schema.get("minimum", 1)
+        return rng.randint(low, schema.get("maximum", max(low, 20)))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 1)), 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return f"{name.replace('_', ' ')} {_words(rng, 6)}".strip().capitalize()
+
+
+class StubAgent:
+    name = "stubagent"
+
+    def __init__(self, name=None, instructions="", description="", **kwargs):
+        self.name = name or self.name
+        self.instructions = instructions
+        self.description = description
+
+    def _wait(self):
+        if STUB_LATENCY:
+            time.sleep(STUB_LATENCY)
+
+    def get_agent_id(self):
+        return self.name
+
+    def save(self):
+        return self
+
+    def delete(self):
+        pass
+
+
+class StubTextAgent(StubAgent):
+    name = "stubtextagent"
+
+    def generate(self, messages, additional_instructions=""):
+        self._wait()
+        rng = _rng(messages, additional_instructions)
+        return "\n\n".join(f"{_words(rng, 40).capitalize()}." for _ in range(3))
+
+    def summarize_text(self, text, primer=""):
+        self._wait()
+        return " ".join(str(text).split()[:60])
+
+
+class StubJSONAgent(StubAgent):
+    name = "stubjsonagent"
+
+    def generate(self, messages, function, additional_instructions=""):
+        self._wait()
+        return fake_value(
+            function.get("parameters", {}), _rng(messages, additional_instructions)
+        )
+
+
+class StubImageAgent(StubAgent):
+    name = "stubimageagent"
+
+    def generate(self, prompt, **kwargs):
+        self._wait()
+        color = tuple(_rng(prompt).randrange(256) for _ in range(3))
+        image = ImageTools.new("RGB", (STUB_IMAGE_SIZE, STUB_IMAGE_SIZE), color)
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP")
+        return buffer.getvalue()
+
+
+class StubAudioAgent(StubAgent):
+    name = "stubaudioagent"
+    voices = ["stub"]
+
+    def generate(self, prompt, **kwargs):
+        # silence, as WAV since encoding mp3 would need ffmpeg
+        self._wait()
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(8000)
+            audio.writeframes(b"\x00\x00" * int(8000 * STUB_AUDIO_SECONDS))
+        return buffer.getvalue()
+
+    def transcribe(self, audio, **kwargs):
+        self._wait()
+        return f"{_words(_rng(kwargs.get('prompt', '')), 40).capitalize()}."
+
+    def available_voices(self, filters=None):
+        return list(self.voices)
+
+
+STUBS = {
+    "TextAgent": StubTextAgent,
+    "JSONAgent": StubJSONAgent,
+    "ImageAgent": StubImageAgent,
+    "AudioAgent": StubAudioAgent,
+}
+
+if offline():
+    log("Using the offline stub AI backend", _print=True)
@@ -0,0 +1,131 @@
+import re
+
+TAG_PATTERN = re.compile(r"(<[^>]*>)")
+LINK_TEMPLATE = "<a href='/{path}' class='text-underline' style='font-weight:bold;'>{name}</a>"
+
+
+def _fold(text):
+    # lowercase without changing the length so match offsets line up with the original
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _boundary(text, i):
+    # same semantics as the regex \b assertion at position i
+    before = i > 0 and _is_word(text[i - 1])
+    after = i < len(text) and _is_word(text[i])
+    return before != after
+
+
+class AutoLinker:
+    """
+    Links association names in a block of html in a single pass using an Aho-Corasick
+    automaton over the (case-folded) names. Matches must sit on word boundaries; when
+    matches overlap the longest name wins, then the earlier match. Text inside html tags
+    is never linked.
+    """
+
+    def __init__(self, associations):
+        self.key = self.key_for(associations)
+        self.links = []
+        self._lengths = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for a in sorted(
+            [a for a in associations if a and a.name and a.path],
+            key=lambda x: len(x.name),
+            reverse=True,
+        ):
+            self._add(_fold(a.name), len(self.links))
+            self.links.append(LINK_TEMPLATE.format(path=a.path, name=a.name))
+            self._lengths.append(len(a.name))
+        self._build()
+
+    @staticmethod
+    def key_for(associations):
+        return tuple((str(a.pk), a.name, a.path) for a in associations if a)
+
+    def _add(self, word, pattern):
+        node = 0
+        for ch in word:
+            if ch not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][ch] = len(self._goto) - 1
+            node = self._goto[node][ch]
+        self._out[node].append(pattern)
+
+    def _build(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def matches(self, text):
+        """
+        Returns the accepted (start, end, pattern) matches in `text`, ordered by start.
+        """
+        folded = _fold(text)
+        found = []
+        node = 0
+        for i, ch in enumerate(folded):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                start = i + 1 - self._lengths[pattern]
+                if _boundary(text, start) and _boundary(text, i + 1):
+                    found.append((pattern, start, i + 1))
+        # patterns are numbered longest first, so this gives longest-match-wins
+        found.sort()
+        accepted = []
+        taken = []
+        for pattern, start, end in found:
+            if not any(start < e and s < end for s, e in taken):
+                taken.append((start, end))
+                accepted.append((start, end, pattern))
+        return sorted(accepted)
+
+    def link(self, html):
+        if not self.links:
+            return html
+        parts = TAG_PATTERN.split(html)
+        for idx in range(0, len(parts), 2):
+            text = parts[idx]
+            if not text:
+                continue
+            result = []
+            last = 0
+            for start, end, pattern in self.matches(text):
+                result += [text[last:start], self.links[pattern]]
+                last = end
+            result.append(text[last:])
+            parts[idx] = "".join(result)
+        return "".join(parts)
+
+
+def get_linker(obj):
+    """
+    Returns the linker for `obj`'s associations, reusing the one cached on the object
+    while its association set is unchanged.
+    """
+    associations = obj.associations
+    key = AutoLinker.key_for(associations)
+    linker = getattr(obj, "_autolinker", None)
+    if linker is None or linker.key != key:
+        linker = AutoLinker(associations)
+        obj._autolinker = linker
+    return linker
@@ -0,0 +1,133 @@
+import os
+
+from autonomous import log
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 6000))
+# entries are only cut down to fit when at least this many tokens are left
+MIN_TRUNCATED_TOKENS = 40
+
+# context sources, most important first
+SETTING = 0
+GENEOLOGY = 1
+DIRECT = 2
+INCIDENTAL = 3
+EVENTS = 4
+
+
+def count_tokens(text):
+    # roughly 4 characters per token for English prose
+    return (len(text) + 3) // 4
+
+
+def truncate(text, tokens):
+    """
+    Cuts text down to about `tokens` tokens, ending on a word boundary.
+    """
+    if count_tokens(text) <= tokens:
+        return text
+    cut = (text[: max(tokens - 1, 0) * 4].rsplit(maxsplit=1) or [""])[0].rstrip(",;:")
+    return f"{cut}..."
+
+
+def tail(text, tokens):
+    """
+    Returns the last whole paragraphs of text that fit in about `tokens` tokens, or
+    the end of the last paragraph if even that does not fit.
+    """
+    paragraphs = [p for p in text.split("\n") if p.strip()]
+    kept = []
+    used = 0
+    for paragraph in reversed(paragraphs):
+        if used + count_tokens(paragraph) > tokens:
+            break
+        kept.insert(0, paragraph)
+        used += count_tokens(paragraph)
+    if not kept and paragraphs and (chars := max(tokens - 1, 0) * 4):
+        last = paragraphs[-1]
+        end = last[-chars:]
+        if not last[-chars - 1].isspace():
+            # drop the word that was cut in half
+            end = end.split(maxsplit=1)[-1]
+        kept = [f"...{end.lstrip()}"]
+    return "\n\n".join(kept)
+
+
+def brief(obj, *fields):
+    """
+    Returns the precomputed summary of the first field that has one (e.g.
+    `backstory_summary`), otherwise the first field that has a value.
+    """
+    fields = fields or ("backstory",)
+    for attr in [f"{f}_summary" for f in fields] + list(fields):
+        if value := getattr(obj, attr, None):
+            return str(value)
+    return ""
+
+
+class ContextBuilder:
+    """
+    Collects the context sections for a generation prompt and renders as many as fit
+    in a token budget. Sections are filled in priority order (see SETTING..EVENTS), then
+    in the order they were added, and their entries in the order given, so the same
+    inputs always produce the same prompt. No entry may use more than
+    `max_entry_tokens`, so one long backstory cannot crowd out the rest. The first
+    entry that does not fit is cut down to the remaining budget and everything after
+    it is left out.
+    """
+
+    def __init__(self, budget=None, max_entry_tokens=None):
+        self.budget = budget or CONTEXT_TOKEN_BUDGET
+        self.max_entry_tokens = max_entry_tokens or self.budget // 4
+        self.sections = []
+        self.usage = {}
+
+    def add(self, name, entries, priority=INCIDENTAL, header=""):
+        """
+        Adds a section.
+
+        Args:
+            name (str): Name the section's token usage is reported under.
+            entries (str | list): The section text, or its entries.
+            priority (int): SETTING, GENEOLOGY, DIRECT, INCIDENTAL or EVENTS.
+            header (str): Text placed before the entries when any of them fit.
+        """
+        if isinstance(entries, str):
+            entries = [entries]
+        if entries := [e for e in entries if e and e.strip()]:
+            self.sections.append((priority, len(self.sections), name, header, entries))
+        return self
+
+    def render(self):
+        return "".join(self.render_sections().values())
+
+    def render_sections(self):
+        """
+        Returns the rendered text of each section that fit, by name, in the order the
+        sections were added. Token usage per section is left in `usage`.
+        """
+        remaining = self.budget
+        rendered = {}
+        self.usage = {}
+        for priority, order, name, header, entries in sorted(self.sections):
+            parts = []
+            used = count_tokens(header)
+            for entry in entries:
+                entry = truncate(entry, self.max_entry_tokens)
+                tokens = count_tokens(entry)
+                if used + tokens > remaining:
+                    if remaining - used >= MIN_TRUNCATED_TOKENS:
+                        entry = truncate(entry, remaining - used)
+                        parts.append(entry)
+                        used += count_tokens(entry)
+                    remaining = 0
+                    break
+                parts.append(entry)
+                used += tokens
+            if parts:
+                rendered[order] = (name, header + "".join(parts))
+                self.usage[name] = used
+                remaining = max(remaining - used, 0)
+            else:
+                self.usage[name] = 0
+        log(f"Prompt context tokens: {self.usage} of {self.budget}", _print=True)
+        return dict(rendered[order] for order in sorted(rendered))
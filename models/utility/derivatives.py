@@ -0,0 +1,49 @@
+import gridfs
+from autonomous.db.connection import get_db
+
+from autonomous import log
+
+# GridFS bucket for resized image renditions, shared by the app and tasks services
+COLLECTION = "image_derivatives"
+
+
+def _fs():
+    return gridfs.GridFS(get_db(), collection=COLLECTION)
+
+
+def derivative_name(pk, version, size):
+    return f"{pk}/{version}/{size}"
+
+
+def get(pk, version, size):
+    """
+    Returns the stored rendition of version `version` of image `pk` at `size`, or None.
+    """
+    if stored := _fs().find_one({"filename": derivative_name(pk, version, size)}):
+        return stored.read()
+    return None
+
+
+def put(pk, version, size, data):
+    """
+    Stores a rendition and returns its data.
+    """
+    try:
+        _fs().put(
+            data,
+            filename=derivative_name(pk, version, size),
+            image=str(pk),
+            content_type="image/webp",
+        )
+    except gridfs.errors.GridFSError as e:
+        log(f"Unable to store image derivative {pk}/{size}: {e}", _print=True)
+    return data
+
+
+def discard(pk):
+    """
+    Deletes every stored rendition of image `pk`.
+    """
+    fs = _fs()
+    for stored in fs.find({"image": str(pk)}):
+        fs.delete(stored._id)
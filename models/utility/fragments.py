@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from autonomous.tasks import AutoTasks
+from flask import get_template_attribute
+from markupsafe import Markup
+
+from autonomous import log
+from models.utility import membership
+
+# "local" keeps fragments in each process, "redis" shares them, "off" renders every time
+FRAGMENT_CACHE_BACKEND = os.environ.get("FRAGMENT_CACHE_BACKEND", "local").lower()
+FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", 2000))
+# seconds a fragment is kept, which also bounds how stale indirectly related content gets
+FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", 600))
+
+FRAGMENT_STATS = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+class LocalBackend:
+    """
+    Least recently used fragments of this process.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                FRAGMENT_STATS["evicted"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Fragments shared by every process through the task queue's Redis, which evicts
+    them by TTL (and by its own maxmemory policy).
+    """
+
+    def _connection(self):
+        AutoTasks()
+        return AutoTasks._connection
+
+    def get(self, key):
+        if (value := self._connection().get(f"fragment:{key}")) is not None:
+            return value.decode() if isinstance(value, bytes) else value
+        return None
+
+    def set(self, key, value, ttl):
+        self._connection().set(f"fragment:{key}", value, ex=ttl)
+
+    def clear(self):
+        connection = self._connection()
+        for key in connection.scan_iter("fragment:*"):
+            connection.delete(key)
+
+
+_backends = {"local": LocalBackend(FRAGMENT_CACHE_SIZE), "redis": RedisBackend()}
+
+
+def backend():
+    return _backends.get(FRAGMENT_CACHE_BACKEND)
+
+
+def version(obj):
+    """
+    Returns the render version of `obj`, or None if it has none and cannot be cached.
+    """
+    if not getattr(obj, "pk", None) or "render_version" not in obj._fields:
+        return None
+    return obj.render_version or 0
+
+
+def role(user, obj=None):
+    """
+    Returns what the templates may show differently for `user`: whether they are a
+    guest, an admin, and a member of the world of `obj`.
+    """
+    if not user or getattr(user, "is_guest", False):
+        return "guest"
+    roles = ["admin"] if getattr(user, "is_admin", False) else []
+    if world := getattr(obj, "world", None):
+        roles.append("member" if membership.is_member(user, world) else "viewer")
+    return "+".join(roles) or "user"
+
+
+def fragment_key(*parts):
+    payload = json.dumps(
+        parts, sort_keys=True, default=lambda o: str(getattr(o, "pk", o))
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cached(key, produce):
+    if (store := backend()) is None:
+        return produce()
+    try:
+        fragment = store.get(key)
+    except Exception as e:
+        log(f"Fragment cache lookup failed: {e}", _print=True)
+        fragment = None
+    if fragment is not None:
+        FRAGMENT_STATS["hits"] += 1
+        return Markup(fragment)
+    FRAGMENT_STATS["misses"] += 1
+    fragment = produce()
+    try:
+        store.set(key, str(fragment), FRAGMENT_CACHE_TTL)
+    except Exception as e:
+        log(f"Fragment cache store failed: {e}", _print=True)
+    return fragment
+
+
+def cached(obj, parts, produce):
+    """
+    Returns the fragment stored for `parts` (template, macro, role, arguments...) at
+    the current version of `obj`, otherwise calls `produce()` and stores its result.
+    Objects without a render version are always produced.
+    """
+    if (current := version(obj)) is None:
+        return produce()
+    return _cached(
+        fragment_key(obj.model_name(), str(obj.pk), current, *parts), produce
+    )
+
+
+def render(template, macro, user, obj, **kwargs):
+    """
+    Renders the `macro(user, obj, **kwargs)` of `template`, reusing the fragment
+    rendered for the same object version and user. Pages embed the user's pk (see
+    shared/_form.html), so fragments are never shared between users.
+    """
+    return cached(
+        obj,
+        [template, macro, role(user, obj), getattr(user, "pk", None), kwargs],
+        lambda: get_template_attribute(template, macro)(user, obj, **kwargs),
+    )
+
+
+def static(template, macro, *args, **kwargs):
+    """
+    Renders a macro whose output only depends on its arguments, such as an icon.
+    """
+    return _cached(
+        fragment_key(template, macro, args, kwargs),
+        lambda: get_template_attribute(template, macro)(*args, **kwargs),
+    )
+
+
+def touch(*objs):
+    """
+    Bumps the render version of each of `objs` so their fragments are rendered again.
+    Versions are only ever incremented in the database, so a stale copy can never
+    bring back a version that was already rendered.
+    """
+    by_model = {}
+    for obj in objs:
+        if version(obj) is not None:
+            by_model.setdefault(type(obj), {})[str(obj.pk)] = obj
+    for Model, loaded in by_model.items():
+        Model.objects(pk__in=list(loaded)).update(inc__render_version=1)
+        for obj in loaded.values():
+            # keep loaded copies in step without marking the field as changed
+            obj._data["render_version"] = (obj._data.get("render_version") or 0) + 1
+
+
+def cache_stats():
+    stats = dict(FRAGMENT_STATS)
+    renders = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / renders if renders else 0.0
+    return stats
@@ -0,0 +1,174 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import bson
+from autonomous.db import signals
+from autonomous.db.dereference import DeReference
+from autonomous.db.fields import GenericReferenceField, ReferenceField
+from autonomous.model.automodel import AutoModel
+from flask import g, has_app_context
+
+# 0 loads every referenced document from the database each time it is accessed
+IDENTITY_MAP = os.environ.get("IDENTITY_MAP", "1").lower() not in ("0", "false", "no")
+
+_local = threading.local()
+
+
+class IdentityMap:
+    """
+    Holds the documents loaded during one unit of work (a request or a task job), by
+    collection and pk, so each document is read from the database at most once and
+    every reference to it resolves to the same object. Saving or deleting a document
+    discards it.
+    """
+
+    def __init__(self):
+        self._docs = {}
+        self.stats = {"loads": 0, "hits": 0, "discards": 0}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def get(self, collection, pk):
+        if (doc := self._docs.get((collection, str(pk)))) is not None:
+            self.stats["hits"] += 1
+        return doc
+
+    def put(self, collection, doc):
+        self.stats["loads"] += 1
+        self._docs[(collection, str(doc.pk))] = doc
+        return doc
+
+    def discard(self, collection, pk):
+        if self._docs.pop((collection, str(pk)), None) is not None:
+            self.stats["discards"] += 1
+
+
+def current():
+    """
+    Returns the identity map of the current request or `scope`, or None outside of
+    both, in which case documents are loaded as usual.
+    """
+    if not IDENTITY_MAP:
+        return None
+    if has_app_context():
+        if "identity_map" not in g:
+            g.identity_map = IdentityMap()
+        return g.identity_map
+    return getattr(_local, "identity_map", None)
+
+
+@contextmanager
+def scope():
+    """
+    Shares one identity map for the duration of the block when no request is active,
+    such as inside a task job. Nested scopes use the outer map.
+    """
+    previous = getattr(_local, "identity_map", None)
+    _local.identity_map = IdentityMap() if previous is None else previous
+    try:
+        yield _local.identity_map
+    finally:
+        _local.identity_map = previous
+
+
+def stats():
+    """
+    Returns the loads and hits of the current identity map, or None if there is none.
+    """
+    if (identity_map := current()) is not None:
+        return dict(identity_map.stats, documents=len(identity_map))
+    return None
+
+
+def discard(*documents):
+    """
+    Drops `documents` from the current identity map so their next access reloads them,
+    e.g. after other threads, which do not share the map, have saved them.
+    """
+    if (identity_map := current()) is not None:
+        for document in documents:
+            if document and document.pk:
+                identity_map.discard(_collection(document), document.pk)
+
+
+def _collection(document):
+    return document._get_collection_name()
+
+
+######################## ODM hooks ########################
+def _cached_lazy_load_ref(load):
+    def _lazy_load_ref(ref_cls, dbref):
+        if (identity_map := current()) is None:
+            return load(ref_cls, dbref)
+        if (doc := identity_map.get(dbref.collection, dbref.id)) is not None:
+            return doc
+        return identity_map.put(dbref.collection, load(ref_cls, dbref))
+
+    return staticmethod(_lazy_load_ref)
+
+
+def _cached_fetch_objects(fetch):
+    def _fetch_objects(self, doc_type=None):
+        if (identity_map := current()) is None:
+            return fetch(self, doc_type)
+        known = {}
+        for key, refs in list(self.reference_map.items()):
+            collection = _collection(key) if hasattr(key, "objects") else key
+            found = {}
+            for ref in refs:
+                if (doc := identity_map.get(collection, ref)) is not None:
+                    found[(collection, ref)] = doc
+            known.update(found)
+            if missing := {ref for ref in refs if (collection, ref) not in found}:
+                self.reference_map[key] = missing
+            else:
+                del self.reference_map[key]
+        object_map = fetch(self, doc_type)
+        for (collection, _), doc in object_map.items():
+            identity_map.put(collection, doc)
+        object_map.update(known)
+        return object_map
+
+    return _fetch_objects
+
+
+def _cached_get(get):
+    def _get(cls, pk):
+        if (identity_map := current()) is None or not (collection := _collection(cls)):
+            return get(cls, pk)
+        if isinstance(pk, dict) and "$oid" in pk:
+            pk = pk["$oid"]
+        if isinstance(pk, str) and not bson.ObjectId.is_valid(pk):
+            return None
+        if isinstance(doc := identity_map.get(collection, pk), cls):
+            return doc
+        if (doc := get(cls, pk)) is not None:
+            identity_map.put(collection, doc)
+        return doc
+
+    return classmethod(_get)
+
+
+def _discard(sender, document, **kwargs):
+    discard(document)
+
+
+def install():
+    """
+    Routes single references, reference lists and `get` through the identity map.
+    Called once on import.
+    """
+    if getattr(AutoModel, "_identity_map_installed", False):
+        return
+    for field in (GenericReferenceField, ReferenceField):
+        field._lazy_load_ref = _cached_lazy_load_ref(field._lazy_load_ref)
+    DeReference._fetch_objects = _cached_fetch_objects(DeReference._fetch_objects)
+    AutoModel.get = _cached_get(AutoModel.get.__func__)
+    signals.post_save.connect(_discard)
+    signals.post_delete.connect(_discard)
+    AutoModel._identity_map_installed = True
+
+
+install()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+from autonomous.db.connection import get_db
+from pymongo.errors import PyMongoError
+
+from autonomous import log
+
+# seconds a response is reused for; 0 turns the cache off
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 0) or 0)
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 10000))
+COLLECTION = "llm_response_cache"
+
+_indexed = False
+
+
+def _collection():
+    global _indexed
+    collection = get_db()[COLLECTION]
+    if not _indexed:
+        collection.create_index("expires", expireAfterSeconds=0)
+        collection.create_index("last_used")
+        collection.create_index("world")
+        _indexed = True
+    return collection
+
+
+def cache_key(kind, world, *parts):
+    """
+    Returns the content address of a generation request.
+
+    Args:
+        kind (str): The kind of call, e.g. "summary".
+        world: The pk of the world the call is made for.
+        *parts: Everything else sent to the agent (instructions, primer, prompt, schema).
+    """
+    payload = json.dumps(
+        [kind, str(world or ""), *parts], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _get(key, now):
+    return _collection().find_one_and_update(
+        {"_id": key, "expires": {"$gt": now}},
+        {"$set": {"last_used": now}, "$inc": {"hits": 1}},
+    )
+
+
+def _put(key, kind, world, response, now):
+    collection = _collection()
+    collection.replace_one(
+        {"_id": key},
+        {
+            "kind": kind,
+            "world": str(world or ""),
+            "response": response,
+            "created": now,
+            "last_used": now,
+            "expires": now + timedelta(seconds=LLM_CACHE_TTL),
+            "hits": 0,
+        },
+        upsert=True,
+    )
+    if (excess := collection.estimated_document_count() - LLM_CACHE_MAX_ENTRIES) > 0:
+        oldest = [
+            doc["_id"]
+            for doc in collection.find({}, {"_id": 1}).sort("last_used", 1).limit(excess)
+        ]
+        collection.delete_many({"_id": {"$in": oldest}})
+
+
+def cached(kind, world, parts, generate, enabled=True):
+    """
+    Returns the stored response for the request if there is one, otherwise calls
+    `generate()` and stores its response. Falsy responses are never stored.
+
+    Args:
+        kind (str): The kind of call, see cache_key.
+        world: The pk of the world the call is made for.
+        parts (list): The request content, see cache_key.
+        generate (callable): Makes the actual agent call.
+        enabled (bool): False bypasses the cache, e.g. for worlds that opted out.
+    """
+    if not (LLM_CACHE_TTL and enabled):
+        return generate()
+    key = cache_key(kind, world, *parts)
+    now = datetime.now(timezone.utc)
+    try:
+        entry = _get(key, now)
+    except PyMongoError as e:
+        log(f"LLM cache lookup failed: {e}", _print=True)
+        entry = None
+    if entry:
+        return entry["response"]
+    if response := generate():
+        try:
+            _put(key, kind, world, response, now)
+        except PyMongoError as e:
+            log(f"LLM cache store failed: {e}", _print=True)
+    return response
+
+
+def invalidate(world=None):
+    """
+    Drops the stored responses for `world`, or every stored response.
+    """
+    query = {"world": str(world)} if world else {}
+    return _collection().delete_many(query).deleted_count
+
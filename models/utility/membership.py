@@ -0,0 +1,49 @@
+from autonomous.model.automodel import AutoModel
+from flask import g, has_app_context
+
+
+def _cache():
+    if has_app_context():
+        if "world_memberships" not in g:
+            g.world_memberships = {}
+        return g.world_memberships
+    return None
+
+
+def worlds(user):
+    """
+    Returns the worlds `user` belongs to, oldest first. The lookup uses the index on
+    World.users and is cached for the rest of the request.
+    """
+    if not user or not user.pk:
+        return []
+    cache = _cache()
+    if cache is not None and (found := cache.get(str(user.pk))) is not None:
+        return found
+    World = AutoModel.load_model("World")
+    found = list(World.objects(users=user).order_by("id"))
+    if cache is not None:
+        cache[str(user.pk)] = found
+    return found
+
+
+def is_member(user, world):
+    """
+    Returns True if `user` is one of the users of `world`, without loading the users
+    of the world.
+    """
+    if not (user and user.pk and world and world.pk):
+        return False
+    if _cache() is None:
+        World = AutoModel.load_model("World")
+        return bool(World.objects(pk=world.pk, users=user).count())
+    return any(w.pk == world.pk for w in worlds(user))
+
+
+def invalidate():
+    """
+    Forgets the memberships looked up during this request. Called when a world is
+    saved or deleted.
+    """
+    if has_app_context():
+        g.pop("world_memberships", None)
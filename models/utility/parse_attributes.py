@@ -1,3 +1,5 @@
+import difflib
+import hashlib
 import random
 import re
 
@@ -7,6 +9,10 @@ from bs4 import BeautifulSoup
 
 from autonomous import log
 from models.calendar.date import Date
+from models.utility import autolinker
+
+# how many text field parses ran or were skipped because nothing had changed
+PARSE_STATS = {"parsed": 0, "skipped": 0}
 
 
 def parse_text(obj, text):
@@ -54,43 +60,50 @@ def parse_text(obj, text):
             # --- 1. Strip all existing anchor tags from the text ---
             # This ensures that any existing links are removed, allowing a clean, full-name match.
             text = STRIP_ANCHOR_TAGS_PATTERN.sub("", text.replace("@", ""))
-            associations = sorted(
-                obj.associations,
-                key=lambda x: len(x.name or ""),
-                reverse=True,
-            )
-            for a in associations:
-                if not a or not a.name or not a.path:
-                    continue
-
-                # Escape the name for regex safety and add word boundaries (\b)
-                safe_name = re.escape(a.name)
-
-                # --- 3. Define the Pattern: Full Name Match ---
-                # The pattern matches the full name and uses re.IGNORECASE
-                full_name_pattern = re.compile(r"\b" + safe_name + r"\b", re.IGNORECASE)
-
-                # --- 4. Define the Replacement Template ---
-                # Note: Added the style tag inline for CSS portability,.
-                link_template = f"<a href='/{a.path}' class='text-underline' style='font-weight:bold;'>{a.name}</a>"
-
-                # --- 5. Perform the safe substitution ---
-                # The substitution function checks if the match is already surrounded by the intended link.
-                def replacer(match):
-                    """
-                    This function ensures we don't accidentally link a name that has already
-                    been processed by a previous iteration, although stripping should make this redundant.
-                    It primarily handles the case-insensitive replacement with the link template.
-                    """
-                    return link_template
-
-                # Use re.sub to replace the name occurrences with the link template
-                text = full_name_pattern.sub(replacer, text)
+            text = autolinker.get_linker(obj).link(text)
     if "<a" not in text and text.count("<") < 3:
         return sanitize(text)
     return text
 
 
+def text_fingerprint(obj, text):
+    associations = obj.associations if hasattr(obj, "associations") else []
+    key = repr((text, autolinker.AutoLinker.key_for(associations)))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def parse_text_fields(obj, fields, fingerprints):
+    """
+    Runs parse_text on each of the given text attributes of `obj`, skipping any whose
+    text and association set match the fingerprint recorded the last time it was parsed.
+
+    Args:
+        obj: The object being saved.
+        fields (list): The names of the text attributes to parse.
+        fingerprints (dict): The recorded fingerprints, keyed by attribute name.
+
+    Returns:
+        dict: The updated fingerprints.
+    """
+    fingerprints = dict(fingerprints or {})
+    for field in fields:
+        if not (text := getattr(obj, field)):
+            fingerprints.pop(field, None)
+            continue
+        if fingerprints.get(field) == text_fingerprint(obj, text):
+            PARSE_STATS["skipped"] += 1
+            continue
+        text = parse_text(obj, text)
+        setattr(obj, field, text)
+        fingerprints[field] = text_fingerprint(obj, text)
+        PARSE_STATS["parsed"] += 1
+    return fingerprints
+
+
+def parse_stats():
+    return dict(PARSE_STATS)
+
+
 def parse_date(obj, date):
     # log(date)
     if obj.pk and obj.calendar:
@@ -137,3 +150,81 @@ def sanitize(data):
         data = markdown.markdown(data)
         data = BeautifulSoup(data, "html.parser").get_text()
     return data
+
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def _text_pieces(text, max_words):
+    # yields (piece, starts_paragraph) with no piece longer than max_words words
+    for paragraph in re.split(r"\n\s*\n", text):
+        if not (paragraph := paragraph.strip()):
+            continue
+        if len(paragraph.split()) <= max_words:
+            yield paragraph, True
+            continue
+        first = True
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            words = sentence.split()
+            for i in range(0, len(words), max_words):
+                yield " ".join(words[i : i + max_words]), first
+                first = False
+
+
+def split_text(text, max_words):
+    """
+    Splits text into chunks of at most `max_words` words, breaking between paragraphs
+    where possible, then between sentences. Punctuation and paragraph breaks are kept.
+
+    Returns:
+        list: The chunks, in order.
+    """
+    chunks = []
+    current = ""
+    size = 0
+    for piece, starts_paragraph in _text_pieces(text, max_words):
+        words = len(piece.split())
+        if current and size + words > max_words:
+            chunks.append(current)
+            current, size = "", 0
+        if current:
+            current += "\n\n" if starts_paragraph else " "
+        current += piece
+        size += words
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def stitch_text(pieces, overlap_words=80, min_match=4):
+    """
+    Joins texts whose ends overlap, e.g. transcripts of overlapping audio segments,
+    dropping the repeated words. Each piece is matched against the end of the text
+    so far on its first `overlap_words` words. Pieces with no match of at least
+    `min_match` words are appended whole.
+
+    Returns:
+        str: The joined text.
+    """
+    tokens = []
+    for piece in pieces:
+        new = re.findall(r"\S+\s*", piece or "")
+        if not new:
+            continue
+        tail_start = max(len(tokens) - overlap_words, 0)
+        tail = [re.sub(r"\W", "", t.lower()) for t in tokens[tail_start:]]
+        head = [re.sub(r"\W", "", t.lower()) for t in new[:overlap_words]]
+        match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+            0, len(tail), 0, len(head)
+        )
+        if match.size >= min_match:
+            end = match.b + match.size
+            tokens = tokens[: tail_start + match.a + match.size]
+            # keep the spacing that followed the repeated words in the new piece
+            tokens[-1] = tokens[-1].rstrip() + new[end - 1][len(new[end - 1].rstrip()) :]
+            tokens += new[end:]
+        else:
+            if tokens and not tokens[-1][-1].isspace():
+                tokens[-1] += "\n\n"
+            tokens += new
+    return "".join(tokens).strip()
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_app_context
+
+from models.utility import identity_map
+
+# seconds a registry may be shared across requests; 0 keeps registries request-scoped
+WORLD_REGISTRY_TTL = float(os.environ.get("WORLD_REGISTRY_TTL", 0) or 0)
+
+_shared_registries = {}
+_local = threading.local()
+
+
+class WorldRegistry:
+    """
+    Holds the objects belonging to a single world. Each model type is loaded with one
+    query the first time it is requested and kept sorted by name, with indexes by
+    model name, pk and name for constant time lookups afterwards.
+
+    It also keeps an inverted association index per referring model type (Story,
+    Event, Episode, ...): referenced pk -> pks of the documents listing it in their
+    associations, so "what links to this object" does not dereference every document.
+    """
+
+    def __init__(self, world):
+        self.world = world
+        self.loaded_at = time.monotonic()
+        self._models = {}
+        self._pks = {}
+        self._names = {}
+        self._referrers = {}
+        self._referenced = {}
+
+    @property
+    def expired(self):
+        return (
+            WORLD_REGISTRY_TTL > 0
+            and time.monotonic() - self.loaded_at > WORLD_REGISTRY_TTL
+        )
+
+    def is_loaded(self, model):
+        return self._model_name(model) in self._models
+
+    def objects(self, Model):
+        """
+        Returns a copy of the name sorted list of `Model` objects in the world,
+        loading them on first access.
+        """
+        name = Model.__name__
+        if name not in self._models:
+            objs = sorted(
+                Model.search(**self._scope(Model)) if self.world.pk else [],
+                key=lambda x: x.name,
+            )
+            self._models[name] = objs
+            for obj in objs:
+                self._pks[str(obj.pk)] = obj
+                self._names.setdefault((obj.name or "").lower(), []).append(obj)
+        return list(self._models[name])
+
+    def get(self, pk, Model=None):
+        """
+        Returns the object with the given pk from the loaded model types, loading
+        `Model` first if it is given.
+        """
+        if Model:
+            self.objects(Model)
+        return self._pks.get(str(pk))
+
+    def find(self, name, Model=None):
+        """
+        Returns the objects whose name matches `name` exactly (case insensitive),
+        optionally limited to a single model type.
+        """
+        if Model:
+            self.objects(Model)
+        results = self._names.get((name or "").lower(), [])
+        if Model:
+            results = [r for r in results if r.model_name() == Model.__name__]
+        return list(results)
+
+    def referrers(self, obj, Model):
+        """
+        Returns the `Model` objects whose associations include `obj`, sorted by name.
+        The index for `Model` is built from the raw association references on first use.
+        """
+        name = Model.__name__
+        if name not in self._referrers:
+            self._build_index(Model)
+        pks = self._referrers[name].get(str(obj.pk), ())
+        self.objects(Model)
+        return sorted(
+            [self._pks[pk] for pk in pks if pk in self._pks], key=lambda x: x.name
+        )
+
+    def reindex(self, referrer):
+        """
+        Replaces the index entries of `referrer` with its current associations.
+        """
+        name = referrer.model_name()
+        if name in self._referrers:
+            self._index(
+                name, str(referrer.pk), [a.pk for a in referrer.associations if a]
+            )
+        if name == "Episode":
+            # campaign entries are the union of their episodes, rebuilt on next use
+            self._referrers.pop("Campaign", None)
+            self._referenced.pop("Campaign", None)
+
+    def unindex(self, referrer):
+        name = referrer.model_name()
+        if name in self._referrers:
+            self._index(name, str(referrer.pk), [])
+            self._referenced[name].pop(str(referrer.pk), None)
+        if name == "Episode":
+            self._referrers.pop("Campaign", None)
+            self._referenced.pop("Campaign", None)
+
+    def discard(self, model=None):
+        """
+        Drops the cached objects for a model type (or all of them) so the next
+        access reloads them from the database.
+        """
+        if not model:
+            self._referrers = {}
+            self._referenced = {}
+        names = [self._model_name(model)] if model else list(self._models)
+        for name in names:
+            for obj in self._models.pop(name, []):
+                self._pks.pop(str(obj.pk), None)
+                same_name = self._names.get((obj.name or "").lower(), [])
+                if obj in same_name:
+                    same_name.remove(obj)
+
+    def _scope(self, Model):
+        # episodes belong to the world through their campaign
+        if "world" in Model._fields:
+            return {"world": self.world}
+        return {"campaign__in": list(self.world.campaigns)}
+
+    def _build_index(self, Model):
+        name = Model.__name__
+        self._referrers[name] = {}
+        self._referenced[name] = {}
+        if not self.world.pk:
+            return
+        if name == "Campaign":
+            from models.campaign.episode import Episode
+
+            refs = {}
+            for doc in self._raw(Episode, "campaign", "associations"):
+                if campaign := doc.get("campaign"):
+                    refs.setdefault(str(campaign["_ref"].id), []).extend(
+                        self._ref_pks(doc)
+                    )
+            for pk, ref_pks in refs.items():
+                self._index(name, pk, ref_pks)
+        else:
+            for doc in self._raw(Model, "associations"):
+                self._index(name, str(doc["_id"]), self._ref_pks(doc))
+
+    def _raw(self, Model, *fields):
+        return Model.objects(**self._scope(Model)).only(*fields).as_pymongo()
+
+    def _index(self, name, pk, ref_pks):
+        index = self._referrers[name]
+        for ref in self._referenced[name].get(pk, ()):
+            index.get(ref, set()).discard(pk)
+        ref_pks = {str(r) for r in ref_pks}
+        self._referenced[name][pk] = ref_pks
+        for ref in ref_pks:
+            index.setdefault(ref, set()).add(pk)
+
+    @staticmethod
+    def _ref_pks(doc):
+        return [a["_ref"].id for a in doc.get("associations", []) if a and "_ref" in a]
+
+    @staticmethod
+    def _model_name(model):
+        return model if isinstance(model, str) else model.__name__
+
+
+def _store():
+    if WORLD_REGISTRY_TTL > 0:
+        return _shared_registries
+    if has_app_context():
+        if "world_registries" not in g:
+            g.world_registries = {}
+        return g.world_registries
+    return getattr(_local, "registries", None)
+
+
+def _scoped_registries(world):
+    if not world or not world.pk:
+        return []
+    key = str(world.pk)
+    stores = [_shared_registries, getattr(_local, "registries", None)]
+    if has_app_context():
+        stores.append(g.get("world_registries"))
+    return [registry for store in stores if store and (registry := store.get(key))]
+
+
+def get_registry(world):
+    """
+    Returns the registry for `world` in the current scope. Outside of a request or a
+    `registry_scope` (and with sharing disabled) a fresh, uncached registry is returned.
+    """
+    store = _store()
+    if store is None or not world.pk:
+        return WorldRegistry(world)
+    key = str(world.pk)
+    registry = store.get(key)
+    if registry is None or registry.expired:
+        registry = store[key] = WorldRegistry(world)
+    return registry
+
+
+def invalidate(world, model=None):
+    """
+    Discards cached objects of `model` (or everything) for `world` in the shared store
+    and the current scope. Called from the save and delete hooks of world objects.
+    """
+    for registry in _scoped_registries(world):
+        registry.discard(model)
+
+
+def reindex(referrer):
+    """
+    Updates the association index entries of `referrer` (a Story, Event, Encounter,
+    Episode, ...) in every registry holding its world. Called after it is saved.
+    """
+    for registry in _scoped_registries(referrer.world):
+        registry.reindex(referrer)
+
+
+def unindex(referrer):
+    for registry in _scoped_registries(referrer.world):
+        registry.unindex(referrer)
+
+
+@contextmanager
+def registry_scope():
+    """
+    Caches registries and loaded documents (see identity_map) for the duration of the
+    block when no request is active, such as inside a task worker.
+    """
+    previous = getattr(_local, "registries", None)
+    _local.registries = {} if previous is None else previous
+    try:
+        with identity_map.scope():
+            yield _local.registries
+    finally:
+        if previous is None:
+            _local.registries = None
@@ -0,0 +1,241 @@
+import os
+import re
+import unicodedata
+
+from autonomous.db.connection import get_db
+from autonomous.model.automodel import AutoModel
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+
+from autonomous import log
+
+COLLECTION = "name_search_index"
+SEARCH_LIMIT = int(os.environ.get("SEARCH_LIMIT", 20))
+# names sharing fewer trigrams than this with the query are not fuzzy matches
+FUZZY_THRESHOLD = 0.3
+
+# ranks, best first
+EXACT = 0
+PREFIX = 1
+WORD_PREFIX = 2
+INFIX = 3
+FUZZY = 4
+
+_indexed = False
+
+
+def _collection():
+    global _indexed
+    collection = get_db()[COLLECTION]
+    if not _indexed:
+        collection.create_index([("world", 1), ("trigrams", 1)])
+        collection.create_index([("world", 1), ("key", 1)])
+        _indexed = True
+    return collection
+
+
+def normalize(text):
+    """
+    Returns `text` lowercased, without accents and with single spaces.
+    """
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", text.casefold()).split())
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of each word of normalized `text`, padded so that word
+    starts weigh more than word ends.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def rank(key, query):
+    """
+    Returns (rank, similarity) of the normalized name `key` for the normalized
+    `query`, or None if it does not match.
+    """
+    if key == query:
+        return EXACT, 1.0
+    score = similarity(trigrams(key), trigrams(query))
+    if key.startswith(query):
+        return PREFIX, score
+    if any(word.startswith(query) for word in key.split()):
+        return WORD_PREFIX, score
+    if query in key:
+        return INFIX, score
+    if score >= FUZZY_THRESHOLD:
+        return FUZZY, score
+    return None
+
+
+def _built_id(world):
+    return f"built:{world.pk}"
+
+
+def entry(obj):
+    key = normalize(obj.name)
+    return {
+        "_id": str(obj.pk),
+        "world": str(obj.world.pk),
+        "model": obj.model_name(),
+        "name": obj.name,
+        "key": key,
+        "trigrams": sorted(trigrams(key)),
+    }
+
+
+def update(obj):
+    """
+    Stores the current name of `obj`. Called from its save hook.
+    """
+    if not (obj.pk and obj.world and obj.world.pk):
+        return
+    try:
+        if obj.name:
+            _collection().replace_one({"_id": str(obj.pk)}, entry(obj), upsert=True)
+        else:
+            _collection().delete_one({"_id": str(obj.pk)})
+    except PyMongoError as e:
+        log(f"Unable to index {obj.model_name()} {obj.pk}: {e}", _print=True)
+
+
+def remove(obj):
+    try:
+        _collection().delete_one({"_id": str(obj.pk)})
+    except PyMongoError as e:
+        log(f"Unable to remove {obj.pk} from the search index: {e}", _print=True)
+
+
+def discard(world):
+    """
+    Drops the index of `world`; it is rebuilt on the next search.
+    """
+    return _collection().delete_many({"world": str(world.pk)}).deleted_count
+
+
+def rebuild(world):
+    """
+    Indexes every object of `world`. Entries are upserted and only names that no
+    longer exist are deleted, so concurrent rebuilds of the same world are safe.
+    """
+    collection = _collection()
+    entries = []
+    for Model in world.all_models():
+        for doc in Model.objects(world=world).only("name").as_pymongo():
+            if name := doc.get("name"):
+                key = normalize(name)
+                entries.append(
+                    {
+                        "_id": str(doc["_id"]),
+                        "world": str(world.pk),
+                        "model": Model.__name__,
+                        "name": name,
+                        "key": key,
+                        "trigrams": sorted(trigrams(key)),
+                    }
+                )
+    if entries:
+        collection.bulk_write(
+            [ReplaceOne({"_id": e["_id"]}, e, upsert=True) for e in entries],
+            ordered=False,
+        )
+    collection.delete_many(
+        {
+            "world": str(world.pk),
+            "_id": {"$nin": [e["_id"] for e in entries] + [_built_id(world)]},
+        }
+    )
+    collection.replace_one(
+        {"_id": _built_id(world)},
+        {"world": str(world.pk), "built": True},
+        upsert=True,
+    )
+    log(f"Indexed {len(entries)} names for {world.name}", _print=True)
+    return len(entries)
+
+
+def ensure(worlds):
+    """
+    Builds the index of any of `worlds` that has not been indexed yet.
+    """
+    built = {
+        doc["_id"]
+        for doc in _collection().find(
+            {"_id": {"$in": [_built_id(w) for w in worlds]}}, {"_id": 1}
+        )
+    }
+    for world in worlds:
+        if _built_id(world) not in built:
+            rebuild(world)
+
+
+def lookup(worlds, query, models=None, limit=None):
+    """
+    Returns the index entries of `worlds` whose name matches `query`, best first.
+    Matches are ranked exact, prefix, word prefix, infix, then fuzzy (by shared
+    trigrams), and by similarity and name length within a rank.
+
+    Args:
+        worlds (list): The worlds to search.
+        query (str): Text typed by the user.
+        models (list): Names of the model types to return, default all.
+        limit (int): Maximum number of entries, default SEARCH_LIMIT.
+    """
+    limit = limit or SEARCH_LIMIT
+    worlds = [w for w in worlds if w and w.pk]
+    if not (query := normalize(query)) or not worlds:
+        return []
+    grams = sorted(trigrams(query))
+    match = {
+        "world": {"$in": [str(w.pk) for w in worlds]},
+        "$or": [{"key": {"$regex": re.escape(query)}}, {"trigrams": {"$in": grams}}],
+    }
+    if models:
+        match["model"] = {"$in": list(models)}
+    ranked = []
+    try:
+        ensure(worlds)
+        for candidate in _collection().find(match, {"model": 1, "name": 1, "key": 1}):
+            if score := rank(candidate["key"], query):
+                ranked.append(
+                    ((score[0], -score[1], len(candidate["key"])), candidate)
+                )
+    except PyMongoError as e:
+        log(f"Name search failed: {e}", _print=True)
+        return []
+    ranked.sort(key=lambda r: (r[0], r[1]["key"]))
+    return [candidate for _, candidate in ranked[:limit]]
+
+
+def search(worlds, query, models=None, exclude=None, limit=None):
+    """
+    Returns the objects of `worlds` whose name matches `query`, best first, see
+    lookup. Matched objects are loaded with one query per model type.
+
+    Args:
+        exclude: An object to leave out, such as the one being edited.
+    """
+    limit = limit or SEARCH_LIMIT
+    exclude = str(exclude.pk) if exclude else None
+    # one extra in case the excluded object is among the best matches
+    entries = [
+        e for e in lookup(worlds, query, models, limit + 1) if e["_id"] != exclude
+    ][:limit]
+    pks = {}
+    for e in entries:
+        pks.setdefault(e["model"], []).append(e["_id"])
+    objects = {}
+    for model, model_pks in pks.items():
+        for obj in AutoModel.load_model(model).objects(pk__in=model_pks):
+            objects[str(obj.pk)] = obj
+    return [objects[e["_id"]] for e in entries if e["_id"] in objects]
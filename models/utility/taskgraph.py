@@ -0,0 +1,121 @@
+import hashlib
+import json
+
+from autonomous.tasks import AutoTasks
+from rq.job import Job
+
+from autonomous import log
+
+# a job that has not started yet can take over an identical request; deferred jobs
+# only while none of their dependencies has failed, see _job_in
+COALESCE_STATUSES = ("queued", "deferred", "scheduled")
+# a deferred job waiting on a job in any of these states will never run
+DEAD_STATUSES = ("failed", "stopped", "canceled")
+# a prerequisite in any of these states is waited on
+PENDING_STATUSES = ("started", *COALESCE_STATUSES)
+# how long the task -> job id entries are kept
+COALESCE_TTL = 2 * 3600
+JOB_TIMEOUT = 3600
+
+# task -> tasks for the same object that must finish first if they are pending
+DEPENDENCIES = {
+    "_generate_image_task": ["_generate_task"],
+    "_generate_summaries_task": ["_generate_task"],
+    "_generate_history_task": ["_generate_task", "_generate_summaries_task"],
+    "_generate_dungeon_map_task": ["_generate_dungeon_rooms_task"],
+}
+
+
+def _connection():
+    AutoTasks()
+    return AutoTasks._connection
+
+
+def task_key(func_name, **kwargs):
+    """
+    Returns the key of a request: the task and a stable hash of all its arguments, so
+    only requests for exactly the same work share a key.
+    """
+    payload = json.dumps(kwargs, sort_keys=True, default=str)
+    return f"taskgraph:{func_name}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def object_key(func_name, **kwargs):
+    """
+    Returns the key of the latest job of the task for an object, used to find the
+    prerequisites in DEPENDENCIES.
+    """
+    return f"taskgraph:{func_name}:{kwargs.get('model', '')}:{kwargs.get('pk', '')}"
+
+
+def _job_in(connection, key, statuses):
+    if not (job_id := connection.get(key)):
+        return None
+    job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+    try:
+        job = Job.fetch(job_id, connection=connection)
+        if (status := job.get_status()) == "deferred":
+            dependencies = Job.fetch_many(job.dependency_ids, connection=connection)
+            if any(not d or d.get_status() in DEAD_STATUSES for d in dependencies):
+                return None
+    except Exception:
+        return None
+    return job_id if status in statuses else None
+
+
+def queued_job(func_name, **kwargs):
+    """
+    Returns the id of a job for the same task and arguments that has not started yet.
+    """
+    return _job_in(_connection(), task_key(func_name, **kwargs), COALESCE_STATUSES)
+
+
+def pending_job(func_name, **kwargs):
+    """
+    Returns the id of the latest unfinished job of the task for the object, if any.
+    """
+    if not kwargs.get("pk"):
+        return None
+    return _job_in(_connection(), object_key(func_name, **kwargs), PENDING_STATUSES)
+
+
+def enqueue(func, job_id=None, depends_on=None, **kwargs):
+    """
+    Enqueues `func` as an RQ job, or returns the id of a job with the same task and
+    arguments that has not started yet. A started job may already have read its
+    inputs, so it never takes over a new request. Jobs wait on the given `depends_on`
+    job ids and on any pending prerequisites declared in DEPENDENCIES.
+
+    Returns:
+        str: The id of the job that will do the work.
+    """
+    connection = _connection()
+    key = task_key(func.__name__, **kwargs)
+    with connection.lock(f"{key}:lock", timeout=30, blocking_timeout=30):
+        if queued := queued_job(func.__name__, **kwargs):
+            log(f"Coalesced {key} into queued job {queued}", _print=True)
+            return queued
+        depends_on = [
+            d
+            for d in depends_on or []
+            if Job.exists(d, connection=connection)
+        ]
+        for prerequisite in DEPENDENCIES.get(func.__name__, []):
+            if (pending := pending_job(prerequisite, **kwargs)) and (
+                pending not in depends_on
+            ):
+                depends_on.append(pending)
+        job = AutoTasks.queue.enqueue(
+            func,
+            job_id=job_id,
+            depends_on=depends_on or None,
+            job_timeout=JOB_TIMEOUT,
+            kwargs=kwargs,
+        )
+        connection.set(key, job.id, ex=COALESCE_TTL)
+        if kwargs.get("pk"):
+            connection.set(
+                object_key(func.__name__, **kwargs), job.id, ex=COALESCE_TTL
+            )
+    AutoTasks().create_worker(func)
+    return job.id
@@ -1,19 +1,107 @@
 import os
+import uuid
 
 import requests
 from autonomous.ai.textagent import TextAgent
+from requests.adapters import HTTPAdapter
+
+from autonomous import log
+from models.utility import agents
+
+TASKS_CLIENT_WORKERS = int(os.environ.get("TASKS_CLIENT_WORKERS", 4))
+
+# one pooled session for all calls to the tasks service, so each task does not
+# open a new TCP connection
+_session = requests.Session()
+_session.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=TASKS_CLIENT_WORKERS, pool_maxsize=TASKS_CLIENT_WORKERS
+    ),
+)
+
+
+def _task_url(endpoint):
+    return f"http://{os.environ.get('TASKS_SERVICE_NAME')}:{os.environ.get('COMM_PORT')}/{endpoint.lstrip('/')}"
 
 
 def start_task(endpoint, **kwargs):
-    return requests.post(
-        f"http://{os.environ.get('TASKS_SERVICE_NAME')}:{os.environ.get('COMM_PORT')}/{endpoint}",
-        json=kwargs,
-    ).text
+    return _session.post(_task_url(endpoint), json=kwargs).text
+
+
+def _post_batch(jobs):
+    try:
+        response = _session.post(_task_url("tasks/batch"), json={"jobs": jobs})
+        response.raise_for_status()
+    except requests.RequestException as e:
+        log(f"Failed to submit tasks {[j['endpoint'] for j in jobs]}: {e}", _print=True)
+        return False
+    return True
+
+
+class TaskBatch:
+    """
+    Collects task requests for the tasks service and submits them together in a single
+    POST. Job ids are assigned when a task is added, so they are available
+    immediately and later tasks in the batch can depend on earlier ones.
+    """
+
+    def __init__(self):
+        self.jobs = []
+
+    def add(self, endpoint, depends_on=None, **kwargs):
+        """
+        Adds a task to the batch.
+
+        Args:
+            endpoint (str): The tasks service endpoint, e.g. "/generate/history/character/<pk>".
+            depends_on (str | list): Job id(s) that must finish before this task runs.
+            **kwargs: JSON data sent to the endpoint.
+
+        Returns:
+            str: The job id of the task.
+        """
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        job_id = uuid.uuid4().hex
+        self.jobs.append(
+            {
+                "id": job_id,
+                "endpoint": endpoint.lstrip("/"),
+                "depends_on": depends_on or [],
+                "data": kwargs,
+            }
+        )
+        return job_id
+
+    def submit(self):
+        """
+        Sends the batch and waits for the tasks service to enqueue it. This is called
+        from inside RQ jobs, whose work horse exits as soon as the job returns, so the
+        request must not be left to a background thread.
+
+        Returns:
+            list: The job ids of the submitted tasks, in the order they were added, or
+                an empty list if the batch could not be submitted.
+        """
+        jobs, self.jobs = self.jobs, []
+        if not jobs or not _post_batch(jobs):
+            return []
+        return [job["id"] for job in jobs]
+
+
+def submit_task(endpoint, depends_on=None, **kwargs):
+    """
+    Submits a single task and returns its job id, or None if it was not submitted.
+    """
+    batch = TaskBatch()
+    job_id = batch.add(endpoint, depends_on=depends_on, **kwargs)
+    return job_id if batch.submit() else None
 
 
 def generate_text(messages, primer=""):
-    return TextAgent().generate(messages, additional_instructions=primer)
+    return agents.get(TextAgent).generate(messages, additional_instructions=primer)
 
 
 def summarize_text(messages, primer=""):
-    return TextAgent().summarize_text(messages, primer)
+    return agents.get(TextAgent).summarize_text(messages, primer)
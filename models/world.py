@@ -5,8 +5,9 @@ import traceback
 
 import requests
 import validators
-from autonomous.db import ValidationError
+from autonomous.db import Q, ValidationError
 from autonomous.model.autoattr import (
+    BoolAttr,
     ListAttr,
     ReferenceAttr,
     StringAttr,
@@ -43,9 +44,22 @@ from models.ttrpgobject.location import Location
 from models.ttrpgobject.region import Region
 from models.ttrpgobject.shop import Shop
 from models.ttrpgobject.vehicle import Vehicle
+from models.utility import llm_cache
+from models.utility import membership
+from models.utility import registry as world_registry
+from models.utility import search_index
+
+# events per page of the world timeline
+TIMELINE_PAGE_SIZE = int(os.environ.get("TIMELINE_PAGE_SIZE", 25))
 
 
 class World(TTRPGBase):
+    meta = {
+        "allow_inheritance": True,
+        "strict": False,
+        # membership lookups, see models/utility/membership.py
+        "indexes": ["users"],
+    }
     system = ReferenceAttr(choices=["BaseSystem"])
     users = ListAttr(ReferenceAttr(choices=["User"]))
     calendar = ReferenceAttr(choices=["Calendar"])
@@ -58,6 +72,8 @@ class World(TTRPGBase):
     map_style = StringAttr(default="isometric")
     campaigns = ListAttr(ReferenceAttr(choices=["Campaign"]))
     stories = ListAttr(ReferenceAttr(choices=["Story"]))
+    # reuse stored responses for repeated generation requests (see llm_cache)
+    cache_generations = BoolAttr(default=True)
 
     TONES = {
         "Grimdark": "Dystopian, amoral, and violent, where hope is rare and the setting is generally brutal and bleak.",
@@ -210,15 +226,11 @@ class World(TTRPGBase):
 
     @property
     def abilities(self):
-        return sorted(
-            Ability.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Ability)
 
     @property
     def characters(self):
-        return sorted(
-            Character.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Character)
 
     @property
     def children(self):
@@ -226,41 +238,27 @@ class World(TTRPGBase):
 
     @property
     def cities(self):
-        return sorted(City.search(world=self) if self.pk else [], key=lambda x: x.name)
+        return self.registry.objects(City)
 
     @property
     def creatures(self):
-        return sorted(
-            Creature.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Creature)
 
     @property
     def districts(self):
-        return sorted(
-            District.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(District)
 
     @property
     def encounters(self):
-        return sorted(
-            Encounter.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Encounter)
 
     @property
     def events(self):
-        return sorted(
-            [e for e in Event.search(world=self) if e.end_date and e.end_date.year]
-            if self.pk
-            else [],
-            key=lambda x: x.end_date,
-            reverse=True,
-        )
+        return self.timeline()
 
     @property
     def factions(self):
-        return sorted(
-            Faction.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Faction)
 
     @property
     def genre(self):
@@ -268,7 +266,7 @@ class World(TTRPGBase):
 
     @property
     def items(self):
-        return sorted(Item.search(world=self) if self.pk else [], key=lambda x: x.name)
+        return self.registry.objects(Item)
 
     @property
     def image_prompt(self):
@@ -284,15 +282,13 @@ class World(TTRPGBase):
 
     @property
     def locations(self):
-        return sorted(
-            Location.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Location)
 
     @property
     def lore(self):
         from models.stories.lore import Lore
 
-        return sorted(Lore.search(world=self) if self.pk else [], key=lambda x: x.name)
+        return self.registry.objects(Lore)
 
     @property
     def map_thumbnail(self):
@@ -304,14 +300,11 @@ class World(TTRPGBase):
 
     @property
     def players(self):
-        return Character.search(world=self, is_player=True) if self.pk else []
+        return [c for c in self.characters if c.is_player]
 
     @property
     def parties(self):
-        ps = []
-        for f in Faction.search(world=self, is_player_faction=True):
-            ps += [f]
-        return ps
+        return [f for f in self.factions if f.is_player_faction]
 
     @property
     def end_date(self):
@@ -321,15 +314,17 @@ class World(TTRPGBase):
     def end_date(self, date):
         self.current_date = date
 
+    @property
+    def registry(self):
+        return world_registry.get_registry(self)
+
     @property
     def regions(self):
-        return sorted(
-            Region.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Region)
 
     @property
     def shops(self):
-        return sorted(Shop.search(world=self) if self.pk else [], key=lambda x: x.name)
+        return self.registry.objects(Shop)
 
     @property
     def tone_description(self):
@@ -343,9 +338,7 @@ class World(TTRPGBase):
 
     @property
     def vehicles(self):
-        return sorted(
-            Vehicle.search(world=self) if self.pk else [], key=lambda x: x.name
-        )
+        return self.registry.objects(Vehicle)
 
     @property
     def world(self):
@@ -373,15 +366,21 @@ class World(TTRPGBase):
         for obj in objs:
             if obj:
                 obj.delete()
+        self.clear_generation_cache()
+        search_index.discard(self)
+        membership.invalidate()
         return super().delete()
 
+    def clear_generation_cache(self):
+        return llm_cache.invalidate(self.pk)
+
     ###################### Boolean Methods ########################
 
     def is_associated(self, obj):
         return self == obj.world
 
     def is_user(self, user):
-        return user in self.users
+        return membership.is_member(user, self)
 
     ###################### Getter Methods ########################
     def get_world(self):
@@ -400,12 +399,62 @@ class World(TTRPGBase):
         obj.save()
         return self.associations
 
+    def add_associations(self, objs):
+        for obj in objs:
+            if obj and obj.world != self:
+                self.add_association(obj)
+        return self.associations
+
+    def timeline(self, start=None, end=None, after=None, limit=None):
+        """
+        Returns the events of the world whose end date is known, latest first, with an
+        indexed range query on their end ordinal.
+
+        Args:
+            start (Date or int): Leave out events that ended before this date or
+                ordinal.
+            end (Date or int): Leave out events that ended after this date or ordinal.
+            after (Event): The last event of the previous page.
+            limit (int): Maximum number of events, default all.
+        """
+        if not self.pk:
+            return []
+        if self.calendar:
+            self.calendar.ensure_ordinals()
+        query = {"end_ordinal__ne": None}
+        if start is not None:
+            query["end_ordinal__gte"] = (
+                start if isinstance(start, int) else start.to_ordinal()
+            )
+        if end is not None:
+            query["end_ordinal__lte"] = (
+                end if isinstance(end, int) else end.to_ordinal()
+            )
+        events = Event.objects(world=self, **query)
+        if after and after.end_ordinal is not None:
+            events = events.filter(
+                Q(end_ordinal__lt=after.end_ordinal)
+                | Q(end_ordinal=after.end_ordinal, id__gt=after.pk)
+            )
+        events = events.order_by("-end_ordinal", "id")
+        return list(events.limit(limit) if limit else events)
+
+    def timeline_page(self, after=None):
+        """
+        Returns one page of the timeline after the event `after`, and whether there
+        are older events.
+        """
+        events = self.timeline(after=after, limit=TIMELINE_PAGE_SIZE + 1)
+        return events[:TIMELINE_PAGE_SIZE], len(events) > TIMELINE_PAGE_SIZE
+
     def set_current_date(self):
-        event_dates = (
-            [e.end_date for e in self.events if e.end_date and e.end_date.year > 0]
-            if self.events
+        # the latest event from year 1 on
+        latest = (
+            self.timeline(start=self.calendar.ordinal(1, 0, 1), limit=1)
+            if self.calendar
             else []
         )
+        event_dates = [e.end_date for e in latest if e.end_date]
 
         episode_dates = (
             [
@@ -465,14 +514,7 @@ The map should be in a {self.world.map_style} style.
         return self.map
 
     def get_map_list(self):
-        maps = []
-        for img in Map.all():
-            # log(img.asset_id)
-            if all(
-                t in img.tags for t in ["map", self.model_name().lower(), self.genre]
-            ):
-                maps.append(img)
-        return maps
+        return Map.search_tags(all_tags=["map", self.model_name().lower(), self.genre])
 
     def page_data(self):
         response = {
@@ -529,6 +571,7 @@ The map should be in a {self.world.map_style} style.
     def auto_post_save(cls, sender, document, **kwargs):
         super().auto_post_save(sender, document, **kwargs)
         document.post_save_system()
+        membership.invalidate()
 
     # def clean(self):
     #     super().clean()
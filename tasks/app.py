@@ -3,7 +3,8 @@ import os
 from autonomous.model.automodel import AutoModel
 from autonomous.tasks import AutoTasks
 from config import Config
-from flask import Flask, get_template_attribute, request
+from flask import Flask, g, get_template_attribute, request
+from werkzeug.exceptions import HTTPException
 
 import tasks
 from autonomous import log
@@ -12,6 +13,7 @@ from filters.utils import bonus, get_icon, roll_dice
 from models.campaign.episode import Episode
 from models.ttrpgobject.faction import Faction
 from models.user import User
+from models.utility import taskgraph
 from models.world import World
 
 models = {
@@ -56,22 +58,54 @@ def create_app():
             elif task.status == "failed":
                 return f"<p>Generation Error for task#: {task.id} </p> </p>{task.result.get('error', '')}</p>"
             else:
+                snippet = ""
+                if progress := task.job.meta.get("progress"):
+                    snippet = f"<p>{progress['done']}/{progress['total']} {progress['message']}</p>"
                 return get_template_attribute("shared/_tasks.html", "checktask")(
-                    task.id
+                    task.id, snippet
                 )
         else:
             return "No task found"
 
     def _generate_task(func, **kwargs):
-        task = (
-            AutoTasks()
-            .task(
-                func,
-                **kwargs,
-            )
-            .result
-        )
-        return get_template_attribute("shared/_tasks.html", "checktask")(task["id"])
+        options = g.get("task_options") or {}
+        job_id = taskgraph.enqueue(func, **options, **kwargs)
+        if options:
+            # dispatched from /tasks/batch, the client only needs the job id
+            return job_id
+        return get_template_attribute("shared/_tasks.html", "checktask")(job_id)
+
+    @app.route("/tasks/batch", methods=("POST",))
+    def batch_tasks():
+        """
+        Enqueues a batch of task requests sent by models.utility.tasks.TaskBatch. Each
+        job is dispatched to the route matching its endpoint, using the job id and
+        dependencies assigned by the client.
+        """
+        adapter = app.url_map.bind("localhost")
+        # client job id -> id of the job doing the work, which differs when coalesced
+        job_ids = {}
+        for job in request.json.get("jobs", []):
+            endpoint = f"/{job['endpoint']}"
+            try:
+                view, view_args = adapter.match(endpoint, method="POST")
+            except HTTPException as e:
+                log(f"No task endpoint for {endpoint}: {e}", _print=True)
+                continue
+            with app.test_request_context(
+                endpoint, method="POST", json=job.get("data") or {}
+            ):
+                g.task_options = {
+                    "job_id": job["id"],
+                    "depends_on": [
+                        job_ids.get(d, d) for d in job.get("depends_on") or []
+                    ],
+                }
+                try:
+                    job_ids[job["id"]] = app.view_functions[view](**view_args)
+                finally:
+                    g.pop("task_options", None)
+        return {"jobs": job_ids}
 
     ###############################################################################
     # World Object Generation Endpoints
@@ -122,6 +156,7 @@ def create_app():
             tasks._generate_history_task,
             model=model,
             pk=pk,
+            rebuild=bool((request.get_json(silent=True) or {}).get("rebuild")),
         )
 
     @app.route("/generate/summaries/<string:model>/<string:pk>", methods=("POST",))
@@ -260,10 +295,16 @@ def create_app():
 
     @app.route("/generate/dungeon/<string:pk>/rooms", methods=("POST",))
     def create_dungeon_rooms(pk):
-        return _generate_task(
+        response = _generate_task(
             tasks._generate_dungeon_rooms_task,
             pk=pk,
         )
+        # the map is drawn from the finished rooms, so it waits on the rooms job
+        _generate_task(
+            tasks._generate_dungeon_map_task,
+            pk=pk,
+        )
+        return response
 
     @app.route("/generate/dungeon/room/<string:pk>", methods=("POST",))
     def create_dungeon_room(pk):
@@ -1,3 +1,4 @@
+import functools
 import json
 import re
 from datetime import datetime
@@ -6,6 +7,7 @@ import markdown
 from autonomous.model.automodel import AutoModel
 from autonomous.tasks import AutoTasks
 from dmtoolkit import dmtools
+from rq import get_current_job
 
 from autonomous import log
 from models.audio.audio import Audio
@@ -29,6 +31,8 @@ from models.ttrpgobject.location import Location
 from models.ttrpgobject.region import Region
 from models.ttrpgobject.vehicle import Vehicle
 from models.user import User
+from models.utility import identity_map
+from models.utility import registry as world_registry
 from models.world import World
 
 
@@ -78,6 +82,7 @@ def _generate_character_from_dndbeyond_task(pk):
             obj.save()
 
         if results.get("inventory"):
+            items = []
             for item in results.get("inventory"):
                 # remove any +%d from item names
                 name = re.sub(r"\+\d+", "", item["name"]).strip(", ")
@@ -99,8 +104,8 @@ def _generate_character_from_dndbeyond_task(pk):
                     itemobj.save()
                 if not itemobj.image:
                     itemobj.generate_image()
-                obj.add_association(itemobj)
-                obj.save()
+                items.append(itemobj)
+            obj.add_associations(items)
 
         if features := results.get("features") | results.get("spells"):
             for name, feature in features.items():
@@ -135,9 +140,9 @@ def _generate_map_task(model, pk):
     return {"url": f"/{obj.path}/map"}
 
 
-def _generate_history_task(model, pk):
+def _generate_history_task(model, pk, rebuild=False):
     if obj := World.get_model(model, pk):
-        obj.generate_history()
+        obj.generate_history(rebuild=rebuild)
     return {"url": f"/{obj.path}/history"}
 
 
@@ -184,7 +189,7 @@ def _generate_session_report_task(pk):
 
 def _generate_episode_transcription_task(pk):
     if obj := Episode.get(pk):
-        obj.transcribe()
+        obj.transcribe(progress=_report_progress)
     return {"url": f"/{obj.path}/transcribe"}
 
 
@@ -214,13 +219,25 @@ def _generate_table_items_task(pk, worldpk, prompt):
 
 def _generate_dungeon_map_task(pk):
     obj = Dungeon.get(pk)
-    obj.generate_map()
+    if obj.rooms:
+        obj.generate_map()
     return {"url": f"/{obj.location.path}/dungeon"}
 
 
+def _report_progress(done, total, message=""):
+    # stored on the job so /checktask can show it while the job runs
+    if job := get_current_job():
+        job.meta["progress"] = {"done": done, "total": total, "message": message}
+        job.save_meta()
+
+
 def _generate_dungeon_rooms_task(pk):
     obj = Dungeon.get(pk)
-    obj.generate_rooms()
+    obj.generate_rooms(
+        progress=lambda done, total, room: _report_progress(
+            done, total, f"Generated {room.name}" if room else "Room failed"
+        )
+    )
     return {"url": f"/{obj.location.path}/dungeon"}
 
 
@@ -316,3 +333,20 @@ def _generate_lore_response_audio_task(pk):
     lr = LoreResponse.get(pk)
     lr.generate_audio()
     return {"url": f"/lore/{lr.lore.pk}"}
+
+
+def _scoped_task(func):
+    # registries and loaded documents are shared within a job, never between jobs
+    @functools.wraps(func)
+    def task(*args, **kwargs):
+        with world_registry.registry_scope():
+            result = func(*args, **kwargs)
+            log(f"{func.__name__} documents: {identity_map.stats()}", _print=True)
+        return result
+
+    return task
+
+
+for _name, _func in list(globals().items()):
+    if _name.endswith("_task") and _name != "_scoped_task" and callable(_func):
+        globals()[_name] = _scoped_task(_func)
@@ -0,0 +1,126 @@
+"""
+Times the generation paths end to end against the offline stub AI backend, so the
+numbers measure our own overhead rather than provider latency. Run with
+
+    AI_BACKEND=stub STUB_LATENCY=0.05 pytest -s -m benchmark tests/benchmarks
+
+STUB_LATENCY adds a fixed delay to each AI call and BENCHMARK_ITERATIONS sets how
+many times each path runs.
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from models.calendar.calendar import Calendar
+from models.dungeon.dungeon import Dungeon
+from models.stories.lore import Lore
+from models.ttrpgobject.character import Character
+from models.ttrpgobject.location import Location
+from models.user import User
+from models.utility import agents
+from models.world import World
+
+BENCHMARK_ITERATIONS = int(os.environ.get("BENCHMARK_ITERATIONS", 5))
+
+pytestmark = pytest.mark.benchmark
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def measure(name, func, iterations=None):
+    """
+    Calls `func(i)` `iterations` times and prints throughput and p50/p95 latency.
+    """
+    iterations = iterations or BENCHMARK_ITERATIONS
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    result = {
+        "name": name,
+        "iterations": iterations,
+        "throughput": iterations / elapsed,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+    }
+    print(
+        f"\n{name}: {result['throughput']:.2f}/s p50 {result['p50'] * 1000:.1f}ms "
+        f"p95 {result['p95'] * 1000:.1f}ms ({iterations} runs, "
+        f"{agents.STUB_LATENCY * 1000:.0f}ms stub latency)"
+    )
+    return result
+
+
+@pytest.fixture
+def world(mock_db):
+    # requests.post calls the tasks service, which is not part of the benchmark
+    with (
+        patch.object(agents, "AI_BACKEND", "stub"),
+        patch("requests.post"),
+        patch("requests.Session.post"),
+    ):
+        user = User(name="Benchmark", email="benchmark@example.com")
+        user.save()
+        world = World.build("fantasy", user, name="Benchmark World")
+        calendar = Calendar(
+            world=world,
+            months=[f"Month {i}" for i in range(12)],
+            days=[f"Day {i}" for i in range(7)],
+        )
+        calendar.save()
+        world.calendar = calendar
+        world.save()
+        yield world
+
+
+class TestGenerationBenchmarks:
+    def test_ttrpgbase_generate(self, world):
+        def generate(i):
+            character = Character(world=world)
+            character.save()
+            character.generate()
+            assert character.name
+
+        measure("TTRPGBase.generate", generate)
+
+    def test_dungeon_generate_rooms(self, world):
+        def generate_rooms(i):
+            location = Location(world=world, name=f"Location {i}")
+            location.save()
+            dungeon = Dungeon(location=location)
+            dungeon.save()
+            location.dungeon = dungeon
+            location.save()
+            for _ in range(5):
+                dungeon.create_room()
+            assert all(room.name for room in dungeon.generate_rooms())
+
+        measure("Dungeon.generate_rooms", generate_rooms)
+
+    def test_lore_generate(self, world):
+        party = [c for c in world.characters if c.is_player]
+
+        def generate(i):
+            lore = Lore(world=world, name=f"Lore {i}")
+            lore.save()
+            lore.party = party
+            lore.save()
+            lore.generate()
+            assert lore.scenes
+
+        measure("Lore.generate", generate)
+
+    def test_world_page_data(self, world):
+        for i in range(10):
+            Character(world=world, name=f"Character {i}").save()
+
+        measure("World.page_data", lambda i: world.page_data())
@@ -0,0 +1,48 @@
+import random
+from unittest.mock import patch
+
+from autonomous.ai.imageagent import ImageAgent
+from autonomous.ai.jsonagent import JSONAgent
+
+from models.ttrpgobject.character import Character
+from models.utility import agents
+
+
+class TestStubAgents:
+    def test_get_returns_stub_only_when_offline(self):
+        with patch.object(agents, "AI_BACKEND", "stub"):
+            assert isinstance(agents.get(ImageAgent), agents.StubImageAgent)
+        with patch.object(agents, "AI_BACKEND", ""):
+            assert isinstance(agents.get(ImageAgent), ImageAgent)
+
+    def test_json_matches_funcobj_schema(self):
+        with patch.object(agents, "AI_BACKEND", "stub"):
+            result = agents.get(JSONAgent).generate("prompt", Character._funcobj)
+
+        assert set(result) == set(Character._funcobj["parameters"]["properties"])
+        assert isinstance(result["occupation"], str)
+        assert all(isinstance(item, str) for item in result["wealth"])
+
+    def test_fake_value_types(self):
+        schema = {
+            "type": "object",
+            "properties": {
+                "kind": {"type": "string", "enum": ["a", "b"]},
+                "level": {"type": "integer", "minimum": 30},
+                "hostile": {"type": "boolean"},
+                "rooms": {"type": "array", "items": {"type": "number"}, "maxItems": 2},
+            },
+        }
+
+        value = agents.fake_value(schema, random.Random(1))
+
+        assert value["kind"] in ["a", "b"]
+        assert value["level"] >= 30
+        assert isinstance(value["hostile"], bool)
+        assert len(value["rooms"]) == 2
+
+    def test_responses_are_deterministic(self):
+        text = agents.StubTextAgent()
+
+        assert text.generate("prompt") == text.generate("prompt")
+        assert text.generate("prompt") != text.generate("other prompt")
@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock
+
+from models.utility.autolinker import AutoLinker, get_linker
+
+
+def _assoc(pk, name, path):
+    a = MagicMock()
+    a.pk = pk
+    a.name = name
+    a.path = path
+    return a
+
+
+def _link(a):
+    return f"<a href='/{a.path}' class='text-underline' style='font-weight:bold;'>{a.name}</a>"
+
+
+class TestAutoLinker:
+    def test_links_case_insensitive_on_word_boundaries(self):
+        town = _assoc("1", "Town", "city/1")
+        linker = AutoLinker([town])
+
+        html = linker.link("<p>The town of Townsend is a TOWN.</p>")
+
+        assert html == f"<p>The {_link(town)} of Townsend is a {_link(town)}.</p>"
+
+    def test_longest_match_wins(self):
+        bob_smith = _assoc("1", "Bob Smith", "character/1")
+        bob = _assoc("2", "Bob", "character/2")
+        linker = AutoLinker([bob, bob_smith])
+
+        html = linker.link("<p>Bob Smith met Bob.</p>")
+
+        assert html == f"<p>{_link(bob_smith)} met {_link(bob)}.</p>"
+
+    def test_does_not_link_inside_tags(self):
+        strong = _assoc("1", "strong", "item/1")
+        linker = AutoLinker([strong])
+
+        assert linker.link("<strong>Hi</strong>") == "<strong>Hi</strong>"
+
+    def test_linker_cached_until_associations_change(self):
+        obj = MagicMock(spec=["associations"])
+        obj.associations = [_assoc("1", "Town", "city/1")]
+
+        first = get_linker(obj)
+        assert get_linker(obj) is first
+
+        obj.associations = [*obj.associations, _assoc("2", "Bob", "character/2")]
+        assert get_linker(obj) is not first
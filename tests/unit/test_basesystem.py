@@ -0,0 +1,50 @@
+from unittest.mock import MagicMock, patch
+
+from models.systems import basesystem
+from models.systems.basesystem import BaseSystem
+
+
+class TestSummaries:
+    def _system(self):
+        system = MagicMock()
+        system.MAX_TOKEN_LENGTH = 4
+        system.text_agent.summarize_text.side_effect = (
+            lambda text, primer="": f"[{text.split()[0]}]"
+        )
+        return system
+
+    def test_map_reduce_summarizes_chunks_then_combines(self):
+        system = self._system()
+        text = "Red fox ran far.\n\nBlue owl sat.\n\nGreen frog hopped away."
+
+        summary = BaseSystem._map_reduce_summarize(system, text, "primer")
+
+        calls = [c.args[0] for c in system.text_agent.summarize_text.call_args_list]
+        assert sorted(calls[:3]) == sorted(
+            ["Red fox ran far.", "Blue owl sat.", "Green frog hopped away."]
+        )
+        assert calls[3] == "[Red]\n\n[Blue]\n\n[Green]"
+        assert system.text_agent.summarize_text.call_args.kwargs["primer"] == "primer"
+        assert summary == "[[Red]]"
+
+    def test_map_reduce_short_text_is_one_call(self):
+        system = self._system()
+
+        assert BaseSystem._map_reduce_summarize(system, "Tiny text.", "p") == "[Tiny]"
+        system.text_agent.summarize_text.assert_called_once_with("Tiny text.", primer="p")
+
+
+class TestGenerationCache:
+    def test_only_summaries_are_cached(self):
+        system = MagicMock(instructions="", world=MagicMock(cache_generations=True))
+        system._cached.side_effect = lambda *args, **kwargs: BaseSystem._cached(
+            system, *args, **kwargs
+        )
+        with patch.object(basesystem.llm_cache, "cached") as cached:
+            BaseSystem.generate_text(system, "Describe a tavern.")
+            BaseSystem.generate_json(system, "Describe a tavern.", "", {})
+            BaseSystem.generate(system, MagicMock(), "Describe a tavern.", {})
+            BaseSystem.generate_summary(system, "A long history.")
+
+        assert [c.args[0] for c in cached.call_args_list] == ["summary"]
+        assert cached.call_args.kwargs["enabled"]
@@ -0,0 +1,88 @@
+import itertools
+from unittest.mock import MagicMock, patch
+
+from autonomous.model.automodel import AutoModel
+
+from models.calendar.calendar import Calendar
+from models.calendar.date import Date
+from models.utility import fragments
+
+
+def _calendar(months=12, days_per_year=365):
+    return Calendar(
+        months=[f"M{i}" for i in range(months)], days_per_year=days_per_year
+    )
+
+
+class TestOrdinal:
+    def test_orders_like_year_month_day(self):
+        calendar = _calendar()
+        dates = [
+            (year, month, day)
+            for year, month, day in itertools.product(
+                (-3, 0, 1, 250), range(12), (1, 2, 15, 30)
+            )
+        ]
+        ordinals = [calendar.ordinal(*d) for d in dates]
+
+        assert ordinals == sorted(ordinals)
+        assert len(set(ordinals)) == len(dates)
+        assert calendar.ordinal(0, 0, 1) == 0
+        assert calendar.ordinal(1, 0, 1) == 365
+
+    def test_out_of_range_days_and_months_count_as_the_last(self):
+        calendar = _calendar()
+
+        assert calendar.ordinal(5, 1, 45) == calendar.ordinal(5, 1, 30)
+        assert calendar.ordinal(5, 20, 1) == calendar.ordinal(5, 11, 1)
+        assert calendar.ordinal(5, 11, 30) < calendar.ordinal(6, 0, 1)
+
+    def test_short_years_do_not_overlap(self):
+        calendar = _calendar(months=12, days_per_year=10)
+
+        assert calendar.ordinal(1, 11, 1) < calendar.ordinal(2, 0, 1)
+
+    def test_layout_changes_with_months_and_year_length(self):
+        calendar = _calendar()
+        layout = calendar.layout
+        calendar.days_per_year = 400
+
+        assert calendar.layout != layout
+
+
+class TestDateOrdinal:
+    def test_is_computed_on_save(self):
+        calendar = _calendar()
+        date = Date(calendar=calendar, year=3, month=2, day=10)
+        date.pre_save_ordinal()
+
+        assert date.ordinal == 3 * 365 + 2 * 30 + 9
+
+    def test_moving_a_saved_date_updates_the_event_ending_on_it(self):
+        date = Date(calendar=_calendar(), year=3, month=2, day=10)
+        date.pre_save_ordinal()
+        world, city = MagicMock(), MagicMock()
+        event = MagicMock(world=world, associations=[city])
+        with (
+            patch.object(AutoModel, "load_model") as load_model,
+            patch.object(fragments, "touch") as touch,
+        ):
+            Event = load_model.return_value
+            Event.objects.return_value.__iter__.return_value = [event]
+            date.post_save_ordinal()
+
+        Event.objects.assert_called_once_with(end_date=date)
+        Event.objects.return_value.update.assert_called_once_with(
+            set__end_ordinal=date.ordinal
+        )
+        touch.assert_called_once_with(world, city)
+
+    def test_new_or_unmoved_dates_update_nothing(self):
+        date = Date(calendar=_calendar(), year=3, month=2, day=10)
+        date.pre_save_ordinal()
+        with patch.object(AutoModel, "load_model") as load_model:
+            date.post_save_ordinal(created=True)
+            date.pre_save_ordinal()
+            date.post_save_ordinal()
+
+        load_model.assert_not_called()
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from models.utility import context as prompt_context
+from models.utility.context import ContextBuilder
+
+
+class TestContextBuilder:
+    def test_fills_by_priority_and_renders_in_order(self):
+        builder = ContextBuilder(budget=30, max_entry_tokens=30)
+        builder.add("incidental", ["x" * 40, "y" * 40], prompt_context.INCIDENTAL)
+        builder.add("setting", "s" * 40, prompt_context.SETTING)
+        builder.add("geneology", "g" * 40, prompt_context.GENEOLOGY, header="G:")
+
+        sections = builder.render_sections()
+
+        assert list(sections) == ["setting", "geneology"]
+        assert builder.usage == {"setting": 10, "geneology": 11, "incidental": 0}
+
+    def test_truncates_first_entry_that_does_not_fit(self):
+        builder = ContextBuilder(budget=60, max_entry_tokens=100)
+        builder.add("history", "word " * 100, prompt_context.SETTING)
+        builder.add("events", "later", prompt_context.EVENTS)
+
+        text = builder.render()
+
+        assert text.endswith("word...")
+        assert "later" not in text
+        assert prompt_context.count_tokens(text) <= 60
+        assert builder.render() == text
+
+    def test_caps_each_entry(self):
+        builder = ContextBuilder(budget=100)
+        builder.add("long", "word " * 100, prompt_context.SETTING)
+        builder.add("short", "later", prompt_context.EVENTS)
+
+        text = builder.render()
+
+        assert builder.usage["long"] <= 25
+        assert text.endswith("later")
+
+    def test_brief_prefers_summaries(self):
+        obj = SimpleNamespace(
+            backstory="long backstory", backstory_summary="short", history=""
+        )
+
+        assert prompt_context.brief(obj) == "short"
+        assert prompt_context.brief(obj, "history") == ""
+        obj.backstory_summary = ""
+        assert prompt_context.brief(obj, "history", "backstory") == "long backstory"
+
+    def test_tail_keeps_last_paragraphs(self):
+        text = "First paragraph here.\nSecond one.\nThird one."
+
+        assert prompt_context.tail(text, 7) == "Second one.\n\nThird one."
+        assert prompt_context.tail("one two three four five six", 3) == "...five six"
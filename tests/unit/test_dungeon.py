@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from models.dungeon import dungeon as dungeon_module
+from models.dungeon.dungeon import Dungeon
+
+
+def _room(pk, is_entrance=False):
+    room = MagicMock(is_entrance=is_entrance, connected_rooms=[])
+    room.pk = room.name = pk
+    return room
+
+
+def _connect(a, b):
+    a.connected_rooms.append(b)
+    b.connected_rooms.append(a)
+
+
+class TestDungeonRooms:
+    def test_room_waves_never_group_connected_rooms(self):
+        hall, armory, crypt, vault = (
+            _room(pk) for pk in ("hall", "armory", "crypt", "vault")
+        )
+        entrance = _room("entrance", is_entrance=True)
+        for room in (hall, armory):
+            _connect(entrance, room)
+        _connect(hall, crypt)
+        _connect(crypt, vault)
+        dungeon = SimpleNamespace(rooms=[hall, armory, crypt, vault, entrance])
+
+        waves = Dungeon.room_waves(dungeon)
+
+        assert waves[0][0] is entrance
+        assert sorted(r.pk for w in waves for r in w) == sorted(
+            r.pk for r in dungeon.rooms
+        )
+        for wave in waves:
+            for room in wave:
+                assert not set(room.connected_rooms) & set(wave)
+
+    def test_generate_rooms_reports_progress(self):
+        rooms = [_room("a"), _room("b"), _room("c")]
+        dungeon = MagicMock(rooms=rooms)
+        dungeon.room_waves.return_value = [rooms[:1], rooms[1:]]
+        progress = MagicMock()
+
+        def generate(pk):
+            if pk == "c":
+                raise ValueError("no response")
+            return next(r for r in rooms if r.pk == pk)
+
+        with patch.object(dungeon_module, "_generate_room", side_effect=generate):
+            Dungeon.generate_rooms(dungeon, max_workers=2, progress=progress)
+
+        assert [c.args[:2] for c in progress.call_args_list] == [
+            (1, 3),
+            (2, 3),
+            (3, 3),
+        ]
+        assert progress.call_args_list[0].args[2] is rooms[0]
+        assert None in [c.args[2] for c in progress.call_args_list]
+        dungeon.reload.assert_called_once()
+
+    def test_generate_rooms_reloads_rooms_saved_by_the_workers(self):
+        rooms = [_room("a"), _room("b")]
+        dungeon = MagicMock(rooms=rooms)
+        dungeon.room_waves.return_value = [rooms]
+        calls = MagicMock()
+        dungeon.reload = calls.reload
+
+        with (
+            patch.object(dungeon_module, "_generate_room", return_value=None),
+            patch.object(dungeon_module.identity_map, "discard", calls.discard),
+        ):
+            Dungeon.generate_rooms(dungeon)
+
+        assert [c[0] for c in calls.mock_calls] == ["discard", "reload"]
+        calls.discard.assert_called_once_with(*rooms)
@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.campaign import episode as episode_module
+from models.campaign.episode import Episode
+
+
+class TestTranscription:
+    def _episode(self, done=None):
+        obj = MagicMock()
+        obj.players = []
+        obj.audio.segments.return_value = [(0, 10), (8, 20), (18, 30)]
+        obj.audio.read_range.side_effect = lambda start, end: f"{start}-{end}".encode()
+        obj.transcription_segments = done or {}
+        return obj
+
+    def test_only_missing_segments_are_transcribed(self):
+        obj = self._episode({"0-10": "one two three four five", "stale": "x"})
+        with patch.object(episode_module.Audio, "transcribe") as transcribe:
+            transcribe.side_effect = lambda audio, **kw: audio.decode()
+            Episode.transcribe(obj, max_workers=2)
+
+        assert sorted(c.args[0] for c in transcribe.call_args_list) == [b"18-30", b"8-20"]
+        assert obj.transcription_segments == {
+            "0-10": "one two three four five",
+            "8-20": "8-20",
+            "18-30": "18-30",
+        }
+        obj.interpret_transcription.assert_called_once()
+
+    def test_failed_segment_keeps_the_others_for_the_next_run(self):
+        obj = self._episode()
+
+        def transcribe(audio, **kw):
+            if audio == b"8-20":
+                raise TimeoutError
+            return audio.decode()
+
+        with (
+            patch.object(episode_module.Audio, "transcribe", side_effect=transcribe),
+            pytest.raises(RuntimeError),
+        ):
+            Episode.transcribe(obj)
+
+        assert obj.transcription_segments == {"0-10": "0-10", "18-30": "18-30"}
+        obj.interpret_transcription.assert_not_called()
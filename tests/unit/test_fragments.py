@@ -0,0 +1,118 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from markupsafe import Markup
+
+from models.utility import fragments
+
+
+@pytest.fixture
+def store():
+    store = fragments.LocalBackend(3)
+    with patch.dict(fragments._backends, {"local": store}), patch.object(
+        fragments, "FRAGMENT_CACHE_BACKEND", "local"
+    ):
+        yield store
+
+
+class Document:
+    _fields = {"render_version": None}
+
+    def __init__(self, pk="1", render_version=0):
+        self.pk = pk
+        self.render_version = render_version
+        self._data = {"render_version": render_version}
+
+    @classmethod
+    def model_name(cls):
+        return "Document"
+
+
+class TestLocalBackend:
+    def test_evicts_the_least_recently_used(self, store):
+        for key in "abc":
+            store.set(key, key, 60)
+        store.get("a")
+        store.set("d", "d", 60)
+
+        assert store.get("b") is None
+        assert [store.get(key) for key in "acd"] == ["a", "c", "d"]
+
+    def test_expires_after_ttl(self, store):
+        store.set("a", "a", -1)
+        assert store.get("a") is None
+
+
+class TestFragments:
+    def test_reuses_fragment_until_version_changes(self, store):
+        doc = Document()
+        produce = MagicMock(return_value=Markup("<p>doc</p>"))
+
+        assert fragments.cached(doc, ["t.html", "m"], produce) == "<p>doc</p>"
+        assert fragments.cached(doc, ["t.html", "m"], produce) == "<p>doc</p>"
+        produce.assert_called_once()
+
+        doc.render_version = 1
+        fragments.cached(doc, ["t.html", "m"], produce)
+        assert produce.call_count == 2
+
+    def test_parts_such_as_role_are_part_of_the_key(self, store):
+        doc = Document()
+        produce = MagicMock(return_value="")
+        fragments.cached(doc, ["t.html", "m", "guest"], produce)
+        fragments.cached(doc, ["t.html", "m", "member"], produce)
+
+        assert produce.call_count == 2
+
+    def test_unversioned_objects_are_always_rendered(self, store):
+        doc = Document(pk=None)
+        produce = MagicMock(return_value="")
+        fragments.cached(doc, ["t.html", "m"], produce)
+        fragments.cached(doc, ["t.html", "m"], produce)
+
+        assert produce.call_count == 2
+
+    def test_off_always_renders(self, store):
+        produce = MagicMock(return_value="")
+        with patch.object(fragments, "FRAGMENT_CACHE_BACKEND", "off"):
+            fragments.cached(Document(), ["t.html", "m"], produce)
+            fragments.cached(Document(), ["t.html", "m"], produce)
+
+        assert produce.call_count == 2
+
+    def test_touch_increments_versions_once_per_model(self):
+        a, b = Document("a", 2), Document("b")
+        with patch.object(Document, "objects", create=True) as objects:
+            fragments.touch(a, b, None, Document(pk=None))
+
+        objects.assert_called_once_with(pk__in=["a", "b"])
+        objects.return_value.update.assert_called_once_with(inc__render_version=1)
+        assert (a._data["render_version"], b._data["render_version"]) == (3, 1)
+
+    def test_role(self):
+        member, stranger = MagicMock(is_guest=False, is_admin=False), MagicMock(
+            is_guest=False, is_admin=True
+        )
+        obj = MagicMock()
+
+        with patch.object(
+            fragments.membership, "is_member", side_effect=lambda u, w: u is member
+        ):
+            assert fragments.role(None, obj) == "guest"
+            assert fragments.role(member, obj) == "member"
+            assert fragments.role(stranger, obj) == "admin+viewer"
+
+    def test_render_keys_on_the_user(self, store):
+        one, two = MagicMock(pk="u1", is_admin=False), MagicMock(
+            pk="u2", is_admin=False
+        )
+        macro = MagicMock(side_effect=lambda user, obj: Markup(user.pk))
+        with (
+            patch.object(fragments.membership, "is_member", return_value=True),
+            patch.object(fragments, "get_template_attribute", return_value=macro),
+        ):
+            assert fragments.render("t.html", "m", one, Document()) == "u1"
+            assert fragments.render("t.html", "m", two, Document()) == "u2"
+            assert fragments.render("t.html", "m", one, Document()) == "u1"
+
+        assert macro.call_count == 2
@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock, patch
+
+from bson import ObjectId
+
+from models.utility import identity_map
+
+
+class Document:
+    def __init__(self, pk=None):
+        self.pk = pk or ObjectId()
+
+    @classmethod
+    def _get_collection_name(cls):
+        return "document"
+
+
+def _get(docs):
+    # identity_map._cached_get wraps the unbound AutoModel.get
+    load = MagicMock(side_effect=lambda cls, pk: docs.get(str(pk)))
+    return load, identity_map._cached_get(load).__func__
+
+
+class TestIdentityMap:
+    def test_each_document_is_loaded_once_per_scope(self):
+        doc = Document()
+        load, get = _get({str(doc.pk): doc})
+        with identity_map.scope() as documents:
+            assert get(Document, str(doc.pk)) is doc
+            assert get(Document, doc.pk) is doc
+
+        load.assert_called_once()
+        assert documents.stats == {"loads": 1, "hits": 1, "discards": 0}
+
+    def test_nothing_is_kept_outside_a_scope(self):
+        doc = Document()
+        load, get = _get({str(doc.pk): doc})
+        get(Document, doc.pk)
+        get(Document, doc.pk)
+
+        assert load.call_count == 2
+        assert identity_map.stats() is None
+
+    def test_save_and_delete_discard_the_document(self):
+        doc = Document()
+        load, get = _get({str(doc.pk): doc})
+        with identity_map.scope() as documents:
+            get(Document, doc.pk)
+            identity_map._discard(Document, doc)
+            get(Document, doc.pk)
+
+        assert load.call_count == 2
+        assert documents.stats["discards"] == 1
+
+    def test_discard_drops_documents_from_the_current_map(self):
+        doc = Document()
+        load, get = _get({str(doc.pk): doc})
+        with identity_map.scope():
+            get(Document, doc.pk)
+            identity_map.discard(doc, None)
+            get(Document, doc.pk)
+
+        assert load.call_count == 2
+
+    def test_scopes_are_separate_units_of_work(self):
+        doc = Document()
+        load, get = _get({str(doc.pk): doc})
+        for _ in range(2):
+            with identity_map.scope():
+                with identity_map.scope():
+                    get(Document, doc.pk)
+                get(Document, doc.pk)
+
+        assert load.call_count == 2
+
+    def test_reference_lists_only_fetch_unknown_documents(self):
+        known, unknown = Document(), Document()
+        dereference = MagicMock()
+        dereference.reference_map = {"document": {known.pk, unknown.pk}}
+        fetch = MagicMock(return_value={("document", unknown.pk): unknown})
+        with identity_map.scope() as documents:
+            documents.put("document", known)
+            objects = identity_map._cached_fetch_objects(fetch)(dereference)
+
+        assert dereference.reference_map == {"document": {unknown.pk}}
+        assert objects == {
+            ("document", known.pk): known,
+            ("document", unknown.pk): unknown,
+        }
+        assert documents.get("document", unknown.pk) is unknown
+
+    def test_can_be_turned_off(self):
+        with patch.object(identity_map, "IDENTITY_MAP", False):
+            with identity_map.scope():
+                assert identity_map.current() is None
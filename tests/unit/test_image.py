@@ -0,0 +1,106 @@
+import io
+from unittest.mock import MagicMock, patch
+
+from PIL import Image as ImageTools
+
+from models.images import image as image_module
+from models.images.image import Image
+
+
+class TestImageDerivatives:
+    def _image(self):
+        img = MagicMock()
+        img.pk = "img_pk_123"
+        img.version = "v1"
+        img._sizes = Image._sizes
+        img.resize.return_value = b"resized"
+        return img
+
+    def test_derivative_resizes_once_per_size(self):
+        img = self._image()
+        stored = {}
+        with patch.object(image_module, "derivatives") as derivatives:
+            derivatives.get.side_effect = lambda pk, v, s: stored.get((pk, v, s))
+            derivatives.put.side_effect = lambda pk, v, s, d: stored.setdefault(
+                (pk, v, s), d
+            )
+            first = Image.derivative(img, "thumbnail")
+            second = Image.derivative(img, "100")
+
+        assert first == second == b"resized"
+        img.resize.assert_called_once_with(100)
+        assert list(stored) == [("img_pk_123", "v1", 100)]
+
+    def test_other_sizes_are_resized_without_storing(self):
+        img = self._image()
+        with patch.object(image_module, "derivatives") as derivatives:
+            assert Image.derivative(img, "123") == b"resized"
+
+        img.resize.assert_called_once_with(123)
+        derivatives.get.assert_not_called()
+        derivatives.put.assert_not_called()
+
+    def test_original_is_not_stored(self):
+        img = self._image()
+        img.read.return_value = b"original"
+        with patch.object(image_module, "derivatives") as derivatives:
+            assert Image.derivative(img, "orig") == b"original"
+
+        derivatives.get.assert_not_called()
+        img.resize.assert_not_called()
+
+    def test_etag_changes_with_version_and_size(self):
+        img = self._image()
+
+        assert Image.etag(img, 100) != Image.etag(img, 300)
+        img.version = "v2"
+        assert Image.etag(img, 100) == "v2-100"
+
+
+class TestImageFromFile:
+    def test_accepts_an_upload_stream(self):
+        upload = io.BytesIO()
+        ImageTools.new("RGB", (4, 4), "red").save(upload, format="PNG")
+        upload.seek(0)
+        cls = MagicMock()
+
+        image = Image.from_file.__func__(cls, upload, tags=["map"])
+
+        assert image is cls.return_value
+        stored = image.data.put.call_args.args[0]
+        assert ImageTools.open(io.BytesIO(stored)).format == "WEBP"
+        image.save.assert_called_once()
+
+
+class TestImageTags:
+    def test_tag_query_lowercases_and_combines_filters(self):
+        with patch.object(Image, "objects") as objects:
+            Image.tag_query(
+                all_tags=["Map", "City"], any_tags=["fantasy"], exclude_tags=["", "x"]
+            )
+
+        objects.assert_called_once_with(
+            tags__all=["map", "city"], tags__in=["fantasy"], tags__nin=["x"]
+        )
+
+    def test_untagged_matches_empty_and_missing_tags(self):
+        with patch.object(Image, "objects") as objects:
+            Image.tag_query(untagged=True)
+
+        (query,), kwargs = objects.call_args
+        assert query.to_query(Image) == {
+            "$or": [{"tags": {"$size": 0}}, {"tags": {"$exists": False}}]
+        }
+        assert kwargs == {}
+
+    def test_search_tags_samples_in_the_database(self):
+        with (
+            patch.object(Image, "tag_query") as tag_query,
+            patch.object(Image, "_from_son", side_effect=lambda doc: doc["_id"]),
+        ):
+            tag_query.return_value.aggregate.return_value = iter([{"_id": 1}])
+            assert Image.search_tags(all_tags=["map"], sample=5) == [1]
+
+        tag_query.return_value.aggregate.assert_called_once_with(
+            [{"$sample": {"size": 5}}]
+        )
@@ -202,3 +202,28 @@ class TestJournalModel:
 
         # Verify sorting (Reverse chronological)
         assert journal_instance.entries == [e2, e1, e3]
+
+    def test_journal_save_refreshes_parent_pages(self, journal_instance):
+        """Test the cached journal of the parent is rendered again after a save."""
+        with patch("models.journal.fragments.touch") as touch:
+            journal_instance.post_save_parent()
+
+        touch.assert_called_once_with(journal_instance.parent)
+
+    def test_journal_entry_save_refreshes_journal_parents(
+        self, journal_entry_instance
+    ):
+        """Test changed entries refresh the pages of the journals they are in."""
+        parent, journal = MagicMock(), MagicMock()
+        journal.parent = parent
+        with (
+            patch("models.journal.fragments.touch") as touch,
+            patch.object(Journal, "objects") as objects,
+            patch.object(JournalEntry, "_get_changed_fields", return_value=["text"]),
+        ):
+            objects.return_value = [journal]
+            journal_entry_instance.post_save_journals()
+            journal_entry_instance.post_save_journals(created=True)
+
+        objects.assert_called_once_with(entries=journal_entry_instance)
+        touch.assert_called_once_with(parent)
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
+
+from models.utility import llm_cache
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient().db[llm_cache.COLLECTION]
+    with (
+        patch.object(llm_cache, "_collection", return_value=collection),
+        patch.object(llm_cache, "LLM_CACHE_TTL", 3600),
+    ):
+        yield collection
+
+
+class TestLLMCache:
+    def test_repeat_request_is_served_from_cache(self, collection):
+        generate = MagicMock(return_value="A short summary.")
+
+        first = llm_cache.cached("summary", "w1", ["primer", "prompt"], generate)
+        second = llm_cache.cached("summary", "w1", ["primer", "prompt"], generate)
+
+        assert first == second == "A short summary."
+        generate.assert_called_once()
+
+    def test_key_covers_world_and_request(self, collection):
+        generate = MagicMock(return_value="text")
+
+        llm_cache.cached("text", "w1", ["", "prompt"], generate)
+        llm_cache.cached("text", "w2", ["", "prompt"], generate)
+        llm_cache.cached("text", "w1", ["primer", "prompt"], generate)
+
+        assert generate.call_count == 3
+
+    def test_bypass_and_empty_responses_are_not_stored(self, collection):
+        llm_cache.cached("text", "w1", ["p"], lambda: "text", enabled=False)
+        llm_cache.cached("text", "w1", ["q"], lambda: "")
+
+        assert collection.count_documents({}) == 0
+
+    def test_invalidate_world(self, collection):
+        llm_cache.cached("text", "w1", ["p"], lambda: "one")
+        llm_cache.cached("text", "w2", ["p"], lambda: "two")
+
+        assert llm_cache.invalidate("w1") == 1
+        assert [d["world"] for d in collection.find()] == ["w2"]
+
+    def test_evicts_least_recently_used(self, collection):
+        with patch.object(llm_cache, "LLM_CACHE_MAX_ENTRIES", 2):
+            llm_cache.cached("text", "w1", ["a"], lambda: "a")
+            llm_cache.cached("text", "w1", ["b"], lambda: "b")
+            collection.update_one(
+                {"_id": llm_cache.cache_key("text", "w1", "a")},
+                {"$set": {"last_used": datetime(2000, 1, 1, tzinfo=timezone.utc)}},
+            )
+            llm_cache.cached("text", "w1", ["c"], lambda: "c")
+
+        assert collection.count_documents({}) == 2
+        assert llm_cache.cache_key("text", "w1", "a") not in [
+            d["_id"] for d in collection.find()
+        ]
@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import Flask
+
+from models.utility import membership
+
+
+@pytest.fixture
+def World():
+    World = MagicMock()
+    with patch.object(membership.AutoModel, "load_model", return_value=World):
+        yield World
+
+
+def _world(pk):
+    return MagicMock(pk=pk)
+
+
+class TestMembership:
+    def test_worlds_are_queried_once_per_request(self, World):
+        user = MagicMock(pk="u")
+        World.objects.return_value.order_by.return_value = [_world("a"), _world("b")]
+        with Flask(__name__).app_context():
+            assert [w.pk for w in membership.worlds(user)] == ["a", "b"]
+            assert membership.is_member(user, _world("b"))
+            assert not membership.is_member(user, _world("c"))
+
+        World.objects.assert_called_once_with(users=user)
+        World.objects.return_value.order_by.assert_called_once_with("id")
+
+    def test_saving_a_world_invalidates(self, World):
+        user = MagicMock(pk="u")
+        World.objects.return_value.order_by.return_value = []
+        with Flask(__name__).app_context():
+            membership.worlds(user)
+            membership.invalidate()
+            membership.worlds(user)
+
+        assert World.objects.call_count == 2
+
+    def test_outside_a_request_checks_one_world(self, World):
+        user, world = MagicMock(pk="u"), _world("a")
+        World.objects.return_value.count.return_value = 1
+
+        assert membership.is_member(user, world)
+        World.objects.assert_called_once_with(pk="a", users=user)
+
+    def test_nobody_is_a_member_of_an_unsaved_world(self, World):
+        assert not membership.is_member(MagicMock(pk="u"), _world(None))
+        assert not membership.is_member(None, _world("a"))
+        assert membership.worlds(None) == []
+        World.objects.assert_not_called()
@@ -0,0 +1,81 @@
+from unittest.mock import MagicMock, patch
+
+from models.utility import parse_attributes
+
+
+class TestParseTextFields:
+    def _obj(self):
+        obj = MagicMock()
+        obj.associations = []
+        obj.backstory = "Some backstory"
+        obj.desc = ""
+        return obj
+
+    def test_skips_unchanged_fields(self):
+        obj = self._obj()
+        with patch.object(
+            parse_attributes, "parse_text", side_effect=lambda o, t: f"<p>{t}</p>"
+        ) as parse_text:
+            fingerprints = parse_attributes.parse_text_fields(
+                obj, ["backstory", "desc"], {}
+            )
+            skipped = parse_attributes.PARSE_STATS["skipped"]
+            fingerprints = parse_attributes.parse_text_fields(
+                obj, ["backstory", "desc"], fingerprints
+            )
+
+        parse_text.assert_called_once_with(obj, "Some backstory")
+        assert obj.backstory == "<p>Some backstory</p>"
+        assert list(fingerprints) == ["backstory"]
+        assert parse_attributes.PARSE_STATS["skipped"] == skipped + 1
+
+    def test_reparses_when_associations_change(self):
+        obj = self._obj()
+        with patch.object(
+            parse_attributes, "parse_text", side_effect=lambda o, t: t
+        ) as parse_text:
+            fingerprints = parse_attributes.parse_text_fields(obj, ["backstory"], {})
+            town = MagicMock(pk="1", path="city/1")
+            town.name = "Town"
+            obj.associations = [town]
+            parse_attributes.parse_text_fields(obj, ["backstory"], fingerprints)
+
+        assert parse_text.call_count == 2
+
+
+class TestSplitText:
+    def test_breaks_on_paragraphs_then_sentences(self):
+        text = "One two three. Four five.\n\nSix seven eight nine ten. Eleven twelve."
+
+        chunks = parse_attributes.split_text(text, 5)
+
+        assert chunks == [
+            "One two three. Four five.",
+            "Six seven eight nine ten.",
+            "Eleven twelve.",
+        ]
+
+    def test_packs_small_paragraphs_together(self):
+        text = "Alpha, beta!\n\nGamma?\n\nDelta epsilon zeta."
+
+        assert parse_attributes.split_text(text, 3) == [
+            "Alpha, beta!\n\nGamma?",
+            "Delta epsilon zeta.",
+        ]
+
+
+class TestStitchText:
+    def test_drops_repeated_overlap(self):
+        first = "The party enters the cave. Bob lights a torch and looks around."
+        second = "Bob lights a torch and looks around! A goblin jumps out."
+
+        assert (
+            parse_attributes.stitch_text([first, second])
+            == "The party enters the cave. Bob lights a torch and looks around. A goblin jumps out."
+        )
+
+    def test_appends_pieces_without_overlap(self):
+        assert (
+            parse_attributes.stitch_text(["First part.", "", "Second part."])
+            == "First part.\n\nSecond part."
+        )
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from autonomous.model.automodel import AutoModel
+
+from models.ttrpgobject.ability import Ability
+from models.utility import registry as world_registry
+
+
+def _model(name, objs):
+    Model = type(name, (), {"_fields": {"world": None}})
+    Model.search = MagicMock(return_value=objs)
+    return Model
+
+
+def _obj(pk, name, model_name):
+    obj = MagicMock()
+    obj.pk = pk
+    obj.name = name
+    obj.model_name.return_value = model_name
+    return obj
+
+
+class TestWorldRegistry:
+    @pytest.fixture
+    def world(self):
+        world = MagicMock()
+        world.pk = "world_pk_123"
+        return world
+
+    def test_objects_loads_once_and_sorts(self, world):
+        Character = _model(
+            "Character",
+            [_obj("c2", "Zed", "Character"), _obj("c1", "Anna", "Character")],
+        )
+        with world_registry.registry_scope():
+            first = world_registry.get_registry(world).objects(Character)
+            second = world_registry.get_registry(world).objects(Character)
+
+        assert [c.name for c in first] == ["Anna", "Zed"]
+        assert [c.pk for c in second] == ["c1", "c2"]
+        Character.search.assert_called_once_with(world=world)
+
+    def test_lookup_by_pk_and_name(self, world):
+        City = _model("City", [_obj("city1", "Riverton", "City")])
+        registry = world_registry.WorldRegistry(world)
+
+        assert registry.get("city1", City).name == "Riverton"
+        assert [c.pk for c in registry.find("riverton", City)] == ["city1"]
+        assert registry.find("Nowhere") == []
+
+    def test_invalidate_reloads_model(self, world):
+        Item = _model("Item", [_obj("i1", "Sword", "Item")])
+        with world_registry.registry_scope():
+            world_registry.get_registry(world).objects(Item)
+            world_registry.invalidate(world, "Item")
+            world_registry.get_registry(world).objects(Item)
+
+        assert Item.search.call_count == 2
+
+    def test_no_caching_outside_scope(self, world):
+        Region = _model("Region", [])
+        world_registry.get_registry(world).objects(Region)
+        world_registry.get_registry(world).objects(Region)
+
+        assert Region.search.call_count == 2
+
+    def test_referrers_uses_index_and_reindex(self, world):
+        character = _obj("char1", "Bob", "Character")
+        story = _obj("s1", "Main", "Story")
+        story.associations = []
+        Story = _model("Story", [story])
+        raw = [{"_id": "s1", "associations": [{"_ref": MagicMock(id="char1")}]}]
+        Story.objects = MagicMock()
+        Story.objects.return_value.only.return_value.as_pymongo.return_value = raw
+        registry = world_registry.WorldRegistry(world)
+
+        assert registry.referrers(character, Story) == [story]
+
+        registry.reindex(story)
+        assert registry.referrers(character, Story) == []
+        Story.objects.assert_called_once_with(world=world)
+
+    def test_reindex_skips_dangling_associations(self, world):
+        character = _obj("char1", "Bob", "Character")
+        story = _obj("s1", "Main", "Story")
+        story.associations = [None, character]
+        Story = _model("Story", [story])
+        Story.objects = MagicMock()
+        Story.objects.return_value.only.return_value.as_pymongo.return_value = []
+        registry = world_registry.WorldRegistry(world)
+        registry.referrers(character, Story)
+
+        registry.reindex(story)
+        assert registry.referrers(character, Story) == [story]
+
+    def test_saving_or_deleting_an_ability_reloads_world_abilities(self, world):
+        Abilities = _model("Ability", [])
+        ability = Ability()
+        with (
+            world_registry.registry_scope(),
+            patch.object(Ability, "world", world),
+            patch.object(AutoModel, "delete"),
+        ):
+            world_registry.get_registry(world).objects(Abilities)
+            ability.post_save_registry()
+            world_registry.get_registry(world).objects(Abilities)
+            ability.delete()
+            world_registry.get_registry(world).objects(Abilities)
+
+        assert Abilities.search.call_count == 3
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
+from pymongo.errors import BulkWriteError
+
+from models.utility import search_index
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient().db[search_index.COLLECTION]
+
+    def bulk_write(requests, ordered=True):
+        # mongomock cannot build bulk operations from this pymongo's ReplaceOne
+        for op in requests:
+            collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+
+    with (
+        patch.object(search_index, "_collection", return_value=collection),
+        patch.object(collection, "bulk_write", side_effect=bulk_write),
+    ):
+        # start from empty, already indexed worlds
+        search_index.rebuild(_world("w1"))
+        search_index.rebuild(_world("w2"))
+        yield collection
+
+
+def _world(pk="w1"):
+    world = MagicMock(pk=pk)
+    world.name = pk
+    world.all_models.return_value = []
+    return world
+
+
+def _obj(pk, name, model="Character", world=None):
+    obj = MagicMock(pk=pk, world=world or _world())
+    obj.name = name
+    obj.model_name.return_value = model
+    return obj
+
+
+def _names(entries):
+    return [e["name"] for e in entries]
+
+
+class TestSearchIndex:
+    def test_ranks_exact_prefix_infix_and_fuzzy(self, collection):
+        for pk, name in enumerate(
+            ["Ravenholm", "The Raven", "Raven", "Cravenmoor", "Rvaen Keep", "Stone"]
+        ):
+            search_index.update(_obj(str(pk), name))
+
+        results = search_index.lookup([_world()], "raven")
+
+        assert _names(results) == [
+            "Raven",
+            "Ravenholm",
+            "The Raven",
+            "Cravenmoor",
+        ]
+
+    def test_fuzzy_matches_misspellings(self, collection):
+        search_index.update(_obj("1", "Whisperwood"))
+        search_index.update(_obj("2", "Ironhold"))
+
+        assert _names(search_index.lookup([_world()], "whisprwood")) == ["Whisperwood"]
+
+    def test_save_and_delete_keep_the_index_current(self, collection):
+        obj = _obj("1", "Old Name")
+        search_index.update(obj)
+        obj.name = "Émile the Bold"
+        search_index.update(obj)
+
+        assert _names(search_index.lookup([_world()], "emile")) == ["Émile the Bold"]
+        assert search_index.lookup([_world()], "old name") == []
+        search_index.remove(obj)
+        assert search_index.lookup([_world()], "emile") == []
+
+    def test_filters_by_world_model_and_limit(self, collection):
+        search_index.update(_obj("1", "Ash Tower", "City"))
+        search_index.update(_obj("2", "Ash Blade", "Item"))
+        search_index.update(_obj("3", "Ash Road", "City", world=_world("w2")))
+
+        assert _names(search_index.lookup([_world()], "ash", models=["City"])) == [
+            "Ash Tower"
+        ]
+        assert len(search_index.lookup([_world(), _world("w2")], "ash")) == 3
+        assert len(search_index.lookup([_world(), _world("w2")], "ash", limit=2)) == 2
+
+    def test_unindexed_world_is_built_once(self, collection):
+        world = _world("w3")
+        Model = MagicMock(__name__="City")
+        Model.objects.return_value.only.return_value.as_pymongo.return_value = [
+            {"_id": "1", "name": "Ash Tower"},
+            {"_id": "2", "name": ""},
+        ]
+        world.all_models.return_value = [Model]
+
+        assert _names(search_index.lookup([world], "ash")) == ["Ash Tower"]
+        search_index.lookup([world], "tower")
+
+        Model.objects.assert_called_once_with(world=world)
+
+    def test_rebuilding_twice_keeps_one_entry_per_name(self, collection):
+        world = _world("w3")
+        Model = MagicMock(__name__="City")
+        docs = Model.objects.return_value.only.return_value.as_pymongo
+        docs.return_value = [
+            {"_id": "1", "name": "Ash Tower"},
+            {"_id": "2", "name": "Elm"},
+        ]
+        world.all_models.return_value = [Model]
+
+        search_index.rebuild(world)
+        docs.return_value = [{"_id": "1", "name": "Ash Tower"}]
+        search_index.rebuild(world)
+
+        assert _names(search_index.lookup([world], "ash")) == ["Ash Tower"]
+        assert search_index.lookup([world], "elm") == []
+        assert collection.count_documents({"world": "w3"}) == 2
+
+    def test_index_errors_return_no_results(self, collection):
+        with patch.object(
+            search_index, "ensure", side_effect=BulkWriteError({"writeErrors": []})
+        ):
+            assert search_index.lookup([_world("w3")], "ash") == []
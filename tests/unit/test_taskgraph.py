@@ -0,0 +1,126 @@
+from contextlib import nullcontext
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from models.utility import taskgraph
+
+
+class Connection:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def lock(self, *args, **kwargs):
+        return nullcontext()
+
+
+@pytest.fixture
+def queue():
+    """
+    Enqueues fake jobs whose status the test can change through `queue.statuses`.
+    """
+    connection = Connection()
+    queue = MagicMock()
+    queue.statuses = {}
+    dependencies = {}
+
+    def enqueue(func, job_id=None, depends_on=None, **kwargs):
+        job_id = job_id or f"job{len(queue.statuses) + 1}"
+        dependencies[job_id] = depends_on or []
+        queue.statuses[job_id] = "deferred" if depends_on else "queued"
+        return MagicMock(id=job_id)
+
+    def fetch(job_id, connection=None):
+        return MagicMock(
+            get_status=lambda: queue.statuses[job_id],
+            dependency_ids=dependencies[job_id],
+        )
+
+    def fetch_many(job_ids, connection=None):
+        return [fetch(j) if j in queue.statuses else None for j in job_ids]
+
+    queue.enqueue.side_effect = enqueue
+    with (
+        patch.object(taskgraph, "_connection", return_value=connection),
+        patch.object(taskgraph, "AutoTasks", MagicMock(queue=queue)),
+        patch.object(taskgraph.Job, "fetch", side_effect=fetch),
+        patch.object(taskgraph.Job, "fetch_many", side_effect=fetch_many),
+        patch.object(taskgraph.Job, "exists", return_value=True),
+    ):
+        yield queue
+
+
+def _task(name):
+    task = MagicMock()
+    task.__name__ = name
+    return task
+
+
+class TestEnqueue:
+    def test_identical_requests_share_a_queued_job(self, queue):
+        task = _task("_generate_task")
+        first = taskgraph.enqueue(task, model="character", pk="1")
+
+        assert taskgraph.enqueue(task, pk="1", model="character") == first
+        assert queue.enqueue.call_count == 1
+
+    def test_requests_with_other_arguments_are_not_dropped(self, queue):
+        chat = _task("_generate_character_chat_task")
+        history = _task("_generate_history_task")
+        merge = _task("_generate_event_from_events_task")
+        jobs = {
+            taskgraph.enqueue(chat, pk="1", chat="Hello"),
+            taskgraph.enqueue(chat, pk="1", chat="Who are you?"),
+            taskgraph.enqueue(history, model="city", pk="1"),
+            taskgraph.enqueue(history, model="city", pk="1", rebuild=True),
+            taskgraph.enqueue(merge, event_ids=["a", "b"]),
+            taskgraph.enqueue(merge, event_ids=["c", "d"]),
+        }
+
+        assert len(jobs) == queue.enqueue.call_count == 6
+
+    def test_started_jobs_do_not_take_new_requests(self, queue):
+        task = _task("_generate_task")
+        first = taskgraph.enqueue(task, model="character", pk="1")
+        queue.statuses[first] = "started"
+
+        assert taskgraph.enqueue(task, model="character", pk="1") != first
+
+    def test_waits_on_unfinished_prerequisites_of_the_object(self, queue):
+        generate = taskgraph.enqueue(_task("_generate_task"), model="city", pk="1")
+        queue.statuses[generate] = "started"
+        other = taskgraph.enqueue(_task("_generate_task"), model="city", pk="2")
+        taskgraph.enqueue(_task("_generate_image_task"), model="city", pk="1")
+
+        assert queue.enqueue.call_args.kwargs["depends_on"] == [generate]
+        assert other not in queue.enqueue.call_args.kwargs["depends_on"]
+
+    def test_finished_prerequisites_are_not_waited_on(self, queue):
+        generate = taskgraph.enqueue(_task("_generate_task"), model="city", pk="1")
+        queue.statuses[generate] = "finished"
+        taskgraph.enqueue(_task("_generate_image_task"), model="city", pk="1")
+
+        assert queue.enqueue.call_args.kwargs["depends_on"] is None
+
+    def test_deferred_jobs_behind_a_failed_prerequisite_are_replaced(self, queue):
+        generate = taskgraph.enqueue(_task("_generate_task"), model="city", pk="1")
+        queue.statuses[generate] = "started"
+        image = taskgraph.enqueue(_task("_generate_image_task"), model="city", pk="1")
+
+        assert queue.statuses[image] == "deferred"
+        assert (
+            taskgraph.enqueue(_task("_generate_image_task"), model="city", pk="1")
+            == image
+        )
+
+        queue.statuses[generate] = "failed"
+        retry = taskgraph.enqueue(_task("_generate_image_task"), model="city", pk="1")
+
+        assert retry != image
+        assert queue.enqueue.call_args.kwargs["depends_on"] is None
@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+import requests
+
+from models.utility import tasks
+
+
+class TestTaskBatch:
+    def test_submit_posts_before_returning(self):
+        batch = tasks.TaskBatch()
+        first = batch.add("/generate/summaries/city/1")
+        second = batch.add("/generate/history/city/1", depends_on=first)
+        with patch.object(tasks._session, "post") as post:
+            assert batch.submit() == [first, second]
+
+        jobs = post.call_args.kwargs["json"]["jobs"]
+        assert [j["endpoint"] for j in jobs] == [
+            "generate/summaries/city/1",
+            "generate/history/city/1",
+        ]
+        assert jobs[1]["depends_on"] == [first]
+        assert batch.jobs == []
+
+    def test_failed_submit_is_logged_and_returns_no_jobs(self):
+        batch = tasks.TaskBatch()
+        batch.add("/generate/ability/1")
+        with (
+            patch.object(
+                tasks._session, "post", side_effect=requests.ConnectionError("down")
+            ),
+            patch.object(tasks, "log") as log,
+        ):
+            assert batch.submit() == []
+
+        log.assert_called_once()
+
+    def test_empty_batch_posts_nothing(self):
+        with patch.object(tasks._session, "post") as post:
+            assert tasks.TaskBatch().submit() == []
+
+        post.assert_not_called()
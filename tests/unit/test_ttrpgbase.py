@@ -294,3 +294,58 @@ class TestTTRPGBase:
                 )
                 assert mock_instance.image == mock_img_obj
                 mock_img_obj.save.assert_called()
+
+
+class TestIncrementalHistory:
+    def _obj(self, built_from, new_date=3):
+        old = MagicMock(pk="e1", end_date=2)
+        new = MagicMock(pk="e2", end_date=new_date)
+        obj = MagicMock()
+        obj.events = [new, old]
+        obj.history = "<p>Once upon a time.</p>"
+        obj.history_built_from = built_from
+        obj._history_sources.return_value = {"basis": "b", "e1": "x", "e2": "y"}
+        return obj, new
+
+    def test_only_new_events_extend_the_history(self):
+        obj, new = self._obj({"basis": "b", "e1": "x"})
+
+        TTRPGBase.generate_history(obj)
+
+        obj._extend_history.assert_called_once_with([new])
+        obj._rebuild_history.assert_not_called()
+        assert obj.history_built_from == {"basis": "b", "e1": "x", "e2": "y"}
+
+    def test_changed_basis_or_event_rebuilds(self):
+        for built_from in ({"basis": "old", "e1": "x"}, {"basis": "b", "e1": "old"}):
+            obj, _ = self._obj(built_from)
+
+            TTRPGBase.generate_history(obj)
+
+            obj._rebuild_history.assert_called_once()
+            obj._extend_history.assert_not_called()
+
+    def test_event_before_the_told_ones_rebuilds(self):
+        obj, _ = self._obj({"basis": "b", "e1": "x"}, new_date=1)
+
+        TTRPGBase.generate_history(obj)
+
+        obj._rebuild_history.assert_called_once()
+
+    def test_rebuild_on_demand_and_without_record(self):
+        obj, _ = self._obj({"basis": "b", "e1": "x", "e2": "y"})
+        TTRPGBase.generate_history(obj, rebuild=True)
+        obj._rebuild_history.assert_called_once()
+
+        obj, _ = self._obj({})
+        TTRPGBase.generate_history(obj)
+        obj._rebuild_history.assert_called_once()
+
+    def test_up_to_date_history_is_left_alone(self):
+        obj, _ = self._obj({"basis": "b", "e1": "x", "e2": "y"})
+
+        TTRPGBase.generate_history(obj)
+
+        obj._rebuild_history.assert_not_called()
+        obj._extend_history.assert_not_called()
+        obj.save.assert_not_called()
@@ -118,6 +118,17 @@ class TestWorldModel:
         assert child.world == world_instance
         child.save.assert_called()
 
+    def test_add_associations_moves_objects_into_the_world(self, world_instance):
+        """Test adding several associations only sets each object's world."""
+        child, member = MagicMock(world=None), MagicMock(world=world_instance)
+
+        with patch.object(World, "associations", new=[]):
+            assert world_instance.add_associations([child, None, member]) == []
+
+        assert child.world == world_instance
+        child.save.assert_called_once()
+        member.save.assert_not_called()
+
     def test_events_property(self, world_instance, mock_associated_models):
         """Test events property sorting."""
         e1 = MagicMock(end_date="2023-01-01")